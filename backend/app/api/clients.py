@@ -3,7 +3,11 @@ from fastapi import APIRouter, Query, HTTPException, Body, Path
 from typing import Optional
 from datetime import datetime
 
-from ..db import get_connection
+from ..db import get_connection, get_read_connection
+from ..db_executor import db_thread, ANALYTICS_LANE
+from ..http_cache import versioned_by
+from ..pagination import fetch_page
+from ..serialization import list_response
 from ..models.clients import (
     ClientModel, ClientCreate, ClientUpdate, ClientResponse,
     ClientFolderModel, ClientFolderCreate, ClientFolderUpdate, ClientFolderResponse,
@@ -17,13 +21,16 @@ router = APIRouter(prefix="/api")
 
 # ----- CLIENTS -----
 @router.get("/clients", response_model=ClientResponse)
-async def get_clients(
+@versioned_by("clients")
+@db_thread
+def get_clients(
     client_id: Optional[int] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get all active clients"""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         query = "SELECT * FROM clients WHERE valid_to IS NULL"
         params = []
         
@@ -31,21 +38,14 @@ async def get_clients(
             query += " AND client_id = ?"
             params.append(client_id)
             
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        query += " ORDER BY display_name LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        clients = [ClientModel.model_validate(dict(row)) for row in rows]
-        
-        return ClientResponse(items=clients, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "display_name", limit, offset, include_total
+        )
+        return list_response(ClientModel, rows, total=total)
 
 @router.post("/clients", response_model=ClientModel)
-async def create_client(client: ClientCreate):
+@db_thread
+def create_client(client: ClientCreate):
     """Create a new client"""
     with get_connection() as conn:
         cursor = conn.execute(
@@ -65,7 +65,8 @@ async def create_client(client: ClientCreate):
         return ClientModel.model_validate(dict(row))
 
 @router.put("/clients/{client_id}", response_model=ClientModel)
-async def update_client(
+@db_thread
+def update_client(
     client_id: int = Path(...),
     client: ClientUpdate = Body(...)
 ):
@@ -119,7 +120,8 @@ async def update_client(
         return ClientModel.model_validate(dict(row))
 
 @router.delete("/clients/{client_id}", response_model=ClientModel)
-async def delete_client(client_id: int = Path(...)):
+@db_thread
+def delete_client(client_id: int = Path(...)):
     """Soft delete a client by setting valid_to"""
     with get_connection() as conn:
         # Check if client exists
@@ -147,13 +149,16 @@ async def delete_client(client_id: int = Path(...)):
 
 # ----- CLIENT FOLDERS -----
 @router.get("/client-folders", response_model=ClientFolderResponse)
-async def get_client_folders(
+@versioned_by("client_folders")
+@db_thread
+def get_client_folders(
     client_id: Optional[int] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get client folders"""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         query = "SELECT * FROM client_folders"
         params = []
         
@@ -161,21 +166,14 @@ async def get_client_folders(
             query += " WHERE client_id = ?"
             params.append(client_id)
             
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        query += " ORDER BY client_id LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        folders = [ClientFolderModel.model_validate(dict(row)) for row in rows]
-        
-        return ClientFolderResponse(items=folders, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "client_id", limit, offset, include_total
+        )
+        return list_response(ClientFolderModel, rows, total=total)
 
 @router.post("/client-folders", response_model=ClientFolderModel)
-async def create_client_folder(folder: ClientFolderCreate):
+@db_thread
+def create_client_folder(folder: ClientFolderCreate):
     """Create a client folder"""
     with get_connection() as conn:
         try:
@@ -205,7 +203,8 @@ async def create_client_folder(folder: ClientFolderCreate):
             raise
 
 @router.put("/client-folders/{client_id}", response_model=ClientFolderModel)
-async def update_client_folder(
+@db_thread
+def update_client_folder(
     client_id: int = Path(...),
     folder: ClientFolderUpdate = Body(...)
 ):
@@ -237,7 +236,8 @@ async def update_client_folder(
         return ClientFolderModel.model_validate(dict(row))
 
 @router.delete("/client-folders/{client_id}")
-async def delete_client_folder(client_id: int = Path(...)):
+@db_thread
+def delete_client_folder(client_id: int = Path(...)):
     """Delete a client folder"""
     with get_connection() as conn:
         # Check if folder exists
@@ -260,15 +260,18 @@ async def delete_client_folder(client_id: int = Path(...)):
 
 # ----- CLIENT PROVIDERS -----
 @router.get("/client-providers", response_model=ClientProviderResponse)
-async def get_client_providers(
+@versioned_by("client_providers")
+@db_thread
+def get_client_providers(
     client_id: Optional[int] = Query(None),
     provider_id: Optional[int] = Query(None),
     is_active: Optional[int] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get client providers with filtering options"""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         query = "SELECT * FROM client_providers"
         conditions = []
         params = []
@@ -288,21 +291,14 @@ async def get_client_providers(
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
             
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        query += " ORDER BY client_id, provider_id LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        providers = [ClientProviderModel.model_validate(dict(row)) for row in rows]
-        
-        return ClientProviderResponse(items=providers, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "client_id, provider_id", limit, offset, include_total
+        )
+        return list_response(ClientProviderModel, rows, total=total)
 
 @router.post("/client-providers", response_model=ClientProviderModel)
-async def create_client_provider(provider: ClientProviderCreate):
+@db_thread
+def create_client_provider(provider: ClientProviderCreate):
     """Create a client-provider relationship"""
     with get_connection() as conn:
         try:
@@ -333,7 +329,8 @@ async def create_client_provider(provider: ClientProviderCreate):
             raise
 
 @router.put("/client-providers/{client_id}/{provider_id}", response_model=ClientProviderModel)
-async def update_client_provider(
+@db_thread
+def update_client_provider(
     client_id: int = Path(...),
     provider_id: int = Path(...),
     provider: ClientProviderUpdate = Body(...)
@@ -389,7 +386,8 @@ async def update_client_provider(
         return ClientProviderModel.model_validate(dict(row))
 
 @router.delete("/client-providers/{client_id}/{provider_id}")
-async def delete_client_provider(
+@db_thread
+def delete_client_provider(
     client_id: int = Path(...),
     provider_id: int = Path(...)
 ):
@@ -415,15 +413,18 @@ async def delete_client_provider(
 
 # ----- CONTACTS -----
 @router.get("/contacts", response_model=ContactResponse)
-async def get_contacts(
+@versioned_by("contacts")
+@db_thread
+def get_contacts(
     contact_id: Optional[int] = Query(None),
     client_id: Optional[int] = Query(None),
     contact_type: Optional[str] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get contacts with filtering options"""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         query = "SELECT * FROM contacts WHERE valid_to IS NULL"
         params = []
         
@@ -439,21 +440,14 @@ async def get_contacts(
             query += " AND contact_type = ?"
             params.append(contact_type)
             
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        query += " ORDER BY client_id, contact_type LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        contacts = [ContactModel.model_validate(dict(row)) for row in rows]
-        
-        return ContactResponse(items=contacts, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "client_id, contact_type", limit, offset, include_total
+        )
+        return list_response(ContactModel, rows, total=total)
 
 @router.post("/contacts", response_model=ContactModel)
-async def create_contact(contact: ContactCreate):
+@db_thread
+def create_contact(contact: ContactCreate):
     """Create a new contact"""
     with get_connection() as conn:
         try:
@@ -485,7 +479,8 @@ async def create_contact(contact: ContactCreate):
             raise
 
 @router.put("/contacts/{contact_id}", response_model=ContactModel)
-async def update_contact(
+@db_thread
+def update_contact(
     contact_id: int = Path(...),
     contact: ContactUpdate = Body(...)
 ):
@@ -553,7 +548,8 @@ async def update_contact(
         return ContactModel.model_validate(dict(row))
 
 @router.delete("/contacts/{contact_id}", response_model=ContactModel)
-async def delete_contact(contact_id: int = Path(...)):
+@db_thread
+def delete_contact(contact_id: int = Path(...)):
     """Soft delete a contact by setting valid_to"""
     with get_connection() as conn:
         # Check if contact exists
@@ -581,13 +577,16 @@ async def delete_contact(contact_id: int = Path(...)):
 
 # ----- CLIENT PAYMENT SUMMARIES (VIEWS) -----
 @router.get("/clients/first-payments", response_model=ClientFirstPaymentResponse)
-async def get_client_first_payments(
+@versioned_by("v_client_payment_first")
+@db_thread(lane=ANALYTICS_LANE)
+def get_client_first_payments(
     client_id: Optional[int] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get first payment details for each client"""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         query = "SELECT * FROM v_client_payment_first"
         params = []
         
@@ -595,31 +594,23 @@ async def get_client_first_payments(
             query += " WHERE client_id = ?"
             params.append(client_id)
             
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination
-        query += " ORDER BY display_name LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        first_payments = [ClientFirstPaymentViewModel.model_validate(dict(row)) for row in rows]
-        
-        return ClientFirstPaymentResponse(items=first_payments, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "display_name", limit, offset, include_total
+        )
+        return list_response(ClientFirstPaymentViewModel, rows, total=total)
 
 @router.get("/clients/last-payments", response_model=ClientLastPaymentResponse)
-async def get_client_last_payments(
+@versioned_by("v_client_payment_last")
+@db_thread(lane=ANALYTICS_LANE)
+def get_client_last_payments(
     client_id: Optional[int] = Query(None),
     min_days: Optional[int] = Query(None, description="Minimum days since last payment"),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get last payment details for each client"""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         query = "SELECT * FROM v_client_payment_last"
         conditions = []
         params = []
@@ -635,18 +626,7 @@ async def get_client_last_payments(
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
             
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination
-        query += " ORDER BY days_since_last_payment DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        last_payments = [ClientLastPaymentViewModel.model_validate(dict(row)) for row in rows]
-        
-        return ClientLastPaymentResponse(items=last_payments, total=total)
\ No newline at end of file
+        rows, total = fetch_page(
+            conn, query, params, "days_since_last_payment DESC", limit, offset, include_total
+        )
+        return list_response(ClientLastPaymentViewModel, rows, total=total)
\ No newline at end of file
@@ -3,7 +3,14 @@ from fastapi import APIRouter, Query, HTTPException, Body, Path
 from typing import Optional
 from datetime import datetime
 
-from ..db import get_connection
+from ..db import get_connection, get_read_connection
+from ..db_executor import db_thread, ANALYTICS_LANE
+from ..http_cache import versioned_by
+from ..date_utils import through_current_period
+from ..maintenance import sync_period_ledger
+from ..pagination import fetch_page
+from ..reference_cache import ACTIVE_CONTRACTS_CACHE, cached_response, invalidate
+from ..serialization import list_response
 from ..models.contracts import (
     ContractModel, ContractCreate, ContractUpdate, ContractResponse,
     ActiveContractViewModel, ActiveContractResponse,
@@ -13,19 +20,28 @@ from ..models.contracts import (
 
 router = APIRouter(prefix="/api")
 
+# Open gaps from the trigger-maintained ledger (database migration 007)
+MISSING_PERIODS_QUERY = """
+    SELECT client_id, payment_schedule, period_key, period_label, 'Missing' AS status
+    FROM missing_periods
+"""
+
 # ----- CONTRACTS -----
 @router.get("/contracts", response_model=ContractResponse)
-async def get_contracts(
+@versioned_by("contracts")
+@db_thread
+def get_contracts(
     contract_id: Optional[int] = Query(None),
     client_id: Optional[int] = Query(None),
     provider_id: Optional[int] = Query(None),
     is_active: Optional[int] = Query(None),
     payment_schedule: Optional[str] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get contracts with filtering options"""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         query = "SELECT * FROM contracts WHERE valid_to IS NULL"
         params = []
         
@@ -49,21 +65,14 @@ async def get_contracts(
             query += " AND payment_schedule = ?"
             params.append(payment_schedule)
             
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        query += " ORDER BY client_id, contract_id LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        contracts = [ContractModel.model_validate(dict(row)) for row in rows]
-        
-        return ContractResponse(items=contracts, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "client_id, contract_id", limit, offset, include_total
+        )
+        return list_response(ContractModel, rows, total=total)
 
 @router.post("/contracts", response_model=ContractModel)
-async def create_contract(contract: ContractCreate):
+@db_thread
+def create_contract(contract: ContractCreate):
     """Create a new contract"""
     with get_connection() as conn:
         try:
@@ -81,6 +90,7 @@ async def create_contract(contract: ContractCreate):
                 )
             )
             conn.commit()
+            invalidate(ACTIVE_CONTRACTS_CACHE)
             
             # Get the created contract
             contract_id = cursor.lastrowid
@@ -95,7 +105,8 @@ async def create_contract(contract: ContractCreate):
             raise
 
 @router.put("/contracts/{contract_id}", response_model=ContractModel)
-async def update_contract(
+@db_thread
+def update_contract(
     contract_id: int = Path(...),
     contract: ContractUpdate = Body(...)
 ):
@@ -159,6 +170,7 @@ async def update_contract(
             params
         )
         conn.commit()
+        invalidate(ACTIVE_CONTRACTS_CACHE)
         
         # Get updated contract
         cursor = conn.execute("SELECT * FROM contracts WHERE contract_id = ?", (contract_id,))
@@ -167,7 +179,8 @@ async def update_contract(
         return ContractModel.model_validate(dict(row))
 
 @router.delete("/contracts/{contract_id}", response_model=ContractModel)
-async def delete_contract(contract_id: int = Path(...)):
+@db_thread
+def delete_contract(contract_id: int = Path(...)):
     """Soft delete a contract by setting valid_to"""
     with get_connection() as conn:
         # Check if contract exists
@@ -186,6 +199,7 @@ async def delete_contract(contract_id: int = Path(...)):
             (now, contract_id)
         )
         conn.commit()
+        invalidate(ACTIVE_CONTRACTS_CACHE)
         
         # Get updated contract
         cursor = conn.execute("SELECT * FROM contracts WHERE contract_id = ?", (contract_id,))
@@ -195,14 +209,24 @@ async def delete_contract(contract_id: int = Path(...)):
 
 # ----- CONTRACT-RELATED VIEWS -----
 @router.get("/active-contracts", response_model=ActiveContractResponse)
-async def get_active_contracts(
+@versioned_by("v_active_contracts")
+@db_thread
+def get_active_contracts(
     client_id: Optional[int] = Query(None),
     payment_schedule: Optional[str] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get all active contracts"""
-    with get_connection() as conn:
+    return cached_response(
+        ACTIVE_CONTRACTS_CACHE,
+        (client_id, payment_schedule, limit, offset, include_total),
+        lambda: _active_contracts_page(client_id, payment_schedule, limit, offset, include_total),
+    )
+
+def _active_contracts_page(client_id, payment_schedule, limit, offset, include_total):
+    with get_read_connection() as conn:
         query = "SELECT * FROM v_active_contracts"
         conditions = []
         params = []
@@ -218,34 +242,28 @@ async def get_active_contracts(
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
             
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination
-        query += " ORDER BY client_id LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        contracts = [ActiveContractViewModel.model_validate(dict(row)) for row in rows]
-        
-        return ActiveContractResponse(items=contracts, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "client_id", limit, offset, include_total
+        )
+        return list_response(ActiveContractViewModel, rows, total=total)
 
 @router.get("/expected-periods", response_model=ExpectedPeriodResponse)
-async def get_expected_periods(
+@versioned_by("expected_periods")
+@db_thread(lane=ANALYTICS_LANE)
+def get_expected_periods(
     client_id: Optional[int] = Query(None),
     payment_schedule: Optional[str] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get all periods a client should have paid for"""
-    with get_connection() as conn:
-        query = "SELECT * FROM v_client_expected_periods"
-        conditions = []
-        params = []
+    sync_period_ledger()
+    with get_read_connection() as conn:
+        query = "SELECT * FROM expected_periods"
+        # Up to the current billing period from the in-memory calendar
+        bound, params = through_current_period()
+        conditions = [bound]
         
         if client_id is not None:
             conditions.append("client_id = ?")
@@ -255,37 +273,30 @@ async def get_expected_periods(
             conditions.append("payment_schedule = ?")
             params.append(payment_schedule)
             
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
+        query += " WHERE " + " AND ".join(conditions)
             
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination
-        query += " ORDER BY client_id, period_key DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        periods = [ExpectedPeriodViewModel.model_validate(dict(row)) for row in rows]
-        
-        return ExpectedPeriodResponse(items=periods, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "client_id, period_key DESC", limit, offset, include_total
+        )
+        return list_response(ExpectedPeriodViewModel, rows, total=total)
 
 @router.get("/missing-periods", response_model=MissingPaymentPeriodResponse)
-async def get_missing_periods(
+@versioned_by("missing_periods")
+@db_thread(lane=ANALYTICS_LANE)
+def get_missing_periods(
     client_id: Optional[int] = Query(None),
     payment_schedule: Optional[str] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get all periods that should have been paid but weren't"""
-    with get_connection() as conn:
-        query = "SELECT * FROM v_all_missing_payment_periods"
-        conditions = []
-        params = []
+    sync_period_ledger()
+    with get_read_connection() as conn:
+        query = MISSING_PERIODS_QUERY
+        # Up to the current billing period from the in-memory calendar
+        bound, params = through_current_period()
+        conditions = [bound]
         
         if client_id is not None:
             conditions.append("client_id = ?")
@@ -295,21 +306,9 @@ async def get_missing_periods(
             conditions.append("payment_schedule = ?")
             params.append(payment_schedule)
             
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
+        query += " WHERE " + " AND ".join(conditions)
             
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination
-        query += " ORDER BY client_id, period_key DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        missing = [MissingPaymentPeriodViewModel.model_validate(dict(row)) for row in rows]
-        
-        return MissingPaymentPeriodResponse(items=missing, total=total)
\ No newline at end of file
+        rows, total = fetch_page(
+            conn, query, params, "client_id, period_key DESC", limit, offset, include_total
+        )
+        return list_response(MissingPaymentPeriodViewModel, rows, total=total)
\ No newline at end of file
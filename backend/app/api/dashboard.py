@@ -0,0 +1,141 @@
+# app/api/dashboard.py
+from fastapi import APIRouter, Query, HTTPException, Path
+
+from ..db import get_read_connection
+from ..db_executor import db_thread, ANALYTICS_LANE
+from ..date_utils import current_periods, through_current_period
+from ..http_cache import versioned_by
+from ..maintenance import sync_period_ledger
+from ..pagination import fetch_dicts, fetch_keyed_page
+from ..period_index import period_index
+from ..serialization import FastJSONResponse, trusted_rows
+from ..models.clients import ClientModel, ContactModel, ClientLastPaymentViewModel, ClientDashboardResponse
+from ..models.contracts import ContractModel, MissingPaymentPeriodViewModel
+from ..models.payments import PaymentViewModel, PaymentStatusViewModel
+from .contracts import MISSING_PERIODS_QUERY
+from .payments import PAYMENT_KEYSET
+
+router = APIRouter(prefix="/api")
+
+# Same rows as /api/payments?client_id=; display_name comes from the client row
+CLIENT_PAYMENTS_QUERY = "SELECT p.* FROM v_payments p WHERE p.valid_to IS NULL AND p.client_id = ?"
+
+# Current-period keys the client has paid, for the payment status section
+PAID_CURRENT_PERIODS_QUERY = """
+    SELECT DISTINCT payment_schedule, period_key FROM payment_periods
+    WHERE client_id = ?
+      AND ((payment_schedule = 'monthly' AND period_key = ?)
+        OR (payment_schedule = 'quarterly' AND period_key = ?))
+"""
+
+
+def _payment_status(conn, client_id, active_contracts, periods):
+    """
+    Rows of /api/payment-status?client_id= built from the client's active
+    contracts (already read) and one lookup of the periods paid
+    """
+    current = {
+        "monthly": (periods.current_monthly_key,
+                    period_index("monthly", conn).label(periods.current_monthly_key)),
+        "quarterly": (periods.current_quarterly_key,
+                      period_index("quarterly", conn).label(periods.current_quarterly_key)),
+    }
+    paid = {
+        (row["payment_schedule"], row["period_key"])
+        for row in fetch_dicts(
+            conn, PAID_CURRENT_PERIODS_QUERY,
+            [client_id, current["monthly"][0], current["quarterly"][0]],
+        )
+    }
+    rows = []
+    for contract in active_contracts:
+        schedule = contract["payment_schedule"]
+        if schedule not in current:
+            continue
+        period_key, period_label = current[schedule]
+        rows.append({
+            "client_id": client_id,
+            "payment_schedule": schedule,
+            "period_key": period_key,
+            "period_label": period_label,
+            "status": "Paid" if (schedule, period_key) in paid else "Unpaid",
+        })
+    return rows
+
+
+@router.get("/clients/{client_id}/dashboard", response_model=ClientDashboardResponse)
+@versioned_by(
+    "clients", "contracts", "contacts", "v_payments", "v_client_payment_last",
+    "payment_periods", "missing_periods",
+)
+@db_thread(lane=ANALYTICS_LANE)
+def get_client_dashboard(
+    client_id: int = Path(...),
+    payments_limit: int = Query(100, description="Most recent payments to include"),
+):
+    """
+    Everything the client page shows, in one response: the client, its
+    contracts, contacts, recent payments, last payment, current-period
+    payment status and missing periods. Read from one connection in one
+    read transaction, so all sections reflect the same database state.
+    """
+    sync_period_ledger()
+    with get_read_connection() as conn:
+        conn.execute("BEGIN")
+        try:
+            clients = fetch_dicts(
+                conn, "SELECT * FROM clients WHERE client_id = ? AND valid_to IS NULL", [client_id]
+            )
+            if not clients:
+                raise HTTPException(status_code=404, detail="Client not found")
+            client = clients[0]
+
+            # Read once; the active subset (v_active_contracts) feeds the payment status
+            contracts = fetch_dicts(
+                conn,
+                "SELECT * FROM contracts WHERE client_id = ? AND valid_to IS NULL ORDER BY contract_id",
+                [client_id],
+            )
+            active_contracts = [contract for contract in contracts if contract["is_active"] == 1]
+
+            contacts = fetch_dicts(
+                conn,
+                "SELECT * FROM contacts WHERE client_id = ? AND valid_to IS NULL ORDER BY contact_type",
+                [client_id],
+            )
+
+            payments, total, next_cursor = fetch_keyed_page(
+                conn, CLIENT_PAYMENTS_QUERY, [client_id], PAYMENT_KEYSET, payments_limit, 0
+            )
+            for payment in payments:
+                payment["display_name"] = client["display_name"]
+
+            last_payment = fetch_dicts(
+                conn, "SELECT * FROM v_client_payment_last WHERE client_id = ?", [client_id]
+            )
+
+            periods = current_periods()
+            bound, params = through_current_period(periods)
+            missing_periods = fetch_dicts(
+                conn,
+                f"{MISSING_PERIODS_QUERY} WHERE {bound} AND client_id = ? ORDER BY period_key DESC",
+                params + [client_id],
+            )
+
+            payment_status = _payment_status(conn, client_id, active_contracts, periods)
+        finally:
+            conn.rollback()
+
+    return FastJSONResponse({
+        "client": trusted_rows(ClientModel, [client])[0],
+        "contracts": trusted_rows(ContractModel, contracts),
+        "contacts": trusted_rows(ContactModel, contacts),
+        "payments": {
+            "items": trusted_rows(PaymentViewModel, payments),
+            "total": total,
+            "next_cursor": next_cursor,
+        },
+        "last_payment": trusted_rows(ClientLastPaymentViewModel, last_payment)[0] if last_payment else None,
+        "payment_status": trusted_rows(PaymentStatusViewModel, payment_status),
+        "missing_periods": trusted_rows(MissingPaymentPeriodViewModel, missing_periods),
+    })
@@ -2,26 +2,81 @@
 from fastapi import APIRouter, Query, HTTPException
 from typing import Optional
 
-from ..db import get_connection
+from ..db import get_read_connection
+from ..db_executor import db_thread
+from ..http_cache import versioned_by
+from ..date_utils import current_periods, quarter_first_month
+from ..pagination import fetch_page
+from ..reference_cache import DATE_DIMENSIONS_CACHE, cached_response
+from ..serialization import list_response
 from ..models.dates import DateDimensionModel, DateDimensionResponse
 
 router = APIRouter(prefix="/api")
 
+# date_dimension with the current/previous flags computed from the in-memory
+# calendar; quarterly flags mark only the first month of the quarter
+DATE_DIMENSION_QUERY = """
+    SELECT * FROM (
+        SELECT
+            d.*,
+            (period_key_monthly = ?) AS is_current_monthly,
+            (period_key_quarterly = ? AND month = ?) AS is_current_quarterly,
+            (period_key_monthly = ?) AS is_previous_month,
+            (period_key_quarterly = ? AND month = ?) AS is_previous_quarter
+        FROM date_dimension d
+    )
+"""
+
+
+def _flag_params():
+    periods = current_periods()
+    return [
+        periods.current_monthly_key,
+        periods.current_quarterly_key, quarter_first_month(periods.current_quarter),
+        periods.previous_monthly_key,
+        periods.previous_quarterly_key, quarter_first_month(periods.previous_quarter),
+    ]
+
+
+def _get_flagged_period(conn, flag):
+    cursor = conn.execute(
+        f"{DATE_DIMENSION_QUERY} WHERE {flag} = 1 LIMIT 1", _flag_params()
+    )
+    return cursor.fetchone()
+
+
 @router.get("/date-dimensions", response_model=DateDimensionResponse)
-async def get_date_dimensions(
+@versioned_by("date_dimension")
+@db_thread
+def get_date_dimensions(
     year: Optional[int] = Query(None, description="Filter by year"),
     month: Optional[int] = Query(None, description="Filter by month (1-12)"),
     quarter: Optional[int] = Query(None, description="Filter by quarter (1-4)"),
     is_current_monthly: Optional[int] = Query(None, description="Filter current monthly periods"),
     is_current_quarterly: Optional[int] = Query(None, description="Filter current quarterly periods"),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get date dimension records with filtering options"""
-    with get_connection() as conn:
-        query = "SELECT * FROM date_dimension"
+    # The current/previous flags are part of the key, so a new billing period
+    # does not serve rows flagged for the old one
+    flag_params = _flag_params()
+    filters = (year, month, quarter, is_current_monthly, is_current_quarterly)
+    return cached_response(
+        DATE_DIMENSIONS_CACHE,
+        (*flag_params, *filters, limit, offset, include_total),
+        lambda: _date_dimensions_page(flag_params, *filters, limit, offset, include_total),
+    )
+
+def _date_dimensions_page(
+    flag_params, year, month, quarter, is_current_monthly, is_current_quarterly,
+    limit, offset, include_total
+):
+    with get_read_connection() as conn:
+        query = DATE_DIMENSION_QUERY
         conditions = []
-        params = []
+        params = list(flag_params)
         
         if year is not None:
             conditions.append("year = ?")
@@ -46,30 +101,18 @@ async def get_date_dimensions(
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
             
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination
-        query += " ORDER BY period_date LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        dates = [DateDimensionModel.model_validate(dict(row)) for row in rows]
-        
-        return DateDimensionResponse(items=dates, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "period_date", limit, offset, include_total
+        )
+        return list_response(DateDimensionModel, rows, total=total)
 
 @router.get("/date-dimensions/current-month", response_model=DateDimensionModel)
-async def get_current_month():
+@versioned_by("date_dimension")
+@db_thread
+def get_current_month():
     """Get the current month period from date dimension"""
-    with get_connection() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM date_dimension WHERE is_current_monthly = 1 LIMIT 1"
-        )
-        row = cursor.fetchone()
+    with get_read_connection() as conn:
+        row = _get_flagged_period(conn, "is_current_monthly")
         
         if not row:
             raise HTTPException(status_code=404, detail="Current month period not found")
@@ -77,13 +120,12 @@ async def get_current_month():
         return DateDimensionModel.model_validate(dict(row))
 
 @router.get("/date-dimensions/current-quarter", response_model=DateDimensionModel)
-async def get_current_quarter():
+@versioned_by("date_dimension")
+@db_thread
+def get_current_quarter():
     """Get the current quarter period from date dimension"""
-    with get_connection() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM date_dimension WHERE is_current_quarterly = 1 LIMIT 1"
-        )
-        row = cursor.fetchone()
+    with get_read_connection() as conn:
+        row = _get_flagged_period(conn, "is_current_quarterly")
         
         if not row:
             raise HTTPException(status_code=404, detail="Current quarter period not found")
@@ -91,13 +133,12 @@ async def get_current_quarter():
         return DateDimensionModel.model_validate(dict(row))
 
 @router.get("/date-dimensions/previous-month", response_model=DateDimensionModel)
-async def get_previous_month():
+@versioned_by("date_dimension")
+@db_thread
+def get_previous_month():
     """Get the previous month period from date dimension"""
-    with get_connection() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM date_dimension WHERE is_previous_month = 1 LIMIT 1"
-        )
-        row = cursor.fetchone()
+    with get_read_connection() as conn:
+        row = _get_flagged_period(conn, "is_previous_month")
         
         if not row:
             raise HTTPException(status_code=404, detail="Previous month period not found")
@@ -105,13 +146,12 @@ async def get_previous_month():
         return DateDimensionModel.model_validate(dict(row))
 
 @router.get("/date-dimensions/previous-quarter", response_model=DateDimensionModel)
-async def get_previous_quarter():
+@versioned_by("date_dimension")
+@db_thread
+def get_previous_quarter():
     """Get the previous quarter period from date dimension"""
-    with get_connection() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM date_dimension WHERE is_previous_quarter = 1 LIMIT 1"
-        )
-        row = cursor.fetchone()
+    with get_read_connection() as conn:
+        row = _get_flagged_period(conn, "is_previous_quarter")
         
         if not row:
             raise HTTPException(status_code=404, detail="Previous quarter period not found")
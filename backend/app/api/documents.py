@@ -2,7 +2,11 @@
 from fastapi import APIRouter, Query, HTTPException, Body, Path
 from typing import Optional
 
-from ..db import get_connection
+from ..db import get_connection, get_read_connection
+from ..db_executor import db_thread
+from ..http_cache import versioned_by
+from ..pagination import fetch_page
+from ..serialization import list_response
 from ..models.documents import (
     DocumentModel, DocumentCreate, DocumentUpdate, DocumentResponse,
     DocumentClientModel, DocumentClientCreate, DocumentClientResponse,
@@ -13,20 +17,23 @@ router = APIRouter(prefix="/api")
 
 # ----- DOCUMENTS -----
 @router.get("/documents", response_model=DocumentResponse)
-async def get_documents(
+@versioned_by("documents", "document_clients", "document_payments")
+@db_thread
+def get_documents(
     document_id: Optional[int] = Query(None),
     provider_id: Optional[int] = Query(None),
     document_type: Optional[str] = Query(None),
     client_id: Optional[int] = Query(None),  # For filtering by linked client
     payment_id: Optional[int] = Query(None),  # For filtering by linked payment
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """
     Get documents with filtering options
     Can filter by linked client or payment
     """
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         params = []
         
         # Base query
@@ -66,24 +73,14 @@ async def get_documents(
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
             
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination and ordering
-        query += " ORDER BY d.uploaded_at DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        documents = [DocumentModel.model_validate(dict(row)) for row in rows]
-        
-        return DocumentResponse(items=documents, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "uploaded_at DESC", limit, offset, include_total
+        )
+        return list_response(DocumentModel, rows, total=total)
 
 @router.post("/documents", response_model=DocumentModel)
-async def create_document(document: DocumentCreate):
+@db_thread
+def create_document(document: DocumentCreate):
     """Create a new document"""
     with get_connection() as conn:
         try:
@@ -114,7 +111,8 @@ async def create_document(document: DocumentCreate):
             raise
 
 @router.put("/documents/{document_id}", response_model=DocumentModel)
-async def update_document(
+@db_thread
+def update_document(
     document_id: int = Path(...),
     document: DocumentUpdate = Body(...)
 ):
@@ -178,7 +176,8 @@ async def update_document(
         return DocumentModel.model_validate(dict(row))
 
 @router.delete("/documents/{document_id}")
-async def delete_document(document_id: int = Path(...)):
+@db_thread
+def delete_document(document_id: int = Path(...)):
     """Delete a document (hard delete)"""
     with get_connection() as conn:
         # Check if document exists
@@ -201,14 +200,17 @@ async def delete_document(document_id: int = Path(...)):
 
 # ----- DOCUMENT_CLIENTS (Junction table) -----
 @router.get("/document-clients", response_model=DocumentClientResponse)
-async def get_document_clients(
+@versioned_by("document_clients")
+@db_thread
+def get_document_clients(
     document_id: Optional[int] = Query(None),
     client_id: Optional[int] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get document-client associations"""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         query = "SELECT * FROM document_clients"
         conditions = []
         params = []
@@ -224,24 +226,14 @@ async def get_document_clients(
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
             
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination
-        query += " ORDER BY id LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        links = [DocumentClientModel.model_validate(dict(row)) for row in rows]
-        
-        return DocumentClientResponse(items=links, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "id", limit, offset, include_total
+        )
+        return list_response(DocumentClientModel, rows, total=total)
 
 @router.post("/document-clients", response_model=DocumentClientModel)
-async def create_document_client(link: DocumentClientCreate):
+@db_thread
+def create_document_client(link: DocumentClientCreate):
     """Link a document to a client"""
     with get_connection() as conn:
         try:
@@ -266,7 +258,8 @@ async def create_document_client(link: DocumentClientCreate):
             raise
 
 @router.delete("/document-clients/{id}")
-async def delete_document_client(id: int = Path(...)):
+@db_thread
+def delete_document_client(id: int = Path(...)):
     """Remove a document-client link"""
     with get_connection() as conn:
         # Check if link exists
@@ -289,14 +282,17 @@ async def delete_document_client(id: int = Path(...)):
 
 # ----- DOCUMENT_PAYMENTS (Junction table) -----
 @router.get("/document-payments", response_model=DocumentPaymentResponse)
-async def get_document_payments(
+@versioned_by("document_payments")
+@db_thread
+def get_document_payments(
     document_id: Optional[int] = Query(None),
     payment_id: Optional[int] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get document-payment associations"""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         query = "SELECT * FROM document_payments"
         conditions = []
         params = []
@@ -312,24 +308,14 @@ async def get_document_payments(
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
             
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination
-        query += " ORDER BY id LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        links = [DocumentPaymentModel.model_validate(dict(row)) for row in rows]
-        
-        return DocumentPaymentResponse(items=links, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "id", limit, offset, include_total
+        )
+        return list_response(DocumentPaymentModel, rows, total=total)
 
 @router.post("/document-payments", response_model=DocumentPaymentModel)
-async def create_document_payment(link: DocumentPaymentCreate):
+@db_thread
+def create_document_payment(link: DocumentPaymentCreate):
     """Link a document to a payment"""
     with get_connection() as conn:
         try:
@@ -354,7 +340,8 @@ async def create_document_payment(link: DocumentPaymentCreate):
             raise
 
 @router.delete("/document-payments/{id}")
-async def delete_document_payment(id: int = Path(...)):
+@db_thread
+def delete_document_payment(id: int = Path(...)):
     """Remove a document-payment link"""
     with get_connection() as conn:
         # Check if link exists
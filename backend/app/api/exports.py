@@ -0,0 +1,138 @@
+# app/api/exports.py
+from fastapi import APIRouter, Query
+from typing import Literal, Optional
+
+from ..date_utils import through_current_period
+from ..db_executor import get_executor
+from ..http_cache import versioned_by
+from ..export import export_response
+from ..maintenance import sync_period_ledger
+from ..pagination import order_by_clause
+from .contracts import MISSING_PERIODS_QUERY
+from .payments import PAYMENT_KEYSET, SPLIT_PAYMENT_KEYSET
+
+router = APIRouter(prefix="/api/export")
+
+ExportFormat = Literal["ndjson", "csv"]
+
+# Export handlers only build the query; the rows are read while streaming,
+# batch by batch, on the analytics executor lane (see app/export.py)
+
+@router.get("/payments")
+@versioned_by("v_payments", "clients")
+async def export_payments(
+    client_id: Optional[int] = Query(None),
+    is_split: Optional[bool] = Query(None, description="Filter for split payments only"),
+    format: ExportFormat = Query("ndjson", description="ndjson or csv")
+):
+    """
+    Stream all payments from the v_payments view.
+    Same rows and order as /api/payments, without paging.
+    """
+    query = """
+    SELECT p.*, c.display_name
+    FROM v_payments p
+    LEFT JOIN clients c ON p.client_id = c.client_id
+    WHERE p.valid_to IS NULL
+    """
+    params = []
+
+    if client_id is not None:
+        query += " AND p.client_id = ?"
+        params.append(client_id)
+
+    if is_split is not None:
+        query += " AND p.is_split_payment = ?"
+        params.append(1 if is_split else 0)
+
+    query += f" ORDER BY {order_by_clause(PAYMENT_KEYSET)}"
+    return export_response(query, params, format, "payments")
+
+@router.get("/split-payments")
+@versioned_by("v_split_payment_distribution")
+async def export_split_payment_distributions(
+    payment_id: Optional[int] = Query(None),
+    client_id: Optional[int] = Query(None),
+    format: ExportFormat = Query("ndjson", description="ndjson or csv")
+):
+    """
+    Stream split payment distributions from the v_split_payment_distribution view.
+    """
+    query = "SELECT * FROM v_split_payment_distribution"
+    params = []
+    conditions = []
+
+    if payment_id is not None:
+        conditions.append("payment_id = ?")
+        params.append(payment_id)
+
+    if client_id is not None:
+        conditions.append("client_id = ?")
+        params.append(client_id)
+
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    query += f" ORDER BY {order_by_clause(SPLIT_PAYMENT_KEYSET)}"
+    return export_response(query, params, format, "split-payments")
+
+@router.get("/expanded-payment-periods")
+@versioned_by("payment_periods")
+async def export_expanded_payment_periods(
+    payment_id: Optional[int] = Query(None),
+    client_id: Optional[int] = Query(None),
+    payment_schedule: Optional[str] = Query(None),
+    format: ExportFormat = Query("ndjson", description="ndjson or csv")
+):
+    """
+    Stream expanded payment periods (one row per payment per covered period).
+    """
+    query = "SELECT payment_id, client_id, period_key, payment_schedule, period_label FROM payment_periods"
+    params = []
+    conditions = []
+
+    if payment_id is not None:
+        conditions.append("payment_id = ?")
+        params.append(payment_id)
+
+    if client_id is not None:
+        conditions.append("client_id = ?")
+        params.append(client_id)
+
+    if payment_schedule is not None:
+        conditions.append("payment_schedule = ?")
+        params.append(payment_schedule)
+
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    # Primary key order of payment_periods, so no sort is needed
+    query += " ORDER BY client_id, payment_schedule, period_key, payment_id"
+    return export_response(query, params, format, "expanded-payment-periods")
+
+@router.get("/missing-periods")
+@versioned_by("missing_periods")
+async def export_missing_periods(
+    client_id: Optional[int] = Query(None),
+    payment_schedule: Optional[str] = Query(None),
+    format: ExportFormat = Query("ndjson", description="ndjson or csv")
+):
+    """
+    Stream all periods that should have been paid but weren't.
+    """
+    await get_executor().run(sync_period_ledger)
+    query = MISSING_PERIODS_QUERY
+    bound, params = through_current_period()
+    conditions = [bound]
+
+    if client_id is not None:
+        conditions.append("client_id = ?")
+        params.append(client_id)
+
+    if payment_schedule is not None:
+        conditions.append("payment_schedule = ?")
+        params.append(payment_schedule)
+
+    query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY client_id, period_key DESC"
+    return export_response(query, params, format, "missing-periods")
@@ -3,7 +3,13 @@ from fastapi import APIRouter, Query, HTTPException, Body, Path
 from typing import Optional
 from datetime import datetime
 
-from ..db import get_connection
+from ..db import get_connection, get_read_connection
+from ..db_executor import db_thread, ANALYTICS_LANE
+from ..http_cache import versioned_by
+from ..date_utils import current_periods
+from ..period_index import period_index
+from ..pagination import fetch_dicts, fetch_page, fetch_keyed_page
+from ..serialization import list_response
 from ..models.payments import (
     PaymentModel, PaymentCreate, PaymentUpdate, PaymentResponse,
     PaymentViewModel, PaymentViewResponse,
@@ -15,9 +21,15 @@ from ..models.payments import (
 
 router = APIRouter(prefix="/api")
 
+# Unique sort keys for cursor pagination (column, direction)
+PAYMENT_KEYSET = (("received_date", "DESC"), ("payment_id", "DESC"))
+SPLIT_PAYMENT_KEYSET = (("received_date", "DESC"), ("payment_id", "DESC"), ("period_key", "ASC"))
+
 # ----- PAYMENT BASE TABLE -----
 @router.get("/payments-table", response_model=PaymentResponse)
-async def get_payments_table(
+@versioned_by("payments")
+@db_thread
+def get_payments_table(
     payment_id: Optional[int] = Query(None),
     contract_id: Optional[int] = Query(None),
     client_id: Optional[int] = Query(None),
@@ -25,12 +37,13 @@ async def get_payments_table(
     min_date: Optional[str] = Query(None, description="Minimum received date (YYYY-MM-DD)"),
     max_date: Optional[str] = Query(None, description="Maximum received date (YYYY-MM-DD)"),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """
     Get raw payments data from the payments table
     """
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         query = "SELECT * FROM payments WHERE valid_to IS NULL"
         params = []
         
@@ -58,24 +71,14 @@ async def get_payments_table(
             query += " AND received_date <= ?"
             params.append(max_date)
             
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination and sorting
-        query += " ORDER BY received_date DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        payments = [PaymentModel.model_validate(dict(row)) for row in rows]
-        
-        return PaymentResponse(items=payments, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "received_date DESC", limit, offset, include_total
+        )
+        return list_response(PaymentModel, rows, total=total)
 
 @router.post("/payments", response_model=PaymentModel)
-async def create_payment(payment: PaymentCreate):
+@db_thread
+def create_payment(payment: PaymentCreate):
     """Create a new payment"""
     with get_connection() as conn:
         try:
@@ -112,7 +115,8 @@ async def create_payment(payment: PaymentCreate):
             raise
 
 @router.put("/payments/{payment_id}", response_model=PaymentModel)
-async def update_payment(
+@db_thread
+def update_payment(
     payment_id: int = Path(...),
     payment: PaymentUpdate = Body(...)
 ):
@@ -208,7 +212,8 @@ async def update_payment(
         return PaymentModel.model_validate(dict(row))
 
 @router.delete("/payments/{payment_id}", response_model=PaymentModel)
-async def delete_payment(payment_id: int = Path(...)):
+@db_thread
+def delete_payment(payment_id: int = Path(...)):
     """Soft delete a payment by setting valid_to"""
     with get_connection() as conn:
         # Check if payment exists
@@ -236,17 +241,21 @@ async def delete_payment(payment_id: int = Path(...)):
 
 # ----- PAYMENT VIEWS -----
 @router.get("/payments", response_model=PaymentViewResponse)
-async def get_payments(
+@versioned_by("v_payments", "clients")
+@db_thread
+def get_payments(
     client_id: Optional[int] = Query(None),
     is_split: Optional[bool] = Query(None, description="Filter for split payments only"),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces offset")
 ):
     """
     Get payments with optional client filter.
     Uses the v_payments view.
     """
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         # Base query
         query = """
         SELECT p.*, c.display_name
@@ -267,34 +276,27 @@ async def get_payments(
             query += " AND p.is_split_payment = ?"
             params.append(1 if is_split else 0)
         
-        # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination and sort
-        query += " ORDER BY p.received_date DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute and convert to models
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        payments = [PaymentViewModel.model_validate(dict(row)) for row in rows]
-        
-        return PaymentViewResponse(items=payments, total=total)
+        rows, total, next_cursor = fetch_keyed_page(
+            conn, query, params, PAYMENT_KEYSET, limit, offset, include_total, cursor
+        )
+        return list_response(PaymentViewModel, rows, total=total, next_cursor=next_cursor)
 
 @router.get("/split-payments", response_model=SplitPaymentDistributionResponse)
-async def get_split_payment_distributions(
+@versioned_by("v_split_payment_distribution")
+@db_thread(lane=ANALYTICS_LANE)
+def get_split_payment_distributions(
     payment_id: Optional[int] = Query(None),
     client_id: Optional[int] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces offset")
 ):
     """
     Get split payment distributions with optional filtering.
     Uses the v_split_payment_distribution view.
     """
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         # Start with base query
         query = "SELECT * FROM v_split_payment_distribution"
         params = []
@@ -313,38 +315,26 @@ async def get_split_payment_distributions(
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
         
-        # Count total for pagination
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination
-        query += " ORDER BY received_date DESC, period_key ASC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute query
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        
-        # Convert rows to Pydantic models
-        distributions = [SplitPaymentDistributionViewModel.model_validate(dict(row)) for row in rows]
-        
-        return SplitPaymentDistributionResponse(items=distributions, total=total)
+        rows, total, next_cursor = fetch_keyed_page(
+            conn, query, params, SPLIT_PAYMENT_KEYSET, limit, offset, include_total, cursor
+        )
+        return list_response(SplitPaymentDistributionViewModel, rows, total=total, next_cursor=next_cursor)
 
 @router.get("/payments/{payment_id}/distributions", response_model=SplitPaymentDistributionResponse)
-async def get_payment_distributions(payment_id: int):
+@versioned_by("v_split_payment_distribution")
+@db_thread(lane=ANALYTICS_LANE)
+def get_payment_distributions(payment_id: int):
     """
     Retrieve all distribution details for a specific split payment.
     """
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         query = """
         SELECT * FROM v_split_payment_distribution
         WHERE payment_id = ?
         ORDER BY period_key ASC
         """
         
-        cursor = conn.execute(query, (payment_id,))
-        rows = cursor.fetchall()
+        rows = fetch_dicts(conn, query, [payment_id])
         
         if not rows:
             raise HTTPException(
@@ -352,24 +342,26 @@ async def get_payment_distributions(payment_id: int):
                 detail=f"Payment with ID {payment_id} not found or is not a split payment"
             )
         
-        distributions = [SplitPaymentDistributionViewModel.model_validate(dict(row)) for row in rows]
-        
-        return SplitPaymentDistributionResponse(items=distributions, total=len(distributions))
+        return list_response(SplitPaymentDistributionViewModel, rows, total=len(rows))
 
 @router.get("/expanded-payment-periods", response_model=ExpandedPaymentPeriodResponse)
-async def get_expanded_payment_periods(
+@versioned_by("payment_periods")
+@db_thread(lane=ANALYTICS_LANE)
+def get_expanded_payment_periods(
     payment_id: Optional[int] = Query(None),
     client_id: Optional[int] = Query(None),
     period_key: Optional[int] = Query(None),
     payment_schedule: Optional[str] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """
-    Get expanded payment periods (one row per payment per covered period)
+    Get expanded payment periods (one row per payment per covered period).
+    Reads the trigger-maintained payment_periods table.
     """
-    with get_connection() as conn:
-        query = "SELECT * FROM v_expanded_payment_periods"
+    with get_read_connection() as conn:
+        query = "SELECT payment_id, client_id, period_key, payment_schedule, period_label FROM payment_periods"
         conditions = []
         params = []
         
@@ -394,34 +386,26 @@ async def get_expanded_payment_periods(
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
         
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination
-        query += " ORDER BY payment_id, period_key LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute query
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        periods = [ExpandedPaymentPeriodViewModel.model_validate(dict(row)) for row in rows]
-        
-        return ExpandedPaymentPeriodResponse(items=periods, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "payment_id, period_key", limit, offset, include_total
+        )
+        return list_response(ExpandedPaymentPeriodViewModel, rows, total=total)
 
 @router.get("/payment-coverage", response_model=PaymentPeriodCoverageResponse)
-async def get_payment_coverage(
+@versioned_by("v_payment_period_coverage")
+@db_thread(lane=ANALYTICS_LANE)
+def get_payment_coverage(
     payment_id: Optional[int] = Query(None),
     client_id: Optional[int] = Query(None),
     is_split: Optional[bool] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """
     Get detailed period coverage information for payments
     """
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         query = "SELECT * FROM v_payment_period_coverage"
         conditions = []
         params = []
@@ -443,50 +427,78 @@ async def get_payment_coverage(
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
         
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination
-        query += " ORDER BY received_date DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute query
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        coverage = [PaymentPeriodCoverageViewModel.model_validate(dict(row)) for row in rows]
-        
-        return PaymentPeriodCoverageResponse(items=coverage, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "received_date DESC", limit, offset, include_total
+        )
+        return list_response(PaymentPeriodCoverageViewModel, rows, total=total)
 
 @router.get("/current-period", response_model=CurrentPeriodViewModel)
+@versioned_by()
 async def get_current_period():
     """
     Get the current billing periods (monthly and quarterly)
     """
-    with get_connection() as conn:
-        cursor = conn.execute("SELECT * FROM v_current_period")
-        row = cursor.fetchone()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail="Current period information not found")
-        
-        return CurrentPeriodViewModel.model_validate(dict(row))
+    periods = current_periods()
+    return CurrentPeriodViewModel(
+        today=periods.today,
+        current_year=periods.today.year,
+        current_month=periods.today.month,
+        current_month_for_billing=periods.current_month,
+        current_month_year_for_billing=periods.current_month_year,
+        current_quarter_for_billing=periods.current_quarter,
+        current_quarter_year_for_billing=periods.current_quarter_year,
+        current_monthly_key=periods.current_monthly_key,
+        current_quarterly_key=periods.current_quarterly_key,
+    )
+
+# Paid/Unpaid status of every active contract for the current billing period;
+# the period keys and labels are bound from the in-memory calendar and
+# period index, so date_dimension is not read
+CURRENT_PERIOD_STATUS_QUERY = """
+    SELECT * FROM (
+        SELECT
+            c.client_id,
+            c.payment_schedule,
+            d.period_key,
+            d.period_label,
+            CASE WHEN EXISTS (
+                SELECT 1 FROM payment_periods pp
+                WHERE pp.client_id = c.client_id
+                  AND pp.payment_schedule = c.payment_schedule
+                  AND pp.period_key = d.period_key
+            ) THEN 'Paid' ELSE 'Unpaid' END AS status
+        FROM v_active_contracts c
+        JOIN (
+            SELECT 'monthly' AS payment_schedule, ? AS period_key, ? AS period_label
+            UNION ALL
+            SELECT 'quarterly', ?, ?
+        ) d ON d.payment_schedule = c.payment_schedule
+    )
+"""
 
 @router.get("/payment-status", response_model=PaymentStatusResponse)
-async def get_payment_status(
+@versioned_by("v_active_contracts", "payment_periods")
+@db_thread(lane=ANALYTICS_LANE)
+def get_payment_status(
     client_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None, description="Filter by status (Paid/Unpaid)"),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """
     Get the payment status (Paid/Unpaid) for clients in the current period
     """
-    with get_connection() as conn:
-        query = "SELECT * FROM v_current_period_payment_status"
+    with get_read_connection() as conn:
+        periods = current_periods()
+        query = CURRENT_PERIOD_STATUS_QUERY
         conditions = []
-        params = []
+        params = [
+            periods.current_monthly_key,
+            period_index("monthly", conn).label(periods.current_monthly_key),
+            periods.current_quarterly_key,
+            period_index("quarterly", conn).label(periods.current_quarterly_key),
+        ]
         
         # Add filters
         if client_id is not None:
@@ -501,18 +513,7 @@ async def get_payment_status(
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
             
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination
-        query += " ORDER BY client_id LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute query
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        statuses = [PaymentStatusViewModel.model_validate(dict(row)) for row in rows]
-        
-        return PaymentStatusResponse(items=statuses, total=total)
\ No newline at end of file
+        rows, total = fetch_page(
+            conn, query, params, "client_id", limit, offset, include_total
+        )
+        return list_response(PaymentStatusViewModel, rows, total=total)
\ No newline at end of file
@@ -3,19 +3,34 @@ from fastapi import APIRouter, Query, HTTPException, Body, Path
 from typing import Optional
 from datetime import datetime
 
-from ..db import get_connection
+from ..db import get_connection, get_read_connection
+from ..db_executor import db_thread
+from ..http_cache import versioned_by
+from ..pagination import fetch_page
+from ..reference_cache import PROVIDERS_CACHE, cached_response, invalidate
+from ..serialization import list_response
 from ..models.providers import ProviderModel, ProviderCreate, ProviderUpdate, ProviderResponse
 
 router = APIRouter(prefix="/api")
 
 @router.get("/providers", response_model=ProviderResponse)
-async def get_providers(
+@versioned_by("providers")
+@db_thread
+def get_providers(
     provider_id: Optional[int] = Query(None),
     limit: int = Query(100),
-    offset: int = Query(0)
+    offset: int = Query(0),
+    include_total: bool = Query(True, description="Set false to skip counting the total")
 ):
     """Get all active providers"""
-    with get_connection() as conn:
+    return cached_response(
+        PROVIDERS_CACHE,
+        (provider_id, limit, offset, include_total),
+        lambda: _providers_page(provider_id, limit, offset, include_total),
+    )
+
+def _providers_page(provider_id, limit, offset, include_total):
+    with get_read_connection() as conn:
         # If querying by ID, show even soft-deleted providers
         if provider_id is not None:
             query = "SELECT * FROM providers WHERE provider_id = ?"
@@ -25,24 +40,14 @@ async def get_providers(
             query = "SELECT * FROM providers WHERE valid_to IS NULL"
             params = []
             
-        # Count total
-        count_query = f"SELECT COUNT(*) as total FROM ({query})"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()["total"]
-        
-        # Add pagination and sorting
-        query += " ORDER BY provider_name LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        # Execute
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        providers = [ProviderModel.model_validate(dict(row)) for row in rows]
-        
-        return ProviderResponse(items=providers, total=total)
+        rows, total = fetch_page(
+            conn, query, params, "provider_name", limit, offset, include_total
+        )
+        return list_response(ProviderModel, rows, total=total)
 
 @router.post("/providers", response_model=ProviderModel)
-async def create_provider(provider: ProviderCreate):
+@db_thread
+def create_provider(provider: ProviderCreate):
     """Create a new provider"""
     with get_connection() as conn:
         cursor = conn.execute(
@@ -50,6 +55,7 @@ async def create_provider(provider: ProviderCreate):
             (provider.provider_name,)
         )
         conn.commit()
+        invalidate(PROVIDERS_CACHE)
         
         # Get the created provider
         provider_id = cursor.lastrowid
@@ -59,7 +65,8 @@ async def create_provider(provider: ProviderCreate):
         return ProviderModel.model_validate(dict(row))
 
 @router.put("/providers/{provider_id}", response_model=ProviderModel)
-async def update_provider(
+@db_thread
+def update_provider(
     provider_id: int = Path(...),
     provider: ProviderUpdate = Body(...)
 ):
@@ -81,6 +88,7 @@ async def update_provider(
                 (provider.provider_name, provider_id)
             )
             conn.commit()
+            invalidate(PROVIDERS_CACHE)
         
         # Get updated provider
         cursor = conn.execute("SELECT * FROM providers WHERE provider_id = ?", (provider_id,))
@@ -89,7 +97,8 @@ async def update_provider(
         return ProviderModel.model_validate(dict(row))
 
 @router.delete("/providers/{provider_id}", response_model=ProviderModel)
-async def delete_provider(provider_id: int = Path(...)):
+@db_thread
+def delete_provider(provider_id: int = Path(...)):
     """Soft delete a provider by setting valid_to"""
     with get_connection() as conn:
         # Check if provider exists
@@ -108,6 +117,7 @@ async def delete_provider(provider_id: int = Path(...)):
             (now, provider_id)
         )
         conn.commit()
+        invalidate(PROVIDERS_CACHE)
         
         # Get updated provider
         cursor = conn.execute("SELECT * FROM providers WHERE provider_id = ?", (provider_id,))
@@ -0,0 +1,252 @@
+# app/compression.py
+"""
+Response compression negotiated from Accept-Encoding.
+
+List pages and exports repeat the same strings (client names, period labels,
+schedules) on every row, so JSON, NDJSON and CSV bodies shrink several times
+over. gzip is always available. Brotli and zstd are used when the brotli or
+zstandard package is installed, and they are preferred over gzip when the
+client accepts them with the same q-value.
+
+Bodies sent in one message (the list routes) are compressed in one go
+when they reach PAYMENTS_COMPRESSION_MIN_SIZE. Streamed responses (the
+exports) go through an incremental compressor that is synced after every
+chunk, so each chunk reaches the client decodable without buffering the
+whole body. Compressed responses drop Content-Length when
+streamed, carry Vary: Accept-Encoding, and have any strong ETag turned
+weak, since the bytes now depend on the encoding.
+"""
+
+import os
+import zlib
+
+from starlette.datastructures import MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional
+    zstandard = None
+
+# Settings (environment variables)
+COMPRESSION = os.environ.get("PAYMENTS_COMPRESSION", "1") != "0"
+COMPRESSION_MIN_SIZE = int(os.environ.get("PAYMENTS_COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.environ.get("PAYMENTS_GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.environ.get("PAYMENTS_BROTLI_QUALITY", "4"))
+ZSTD_LEVEL = int(os.environ.get("PAYMENTS_ZSTD_LEVEL", "3"))
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/",
+)
+
+
+# Incremental compressors: compress() buffers input, sync() emits everything
+# compressed so far as a decodable block, flush() ends the stream
+class _GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def sync(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level=None):
+        self.level = GZIP_LEVEL if level is None else level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level, wbits=31)
+
+    def compressor(self):
+        return _GzipCompressor(self.level)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def sync(self):
+        return self._compressor.flush()
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self, level=None):
+        self.level = BROTLI_QUALITY if level is None else level
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+    def compressor(self):
+        return _BrotliCompressor(self.level)
+
+
+class _ZstdCompressor:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def sync(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+class ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self, level=None):
+        self.level = ZSTD_LEVEL if level is None else level
+        self._context = zstandard.ZstdCompressor(level=self.level)
+
+    def compress(self, data):
+        return self._context.compress(data)
+
+    def compressor(self):
+        return _ZstdCompressor(self.level)
+
+
+def available_encoders(levels=None):
+    """Encoders usable in this environment, in server preference order"""
+    levels = levels or {}
+    encoders = []
+    if zstandard is not None:
+        encoders.append(ZstdEncoder(levels.get("zstd")))
+    if brotli is not None:
+        encoders.append(BrotliEncoder(levels.get("br")))
+    encoders.append(GzipEncoder(levels.get("gzip")))
+    return encoders
+
+
+def choose_encoder(accept_encoding, encoders):
+    """Encoder for an Accept-Encoding header (highest q-value, then server preference)"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoder in encoders:
+        q = accepted.get(encoder.name, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoder, q
+    return best
+
+
+def _compressible(message, headers):
+    if message["status"] in (204, 304) or "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses JSON, NDJSON and text responses with the
+    best encoding the client accepts
+    """
+
+    def __init__(self, app, minimum_size=None, levels=None):
+        self.app = app
+        self.minimum_size = COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.encoders = available_encoders(levels)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoder = choose_encoder(accept_encoding, self.encoders)
+        if encoder is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Held back until the first body message shows whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(scope=start)
+                if not _compressible(start, headers):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                headers["Content-Encoding"] = encoder.name
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                if not more_body:
+                    body = encoder.compress(body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                del headers["Content-Length"]
+                compressor = encoder.compressor()
+                await send(start)
+
+            # Sync after every chunk so the client can decode each one as it
+            # arrives instead of waiting for the compressor's buffer to fill
+            data = compressor.compress(body)
+            data += compressor.sync() if more_body else compressor.flush()
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,124 +1,121 @@
 # app/date_utils.py
 """
-Date utilities for maintaining period flags in the date_dimension table
+Billing period calendar.
+
+The current billing period is the month and the quarter before today; the
+previous period is the one before that (on March 25, 2025 the current
+periods are Feb 2025 and Q4 2024, the previous ones Jan 2025 and Q3 2024).
+
+Periods are computed in memory and cached for the day, so they roll over on
+the first request after a month or quarter boundary. Queries that depend on
+the current period take the keys as bound parameters; nothing is stored in
+date_dimension, and starting the application does not write to the database.
 """
 
-from datetime import datetime
-import logging
-from .db import get_connection
+import threading
+from dataclasses import dataclass
+from datetime import date
+
+
+def month_before(year, month):
+    """(year, month) of the month before the given one"""
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def quarter_before(year, quarter):
+    """(year, quarter) of the quarter before the given one"""
+    return (year - 1, 4) if quarter == 1 else (year, quarter - 1)
+
+
+def quarter_first_month(quarter):
+    """First month of a quarter (1, 4, 7 or 10)"""
+    return (quarter - 1) * 3 + 1
+
+
+@dataclass(frozen=True)
+class BillingPeriods:
+    """Current and previous billing periods for one day"""
+    today: date
+    current_month_year: int
+    current_month: int
+    current_quarter_year: int
+    current_quarter: int
+    previous_month_year: int
+    previous_month: int
+    previous_quarter_year: int
+    previous_quarter: int
+
+    @classmethod
+    def for_date(cls, today):
+        current_month_year, current_month = month_before(today.year, today.month)
+        this_quarter = (today.month - 1) // 3 + 1
+        current_quarter_year, current_quarter = quarter_before(today.year, this_quarter)
+        previous_month_year, previous_month = month_before(current_month_year, current_month)
+        previous_quarter_year, previous_quarter = quarter_before(current_quarter_year, current_quarter)
+        return cls(
+            today,
+            current_month_year, current_month,
+            current_quarter_year, current_quarter,
+            previous_month_year, previous_month,
+            previous_quarter_year, previous_quarter,
+        )
+
+    @property
+    def current_monthly_key(self):
+        return self.current_month_year * 100 + self.current_month
+
+    @property
+    def current_quarterly_key(self):
+        return self.current_quarter_year * 10 + self.current_quarter
+
+    @property
+    def previous_monthly_key(self):
+        return self.previous_month_year * 100 + self.previous_month
+
+    @property
+    def previous_quarterly_key(self):
+        return self.previous_quarter_year * 10 + self.previous_quarter
+
+
+class PeriodCalendar:
+    """
+    Serves BillingPeriods for today, recomputing them when the date changes.
+    clock is injectable so tests can pin the date.
+    """
+
+    def __init__(self, clock=date.today):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._periods = None
+
+    def current(self):
+        today = self._clock()
+        periods = self._periods
+        if periods is None or periods.today != today:
+            with self._lock:
+                periods = self._periods
+                if periods is None or periods.today != today:
+                    periods = BillingPeriods.for_date(today)
+                    self._periods = periods
+        return periods
+
+
+period_calendar = PeriodCalendar()
+
+
+def current_periods():
+    """Billing periods for today from the process-wide calendar"""
+    return period_calendar.current()
 
-logger = logging.getLogger(__name__)
 
-def update_date_flags():
+def through_current_period(periods=None):
     """
-    Update the current and previous period flags in the date_dimension table.
-    Called during application startup to ensure flags are always current.
+    WHERE condition (and params) keeping periods up to the current billing
+    period, for queries with payment_schedule and period_key columns
     """
-    # Get current date
-    today = datetime.now()
-    
-    # Calculate current billing periods (1 month and 1 quarter behind current date)
-    current_month_year = today.year
-    current_month = today.month - 1
-    if current_month == 0:
-        current_month = 12
-        current_month_year -= 1
-        
-    # Calculate quarterly
-    current_quarter_year = today.year
-    current_quarter = (today.month - 1) // 3 + 1
-    if current_quarter == 0:
-        current_quarter = 4
-        current_quarter_year -= 1
-    
-    # Calculate previous periods (one before current)
-    prev_month_year = current_month_year
-    prev_month = current_month - 1
-    if prev_month == 0:
-        prev_month = 12
-        prev_month_year -= 1
-        
-    prev_quarter_year = current_quarter_year
-    prev_quarter = current_quarter - 1
-    if prev_quarter == 0:
-        prev_quarter = 4
-        prev_quarter_year -= 1
-    
-    # Calculate period keys
-    current_monthly_key = current_month_year * 100 + current_month
-    current_quarterly_key = current_quarter_year * 10 + current_quarter
-    
-    prev_monthly_key = prev_month_year * 100 + prev_month
-    prev_quarterly_key = prev_quarter_year * 10 + prev_quarter
-    
-    # Calculate the first month of each quarter for precise selection
-    current_quarter_first_month = ((current_quarter - 1) * 3) + 1
-    prev_quarter_first_month = ((prev_quarter - 1) * 3) + 1
-    
-    logger.info(f"Updating date flags: Current monthly={current_monthly_key}, Current quarterly={current_quarterly_key} (month {current_quarter_first_month})")
-    logger.info(f"Previous monthly={prev_monthly_key}, Previous quarterly={prev_quarterly_key} (month {prev_quarter_first_month})")
-    
-    # Connect to database and update flags
-    with get_connection() as conn:
-        # First, reset all flags
-        conn.execute("""
-            UPDATE date_dimension 
-            SET is_current_monthly = 0, 
-                is_current_quarterly = 0,
-                is_previous_month = 0,
-                is_previous_quarter = 0
-        """)
-        
-        # Set current monthly period
-        conn.execute("""
-            UPDATE date_dimension 
-            SET is_current_monthly = 1
-            WHERE period_key_monthly = ?
-        """, (current_monthly_key,))
-        
-        # Set current quarterly period - only for the first month of the quarter
-        conn.execute("""
-            UPDATE date_dimension 
-            SET is_current_quarterly = 1
-            WHERE period_key_quarterly = ? AND month = ?
-        """, (current_quarterly_key, current_quarter_first_month))
-        
-        # Set previous monthly period
-        conn.execute("""
-            UPDATE date_dimension 
-            SET is_previous_month = 1
-            WHERE period_key_monthly = ?
-        """, (prev_monthly_key,))
-        
-        # Set previous quarterly period - only for the first month of the quarter
-        conn.execute("""
-            UPDATE date_dimension 
-            SET is_previous_quarter = 1
-            WHERE period_key_quarterly = ? AND month = ?
-        """, (prev_quarterly_key, prev_quarter_first_month))
-        
-        conn.commit()
-        
-        # Verify the updates worked
-        cursor = conn.execute("""
-            SELECT 
-                SUM(is_current_monthly) as current_monthly_count,
-                SUM(is_current_quarterly) as current_quarterly_count,
-                SUM(is_previous_month) as prev_monthly_count,
-                SUM(is_previous_quarter) as prev_quarterly_count
-            FROM date_dimension
-        """)
-        counts = cursor.fetchone()
-        
-        if (counts['current_monthly_count'] != 1 or 
-            counts['current_quarterly_count'] != 1 or
-            counts['prev_monthly_count'] != 1 or
-            counts['prev_quarterly_count'] != 1):
-            logger.warning("Flag counts are not as expected:")
-            logger.warning(f"Current monthly: {counts['current_monthly_count']} (expected 1)")
-            logger.warning(f"Current quarterly: {counts['current_quarterly_count']} (expected 1)")
-            logger.warning(f"Previous monthly: {counts['prev_monthly_count']} (expected 1)")
-            logger.warning(f"Previous quarterly: {counts['prev_quarterly_count']} (expected 1)")
-            return False
-            
-        return True
\ No newline at end of file
+    periods = periods or current_periods()
+    condition = (
+        "((payment_schedule = 'monthly' AND period_key <= ?) OR "
+        "(payment_schedule = 'quarterly' AND period_key <= ?))"
+    )
+    return condition, [periods.current_monthly_key, periods.current_quarterly_key]
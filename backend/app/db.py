@@ -1,13 +1,290 @@
 # app/db.py
+import contextvars
+import os
+import queue
 import sqlite3
-from contextlib import contextmanager
+import threading
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from .sql_trace import TracedConnection, untraced
+
+# Database location and pool sizing (overridable through the environment)
+DB_PATH = os.environ.get("PAYMENTS_DB_PATH", "payments.db")
+# Read pool covers both executor lanes in db_executor (8 default + 4 analytics)
+POOL_SIZE = int(os.environ.get("PAYMENTS_DB_POOL_SIZE", "12"))
+WRITER_POOL_SIZE = 1  # SQLite allows a single writer; queue writes in-process
+POOL_TIMEOUT = float(os.environ.get("PAYMENTS_DB_POOL_TIMEOUT", "10"))
+
+# PRAGMAs applied once when a pooled connection is opened
+CONNECTION_PRAGMAS = (
+    ("foreign_keys", "ON"),
+    ("cache_size", "-8000"),      # ~8 MB page cache per connection
+    ("mmap_size", "268435456"),   # 256 MB memory-mapped reads
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", "5000"),
+)
+
+# Extra PRAGMAs for the writer; WAL lets readers proceed while a write commits
+WRITER_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+)
+
+
+# Callables run on every newly opened pooled connection, after the PRAGMAs
+# (e.g. to install a trace callback); add to the list before the pools open
+CONNECTION_HOOKS = []
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of warmed SQLite connections.
+    Connections are opened lazily up to max_size, configured once with
+    CONNECTION_PRAGMAS and validated every time they are checked out.
+    They are TracedConnections, so their statements are recorded on the
+    current request's SQL trace (app/sql_trace.py).
+    Read-only pools open the database with a mode=ro URI so their
+    connections can never take the write lock.
+    """
+
+    def __init__(self, database=None, max_size=None, timeout=None, read_only=False):
+        self.database = database or DB_PATH
+        self.max_size = max_size or POOL_SIZE
+        self.timeout = POOL_TIMEOUT if timeout is None else timeout
+        self.read_only = read_only
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._counters = {
+            "created": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "discarded": 0,
+        }
+
+    def _connect(self):
+        if self.read_only:
+            uri = f"{Path(self.database).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=TracedConnection)
+            pragmas = CONNECTION_PRAGMAS
+        else:
+            conn = sqlite3.connect(self.database, check_same_thread=False, factory=TracedConnection)
+            pragmas = CONNECTION_PRAGMAS + WRITER_PRAGMAS
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        with untraced():
+            for name, value in pragmas:
+                conn.execute(f"PRAGMA {name} = {value}")
+            # Load the schema now so the first real query does not pay for parsing it
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            for hook in CONNECTION_HOOKS:
+                hook(conn)
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._counters["discarded"] += 1
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            with untraced():
+                conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self):
+        """Check out a connection, opening a new one if the pool is not full"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_open = self._size < self.max_size
+                    if can_open:
+                        self._size += 1
+                if can_open:
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        with self._lock:
+                            self._size -= 1
+                        raise
+                    self._count("created")
+                    self._count("checkouts")
+                    return conn
+
+                # Pool is full - wait for another request to hand one back
+                self._count("waits")
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    self._count("timeouts")
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout}s"
+                    )
+
+            if self._is_healthy(conn):
+                self._count("checkouts")
+                return conn
+            self._discard(conn)
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back any unfinished transaction"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def close(self):
+        """Close all idle connections"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._size -= 1
+
+    def stats(self):
+        """Snapshot of pool usage counters"""
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                "database": self.database,
+                "read_only": self.read_only,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                **self._counters,
+            }
+
+
+_writer_pool = None
+_reader_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide writer pool, creating it on first use"""
+    global _writer_pool
+    if _writer_pool is None:
+        with _pool_lock:
+            if _writer_pool is None:
+                _writer_pool = ConnectionPool(max_size=WRITER_POOL_SIZE)
+                # Opening the writer switches the file to WAL before any reader attaches
+                _writer_pool.release(_writer_pool.acquire())
+    return _writer_pool
+
+
+def get_read_pool():
+    """Return the process-wide read-only pool, creating it on first use"""
+    global _reader_pool
+    if _reader_pool is None:
+        get_pool()
+        with _pool_lock:
+            if _reader_pool is None:
+                _reader_pool = ConnectionPool(read_only=True)
+    return _reader_pool
+
+
+_version_conn = None
+_version_lock = threading.Lock()
+
+
+def data_version():
+    """
+    PRAGMA data_version of a dedicated read-only connection. The value changes
+    whenever any other connection, in this process or another, commits to the
+    database, so callers can compare it to detect writes.
+    """
+    global _version_conn
+    get_pool()
+    with _version_lock:
+        if _version_conn is None:
+            uri = f"{Path(DB_PATH).resolve().as_uri()}?mode=ro"
+            _version_conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        return _version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def pool_stats():
+    """Usage statistics for the process-wide connection pools"""
+    return {"writer": get_pool().stats(), "reader": get_read_pool().stats()}
+
+
+def close_pool():
+    """Close the process-wide connection pools and the data_version connection (used on shutdown)"""
+    global _writer_pool, _reader_pool, _version_conn
+    with _pool_lock:
+        for pool in (_reader_pool, _writer_pool):
+            if pool is not None:
+                pool.close()
+        _writer_pool = None
+        _reader_pool = None
+    with _version_lock:
+        if _version_conn is not None:
+            _version_conn.close()
+            _version_conn = None
+
 
 @contextmanager
-def get_connection():
-    """Simple database connection manager that ensures connections are closed"""
-    conn = sqlite3.connect("payments.db")
-    conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+def _checkout(pool):
+    conn = pool.acquire()
     try:
         yield conn
     finally:
-        conn.close()
\ No newline at end of file
+        pool.release(conn)
+
+
+def get_connection():
+    """Check out the writer connection; use for any route that modifies data"""
+    return _checkout(get_pool())
+
+
+# Read connection held by shared_read_connection() in the current context
+_shared_read_conn = contextvars.ContextVar("shared_read_conn", default=None)
+
+
+def get_read_connection():
+    """Check out a read-only connection; use for GET routes"""
+    conn = _shared_read_conn.get()
+    if conn is not None:
+        return nullcontext(conn)
+    return _checkout(get_read_pool())
+
+
+@contextmanager
+def shared_read_connection():
+    """
+    Check out one read-only connection that every get_read_connection() in
+    this context reuses until the block exits
+    """
+    if _shared_read_conn.get() is not None:
+        yield _shared_read_conn.get()
+        return
+    with _checkout(get_read_pool()) as conn:
+        token = _shared_read_conn.set(conn)
+        try:
+            yield conn
+        finally:
+            _shared_read_conn.reset(token)
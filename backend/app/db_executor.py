@@ -0,0 +1,144 @@
+# app/db_executor.py
+"""
+Bounded thread pools that run blocking sqlite3 work off the event loop.
+
+Route handlers are written as plain functions and decorated with
+@db_thread; the decorator turns them into async endpoints that execute
+on a dedicated worker pool. Slow analytic views run in their own lane
+so they cannot occupy the workers that serve cheap lookups.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .profiling import current_profile
+
+DEFAULT_LANE = "default"
+ANALYTICS_LANE = "analytics"
+
+LANE_WORKERS = {
+    DEFAULT_LANE: int(os.environ.get("PAYMENTS_DB_WORKERS", "8")),
+    ANALYTICS_LANE: int(os.environ.get("PAYMENTS_DB_ANALYTICS_WORKERS", "4")),
+}
+
+
+class DatabaseExecutor:
+    """Fixed-size worker pool with queue-depth accounting"""
+
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"db-{name}"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._max_queue_depth = 0
+        self._wait_seconds = 0.0
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on a worker thread and await its result"""
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context variables (request id, tracing) into the worker
+        context = contextvars.copy_context()
+        # Profiled requests (app/profiling.py) sample the worker while it runs the job
+        profile = current_profile()
+        submitted = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queued)
+
+        def job():
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._wait_seconds += time.perf_counter() - submitted
+            if profile is not None:
+                profile.add_thread()
+            try:
+                return context.run(fn, *args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self._failed += 1
+                raise
+            finally:
+                if profile is not None:
+                    profile.remove_thread()
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        return await loop.run_in_executor(self._executor, job)
+
+    def stats(self):
+        """Snapshot of queue depth and throughput counters"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "active": self._active,
+                "completed": self._completed,
+                "failed": self._failed,
+                "max_queue_depth": self._max_queue_depth,
+                "total_wait_seconds": round(self._wait_seconds, 6),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(lane=DEFAULT_LANE):
+    """Return the executor for a lane, creating it on first use"""
+    executor = _executors.get(lane)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(lane)
+            if executor is None:
+                executor = DatabaseExecutor(lane, LANE_WORKERS[lane])
+                _executors[lane] = executor
+    return executor
+
+
+def executor_stats():
+    """Statistics for every executor lane that has been used"""
+    return {lane: executor.stats() for lane, executor in _executors.items()}
+
+
+def shutdown_executors():
+    """Wait for running jobs and stop all executor lanes"""
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown()
+        _executors.clear()
+
+
+def db_thread(func=None, *, lane=DEFAULT_LANE):
+    """
+    Decorator that runs a synchronous route handler on a database executor.
+    Use as @db_thread or @db_thread(lane=ANALYTICS_LANE).
+    """
+    if lane not in LANE_WORKERS:
+        raise ValueError(f"Unknown executor lane: {lane}")
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await get_executor(lane).run(fn, *args, **kwargs)
+        wrapper.lane = lane
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
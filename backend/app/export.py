@@ -0,0 +1,133 @@
+# app/export.py
+"""
+Streaming exports of whole result sets.
+
+Rows are read from the cursor in fixed-size batches with fetchmany and
+written out as NDJSON or CSV chunks, so memory use depends on the batch
+size rather than on how many rows the query returns. The read connection
+is held for the duration of the stream. ExportResponse closes the stream
+explicitly when the response ends, fails or is cancelled, so the
+connection is returned to the pool as soon as the client disconnects. Each batch is read on the
+analytics executor lane, like the analytic list endpoints.
+"""
+
+import csv
+import io
+import json
+import threading
+
+import anyio
+from fastapi.responses import StreamingResponse
+
+from .db import get_read_connection
+from .db_executor import get_executor, ANALYTICS_LANE
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _ndjson_chunks(columns, batches):
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in batch
+        )
+
+
+def _csv_chunks(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only when the query returned no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_export(query, params, fmt, batch_size=EXPORT_BATCH_SIZE):
+    """Yield the rows of a query as encoded text chunks, one chunk per batch"""
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None  # Plain tuples; columns come from the description
+        cursor.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+
+        def batches():
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield rows
+
+        chunks = _csv_chunks if fmt == "csv" else _ndjson_chunks
+        yield from chunks(columns, batches())
+
+
+class _LaneIterator:
+    """
+    A chunk generator advanced from executor threads. The lock keeps close()
+    from running while a next() that outlived its cancelled caller is still
+    reading a batch on another worker.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._lock = threading.Lock()
+
+    def next(self, default):
+        with self._lock:
+            return next(self._chunks, default)
+
+    def close(self):
+        with self._lock:
+            self._chunks.close()
+
+
+async def _on_lane(chunks, lane):
+    """Advance a blocking chunk iterator on a database executor lane"""
+    executor = get_executor(lane)
+    chunks = _LaneIterator(chunks)
+    done = object()
+    try:
+        while True:
+            chunk = await executor.run(chunks.next, done)
+            if chunk is done:
+                return
+            yield chunk
+    finally:
+        # Shielded so that a cancelled response (client disconnect) still
+        # waits for the close, which ends the read transaction and returns
+        # the connection to the pool
+        with anyio.CancelScope(shield=True):
+            await executor.run(chunks.close)
+
+
+class ExportResponse(StreamingResponse):
+    """
+    StreamingResponse that closes its chunk iterator as soon as the response
+    ends, including when sending fails or is cancelled after a disconnect,
+    instead of leaving the connection to the generator's finalizer
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            with anyio.CancelScope(shield=True):
+                await self.body_iterator.aclose()
+
+
+def export_response(query, params, fmt, filename, lane=ANALYTICS_LANE):
+    """StreamingResponse for a query exported as NDJSON or CSV"""
+    return ExportResponse(
+        _on_lane(iter_export(query, list(params), fmt), lane),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,240 @@
+# app/http_cache.py
+"""
+Conditional GET support (ETag / If-None-Match).
+
+StaticDocument holds a JSON document that only changes when the code does:
+the OpenAPI schema and the /api-reference and /api/structure-reference
+payloads. It is built and encoded on first use, and the bytes and their
+ETag are kept for the life of the process. Clients that poll with
+If-None-Match get 304 Not Modified without a body.
+
+Data routes are marked with @versioned_by(...), naming the tables and views
+they read. Triggers (migration 009) count the changes to every table in
+table_versions. Before the route runs, the decorator derives a weak ETag
+from the request URL, today's date (which fixes the billing period) and the
+versions of the route's tables; views are resolved to the tables they read.
+A matching If-None-Match is answered with 304 after that one lookup.
+Requests without If-None-Match skip that pre-check: the versions are read
+in the route's own executor job, on the read connection the route then
+uses. ConditionalGetMiddleware passes the request's If-None-Match in and
+puts the ETag on 200 responses. The versions are read before the route's
+queries, so a write that lands in between only costs the client one extra
+full response.
+"""
+
+import contextvars
+import functools
+import hashlib
+import sqlite3
+import threading
+
+from fastapi import Response
+from starlette.datastructures import MutableHeaders
+
+from .date_utils import current_periods
+from .db import get_read_connection, shared_read_connection
+from .db_executor import get_executor
+from .serialization import FastJSONResponse
+from .sql_trace import untraced
+
+# Responses may be stored but must be revalidated with the ETag before reuse
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(body):
+    """Strong ETag for a response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _opaque_tag(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value matches etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = _opaque_tag(etag)
+    return any(_opaque_tag(candidate.strip()) == etag for candidate in if_none_match.split(","))
+
+
+def not_modified(etag):
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+class StaticDocument:
+    """A JSON document built once by build() and served with an ETag"""
+
+    def __init__(self, build):
+        self._build = build
+        self._lock = threading.Lock()
+        self.body = None
+        self.etag = None
+
+    def render(self):
+        """Encoded body and ETag, building them on first use"""
+        if self.body is None:
+            with self._lock:
+                if self.body is None:
+                    body = FastJSONResponse(self._build()).body
+                    # Weak, so it stays the same when CompressionMiddleware encodes the body
+                    self.etag = "W/" + make_etag(body)
+                    self.body = body
+        return self.body, self.etag
+
+    def response(self, request):
+        body, etag = self.render()
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        return Response(
+            body,
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+        )
+
+
+# ----- TABLE-VERSIONED ROUTES -----
+class _ConditionalRequest:
+    """If-None-Match of the GET being served and the ETag chosen by its route"""
+
+    __slots__ = ("scope", "if_none_match", "etag")
+
+    def __init__(self, scope, if_none_match):
+        self.scope = scope
+        self.if_none_match = if_none_match
+        self.etag = None
+
+
+_conditional_request = contextvars.ContextVar("conditional_request", default=None)
+
+
+def _run_versioned(request, sources, handler, args, kwargs):
+    """Read the versions and run the route handler on one read connection"""
+    with shared_read_connection():
+        request.etag = versioned_etag(request.scope, table_versions(sources))
+        return handler(*args, **kwargs)
+
+
+def versioned_by(*sources):
+    """
+    Give a GET route an ETag from the change counters of the tables and
+    views it reads, and answer a matching If-None-Match with 304 without
+    running it. Place between @router.get and @db_thread.
+    """
+    def decorator(func):
+        # The sync handler and lane of a @db_thread route; None for async routes
+        lane = getattr(func, "lane", None)
+        handler = func.__wrapped__ if lane is not None else None
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = _conditional_request.get()
+            if request is None:
+                return await func(*args, **kwargs)
+            if request.if_none_match is None and handler is not None:
+                # Nothing to compare, so the versions are read in the route's
+                # own executor job instead of a separate hop beforehand
+                return await get_executor(lane).run(
+                    _run_versioned, request, sources, handler, args, kwargs
+                )
+            versions = await get_executor().run(table_versions, sources) if sources else {}
+            etag = versioned_etag(request.scope, versions)
+            if etag_matches(request.if_none_match, etag):
+                return not_modified(etag)
+            request.etag = etag
+            return await func(*args, **kwargs)
+        wrapper.versioned_by = sources
+        return wrapper
+    return decorator
+
+
+_base_tables = {}
+_base_tables_lock = threading.Lock()
+
+
+def _tables_read(conn, source):
+    """Tables a table or view reads, found by compiling a SELECT with an authorizer"""
+    tables = set()
+
+    def authorizer(action, table, column, database, trigger):
+        if action == sqlite3.SQLITE_READ and table:
+            tables.add(table)
+        return sqlite3.SQLITE_OK
+
+    conn.set_authorizer(authorizer)
+    try:
+        with untraced():
+            conn.execute(f"EXPLAIN SELECT * FROM {source}").fetchall()
+    finally:
+        conn.set_authorizer(None)
+    return tables
+
+
+def table_versions(sources):
+    """{table: version} for the versioned tables behind the given tables and views"""
+    if not sources:
+        return {}
+    with get_read_connection() as conn:
+        tables = set()
+        for source in sources:
+            if source not in _base_tables:
+                with _base_tables_lock:
+                    _base_tables[source] = frozenset(_tables_read(conn, source))
+            tables |= _base_tables[source]
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute("SELECT table_name, version FROM table_versions")
+        return {table: version for table, version in cursor.fetchall() if table in tables}
+
+
+def versioned_etag(scope, versions):
+    """Weak ETag for a request URL given its tables' versions and today's date"""
+    periods = current_periods()
+    parts = [
+        scope["path"],
+        scope.get("query_string", b"").decode("latin-1"),
+        periods.today.isoformat(),
+        *(f"{table}={version}" for table, version in sorted(versions.items())),
+    ]
+    return "W/" + make_etag("\n".join(parts).encode())
+
+
+class ConditionalGetMiddleware:
+    """
+    ASGI middleware that hands each GET's If-None-Match to @versioned_by
+    routes and adds the ETag they choose to the response
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+        request = _ConditionalRequest(scope, if_none_match)
+        token = _conditional_request.set(request)
+
+        async def send_with_etag(message):
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] == 200
+                and request.etag is not None
+            ):
+                headers = MutableHeaders(scope=message)
+                headers["ETag"] = request.etag
+                headers["Cache-Control"] = CACHE_CONTROL
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_etag)
+        finally:
+            _conditional_request.reset(token)
@@ -1,17 +1,26 @@
 # backend/main.py
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from fastapi.openapi.docs import get_swagger_ui_html
+from fastapi.responses import JSONResponse, Response
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 import logging
+import time
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Import date utilities
-from .date_utils import update_date_flags
+from .compression import COMPRESSION, CompressionMiddleware
+from .db import close_pool, pool_stats, get_connection
+from .migrations import apply_migrations
+from .db_executor import executor_stats, get_executor, shutdown_executors
+from .http_cache import ConditionalGetMiddleware, StaticDocument
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ERRORS, STARTUP_SECONDS, MetricsMiddleware, render_metrics
+from .reference_cache import reference_cache_stats
+from .profiling import ADMIN_TOKEN, ProfilingMiddleware, router as profiling_router
+from .sql_trace import DB_TIME_HEADER, QUERY_COUNT_HEADER, REQUEST_ID_HEADER, SQLTraceMiddleware
 
 # Import all routers
 from .api.clients import router as clients_router
@@ -20,6 +29,8 @@ from .api.payments import router as payments_router
 from .api.documents import router as documents_router
 from .api.providers import router as providers_router
 from .api.dates import router as dates_router
+from .api.exports import router as exports_router
+from .api.dashboard import router as dashboard_router
 
 # Create FastAPI app
 app = FastAPI(
@@ -27,17 +38,29 @@ app = FastAPI(
     description="API for payment management system",
     version="1.0.0",
     docs_url=None,  # Disable default docs
+    openapi_url=None,  # Served below from a cached document
 )
 
-# Update date flags on startup
+# Apply pending schema migrations on startup (nothing is written when the
+# schema is current; billing periods come from app.date_utils.period_calendar)
 @app.on_event("startup")
 async def startup_event():
-    logger.info("Updating date dimension flags on startup")
-    success = update_date_flags()
-    if success:
-        logger.info("Date dimension flags updated successfully")
-    else:
-        logger.warning("Failed to properly update date dimension flags")
+    start = time.perf_counter()
+    with get_connection() as conn:
+        applied = apply_migrations(conn)
+    if applied:
+        logger.info(f"Applied database migrations: {applied}")
+    STARTUP_SECONDS.set(time.perf_counter() - start)
+
+# Stop the query executors and release pooled connections on shutdown
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_executors()
+    close_pool()
+
+# ETags from table change counters for @versioned_by routes, which answer a
+# matching If-None-Match with 304
+app.add_middleware(ConditionalGetMiddleware)
 
 # Configure CORS to allow requests from the Next.js frontend
 app.add_middleware(
@@ -46,8 +69,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[REQUEST_ID_HEADER, QUERY_COUNT_HEADER, DB_TIME_HEADER, "ETag"],
 )
 
+# gzip (or brotli/zstd when installed) for JSON, NDJSON and CSV bodies,
+# including streamed exports; runs inside the metrics middleware so request
+# latency includes the compression time (PAYMENTS_COMPRESSION, PAYMENTS_GZIP_LEVEL)
+if COMPRESSION:
+    app.add_middleware(CompressionMiddleware)
+
+# Request latency, status and SQL time per route for /metrics; added before
+# the tracing middleware so it runs inside it and can read the request's trace
+app.add_middleware(MetricsMiddleware)
+
+# Record each request's SQL statements; adds query count / DB time headers
+# and logs slow statements (PAYMENTS_SQL_TRACE, PAYMENTS_SLOW_QUERY_MS)
+app.add_middleware(SQLTraceMiddleware)
+
+# Opt-in request profiling and its /admin routes, only when an admin token is
+# configured (PAYMENTS_ADMIN_TOKEN); without one nothing is installed
+if ADMIN_TOKEN:
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(profiling_router)
+
 # Include all routers
 app.include_router(clients_router)
 app.include_router(contracts_router)
@@ -55,6 +99,8 @@ app.include_router(payments_router)
 app.include_router(documents_router)
 app.include_router(providers_router)
 app.include_router(dates_router)
+app.include_router(exports_router)
+app.include_router(dashboard_router)
 
 # Global exception handler to ensure consistent error responses
 @app.exception_handler(Exception)
@@ -67,6 +113,7 @@ async def global_exception_handler(request: Request, exc: Exception):
         )
     
     # Log the exception
+    ERRORS.inc(exception=type(exc).__name__)
     logger.error(f"Unhandled exception: {str(exc)}")
     
     # Return a generic error for unhandled exceptions
@@ -81,6 +128,22 @@ async def health_check():
     """API health check endpoint"""
     return {"status": "ok", "version": "1.0.0"}
 
+@app.get("/health/db")
+async def database_health_check():
+    """Connection pool, query executor and reference cache statistics"""
+    return {
+        "status": "ok",
+        "pool": pool_stats(),
+        "executors": executor_stats(),
+        "reference_caches": reference_cache_stats(),
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: request latency, SQL time, pool, executor and SQLite figures"""
+    body = await get_executor().run(render_metrics)
+    return Response(body, media_type=METRICS_CONTENT_TYPE)
+
 # Custom API documentation endpoint
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui_html():
@@ -91,8 +154,13 @@ async def custom_swagger_ui_html():
         swagger_css_url="https://cdn.jsdelivr.net/npm/swagger-ui-dist@4/swagger-ui.css",
     )
 
-@app.get("/openapi.json", include_in_schema=False)
-async def get_open_api_endpoint():
+@app.get("/redoc", include_in_schema=False)
+async def redoc_html():
+    return get_redoc_html(openapi_url="/openapi.json", title=app.title + " - ReDoc")
+
+# The OpenAPI schema and the reference payloads below only change with the
+# code, so each is built and encoded once and served with an ETag
+def build_openapi():
     return get_openapi(
         title=app.title,
         version=app.version,
@@ -100,11 +168,13 @@ async def get_open_api_endpoint():
         routes=app.routes,
     )
 
-# Reference API endpoints list for frontend developers
-@app.get("/api-reference")
-async def api_reference():
-    """Provides a simplified list of available API endpoints for frontend developers"""
-    
+openapi_document = StaticDocument(build_openapi)
+
+@app.get("/openapi.json", include_in_schema=False)
+async def get_open_api_endpoint(request: Request):
+    return openapi_document.response(request)
+
+def build_api_reference():
     endpoints = {
         "clients": {
             "list": {"method": "GET", "url": "/api/clients", "description": "Get all clients"},
@@ -146,6 +216,12 @@ async def api_reference():
             "create": {"method": "POST", "url": "/api/providers", "description": "Create a new provider"},
             "update": {"method": "PUT", "url": "/api/providers/{provider_id}", "description": "Update a provider"},
             "delete": {"method": "DELETE", "url": "/api/providers/{provider_id}", "description": "Delete a provider"}
+        },
+        "exports": {
+            "payments": {"method": "GET", "url": "/api/export/payments?format=ndjson|csv", "description": "Stream all payments"},
+            "splitPayments": {"method": "GET", "url": "/api/export/split-payments?format=ndjson|csv", "description": "Stream all split payment distributions"},
+            "expandedPeriods": {"method": "GET", "url": "/api/export/expanded-payment-periods?format=ndjson|csv", "description": "Stream all expanded payment periods"},
+            "missingPeriods": {"method": "GET", "url": "/api/export/missing-periods?format=ndjson|csv", "description": "Stream all missing payment periods"}
         }
     }
     
@@ -155,11 +231,15 @@ async def api_reference():
         "docs": "/docs"
     }
 
-# Frontend integration helper - data structure reference
-@app.get("/api/structure-reference")
-async def structure_reference():
-    """Provides example data structures for frontend integration"""
-    
+api_reference_document = StaticDocument(build_api_reference)
+
+# Reference API endpoints list for frontend developers
+@app.get("/api-reference")
+async def api_reference(request: Request):
+    """Provides a simplified list of available API endpoints for frontend developers"""
+    return api_reference_document.response(request)
+
+def build_structure_reference():
     examples = {
         "payment": {
             "payment_id": 1,
@@ -204,4 +284,12 @@ async def structure_reference():
         }
     }
     
-    return examples
\ No newline at end of file
+    return examples
+
+structure_reference_document = StaticDocument(build_structure_reference)
+
+# Frontend integration helper - data structure reference
+@app.get("/api/structure-reference")
+async def structure_reference(request: Request):
+    """Provides example data structures for frontend integration"""
+    return structure_reference_document.response(request)
@@ -0,0 +1,132 @@
+# app/maintenance.py
+"""
+Rebuild routines for tables that are maintained incrementally by triggers
+"""
+
+import logging
+import threading
+
+from .date_utils import current_periods
+from .db import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_payment_periods(conn):
+    """
+    Recompute payment_periods from the payments table.
+    Needed after bulk loads with triggers disabled or date_dimension edits.
+    Returns the number of rows written.
+    """
+    with conn:
+        conn.execute("DELETE FROM payment_periods")
+        cursor = conn.execute("""
+            INSERT INTO payment_periods (client_id, payment_schedule, period_key, payment_id, period_label)
+            SELECT client_id, payment_schedule, period_key, payment_id, period_label
+            FROM v_payment_period_source
+        """)
+    logger.info(f"Rebuilt payment_periods with {cursor.rowcount} rows")
+    return cursor.rowcount
+
+
+# Bounds a ledger query to the periods at or before the horizon row h
+LEDGER_BOUND = """
+    ((s.payment_schedule = 'monthly' AND s.period_key <= h.monthly_key)
+     OR (s.payment_schedule = 'quarterly' AND s.period_key <= h.quarterly_key))
+"""
+
+
+def _fill_period_ledger(conn, new_periods):
+    """Insert expected periods matching new_periods and the missing ones among them"""
+    cursor = conn.execute(f"""
+        INSERT INTO expected_periods (
+            client_id, payment_schedule, period_key,
+            period_key_monthly, period_key_quarterly, period_label
+        )
+        SELECT
+            s.client_id, s.payment_schedule, s.period_key,
+            s.period_key_monthly, s.period_key_quarterly, s.period_label
+        FROM v_client_schedule_periods s
+        CROSS JOIN period_ledger_horizon h
+        WHERE {LEDGER_BOUND} AND {new_periods}
+    """)
+    conn.execute(f"""
+        INSERT INTO missing_periods (client_id, payment_schedule, period_key, period_label)
+        SELECT s.client_id, s.payment_schedule, s.period_key, s.period_label
+        FROM expected_periods s
+        CROSS JOIN period_ledger_horizon h
+        WHERE {LEDGER_BOUND} AND {new_periods}
+          AND NOT EXISTS (
+            SELECT 1 FROM payment_periods pp
+            WHERE pp.client_id = s.client_id
+              AND pp.payment_schedule = s.payment_schedule
+              AND pp.period_key = s.period_key
+          )
+    """)
+    return cursor.rowcount
+
+
+def rebuild_period_ledger(conn):
+    """
+    Recompute expected_periods and missing_periods up to the ledger horizon.
+    Needed after bulk loads with triggers disabled.
+    Returns the number of expected periods written.
+    """
+    with conn:
+        conn.execute("DELETE FROM missing_periods")
+        conn.execute("DELETE FROM expected_periods")
+        rows = _fill_period_ledger(conn, "1")
+    logger.info(f"Rebuilt period ledger with {rows} expected periods")
+    return rows
+
+
+def advance_period_ledger(conn, periods):
+    """
+    Move the ledger horizon forward to the current billing periods
+    (app.date_utils.BillingPeriods), adding only the periods that rolled in.
+    Returns the number of expected periods added.
+    """
+    with conn:
+        monthly_key, quarterly_key = conn.execute(
+            "SELECT monthly_key, quarterly_key FROM period_ledger_horizon"
+        ).fetchone()
+        if (periods.current_monthly_key <= monthly_key
+                and periods.current_quarterly_key <= quarterly_key):
+            return 0
+        conn.execute(
+            "UPDATE period_ledger_horizon SET monthly_key = ?, quarterly_key = ?",
+            (max(monthly_key, periods.current_monthly_key),
+             max(quarterly_key, periods.current_quarterly_key)),
+        )
+        new_periods = (
+            f"((s.payment_schedule = 'monthly' AND s.period_key > {int(monthly_key)})"
+            f" OR (s.payment_schedule = 'quarterly' AND s.period_key > {int(quarterly_key)}))"
+        )
+        rows = _fill_period_ledger(conn, new_periods)
+    logger.info(
+        f"Advanced period ledger to {periods.current_monthly_key}/"
+        f"{periods.current_quarterly_key} with {rows} expected periods"
+    )
+    return rows
+
+
+_ledger_synced = None
+_ledger_lock = threading.Lock()
+
+
+def sync_period_ledger():
+    """
+    Advance the period ledger when the billing period has rolled over since
+    this process last checked. Called before reading the ledger; writes at
+    most once per period.
+    """
+    global _ledger_synced
+    periods = current_periods()
+    keys = (periods.current_monthly_key, periods.current_quarterly_key)
+    if _ledger_synced == keys:
+        return
+    with _ledger_lock:
+        if _ledger_synced != keys:
+            with get_connection() as conn:
+                advance_period_ledger(conn, periods)
+            _ledger_synced = keys
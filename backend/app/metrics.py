@@ -0,0 +1,331 @@
+# app/metrics.py
+"""
+Process metrics in the Prometheus text exposition format, served at /metrics.
+
+The metric types are small in-process implementations (no client library).
+Request metrics are recorded by MetricsMiddleware per route template, so
+/api/payments/17/distributions and /api/payments/18/distributions share one
+series. Pool, executor, reference-cache and database-file figures are read when
+/metrics is scraped. Values are per process; with several uvicorn workers each worker
+reports its own.
+"""
+
+import os
+import threading
+import time
+
+from .db import get_read_connection, pool_stats
+from .db_executor import executor_stats
+from .reference_cache import reference_cache_stats
+from .sql_trace import current_trace
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROCESS_START = time.time()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = self.header()
+        for key, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels):
+        entry = self._values.get(self._key(labels))
+        return entry[0][-1] if entry else 0
+
+    def render(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = self.header()
+        for key, (counts, total) in values:
+            for bound, count in zip(self.buckets, counts):
+                labels = _labels(self.labelnames, key, (("le", _number(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {counts[-1]}")
+        return lines
+
+
+# ----- REQUEST METRICS -----
+REQUESTS = Counter(
+    "payments_http_requests_total", "HTTP requests by route template and status",
+    ("method", "route", "status"),
+)
+REQUEST_LATENCY = Histogram(
+    "payments_http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route"),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "payments_http_requests_in_flight", "HTTP requests being served",
+)
+REQUEST_DB_TIME = Histogram(
+    "payments_http_request_db_seconds", "SQL time per request by route template",
+    ("method", "route"),
+)
+REQUEST_QUERIES = Counter(
+    "payments_db_queries_total", "SQL statements executed by route template",
+    ("method", "route"),
+)
+ERRORS = Counter(
+    "payments_unhandled_exceptions_total", "Exceptions that reached the global exception handler",
+    ("exception",),
+)
+STARTUP_SECONDS = Gauge(
+    "payments_startup_duration_seconds", "Time spent in the startup event (migrations)",
+)
+PROCESS_START_TIME = Gauge(
+    "payments_process_start_time_seconds", "Unix time the process started",
+)
+PROCESS_START_TIME.set(PROCESS_START)
+REQUESTS_IN_FLIGHT.set(0)
+
+METRICS = (
+    REQUESTS, REQUEST_LATENCY, REQUESTS_IN_FLIGHT, REQUEST_DB_TIME, REQUEST_QUERIES,
+    ERRORS, STARTUP_SECONDS, PROCESS_START_TIME,
+)
+
+# Requests that match no route share one label so unknown URLs cannot add series
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(scope):
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status, in-flight count and SQL time
+    per route template. Runs inside SQLTraceMiddleware so the request's SQL
+    trace is available when the request finishes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            method, route = scope["method"], route_template(scope)
+            REQUESTS.inc(method=method, route=route, status=str(status))
+            REQUEST_LATENCY.observe(time.perf_counter() - start, method=method, route=route)
+            trace = current_trace()
+            if trace is not None:
+                REQUEST_DB_TIME.observe(trace.db_seconds, method=method, route=route)
+                REQUEST_QUERIES.inc(trace.query_count, method=method, route=route)
+
+
+# ----- SCRAPE-TIME METRICS -----
+def _gauge_lines(name, documentation, samples, labelnames=(), kind="gauge"):
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labelnames, labels)} {_number(value)}")
+    return lines
+
+
+def _pool_lines():
+    pools = pool_stats()
+    lines = []
+    for field, documentation in (
+        ("size", "Open connections"),
+        ("idle", "Idle connections"),
+        ("in_use", "Checked-out connections"),
+        ("max_size", "Connection limit"),
+    ):
+        lines += _gauge_lines(
+            f"payments_db_pool_{field}", documentation,
+            [((pool,), stats[field]) for pool, stats in sorted(pools.items())], ("pool",),
+        )
+    for field, documentation in (
+        ("checkouts", "Connection checkouts"),
+        ("waits", "Checkouts that waited for a free connection"),
+        ("timeouts", "Checkouts that timed out"),
+        ("created", "Connections opened"),
+        ("discarded", "Broken connections discarded"),
+    ):
+        lines += _gauge_lines(
+            f"payments_db_pool_{field}_total", documentation,
+            [((pool,), stats[field]) for pool, stats in sorted(pools.items())], ("pool",), "counter",
+        )
+    return lines
+
+
+def _executor_lines():
+    executors = sorted(executor_stats().items())
+    lines = []
+    for field, name, documentation, kind in (
+        ("queued", "queued", "Jobs waiting for a worker", "gauge"),
+        ("active", "active", "Jobs running", "gauge"),
+        ("max_workers", "max_workers", "Worker threads", "gauge"),
+        ("max_queue_depth", "max_queue_depth", "Highest queue depth seen", "gauge"),
+        ("completed", "completed_total", "Jobs finished", "counter"),
+        ("failed", "failed_total", "Jobs that raised", "counter"),
+        ("total_wait_seconds", "wait_seconds_total", "Time jobs spent queued", "counter"),
+    ):
+        lines += _gauge_lines(
+            f"payments_db_executor_{name}", documentation,
+            [((lane,), stats[field]) for lane, stats in executors], ("lane",), kind,
+        )
+    return lines
+
+
+def _reference_cache_lines():
+    caches = sorted(reference_cache_stats().items())
+    lines = []
+    for field, name, documentation, kind in (
+        ("entries", "entries", "Cached responses", "gauge"),
+        ("hits", "hits_total", "Lookups served from the cache", "counter"),
+        ("misses", "misses_total", "Lookups that read the database", "counter"),
+        ("invalidations", "invalidations_total", "Explicit invalidations by write routes", "counter"),
+    ):
+        lines += _gauge_lines(
+            f"payments_reference_cache_{name}", documentation,
+            [((cache,), stats[field]) for cache, stats in caches], ("cache",), kind,
+        )
+    return lines
+
+
+def _sqlite_lines():
+    """
+    Database file and page figures. cache_size and mmap_size are configured
+    limits, not usage, and sqlite3 cannot read sqlite3_db_status, so the
+    page cache is not reported.
+    """
+    with get_read_connection() as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    database = pool_stats()["writer"]["database"]
+
+    def file_size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    lines = []
+    for name, documentation, value in (
+        ("payments_sqlite_page_size_bytes", "Database page size", page_size),
+        ("payments_sqlite_pages", "Pages in the database file", page_count),
+        ("payments_sqlite_freelist_pages", "Unused pages in the database file", freelist_count),
+        ("payments_sqlite_file_bytes", "Database file size", file_size(database)),
+        ("payments_sqlite_wal_bytes", "Write-ahead log size", file_size(f"{database}-wal")),
+    ):
+        lines += _gauge_lines(name, documentation, [((), value)])
+    return lines
+
+
+def render_metrics():
+    """Every metric in the text exposition format (reads the database; run off the event loop)"""
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    lines += _pool_lines()
+    lines += _executor_lines()
+    lines += _reference_cache_lines()
+    lines += _sqlite_lines()
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,60 @@
+# app/migrations.py
+"""
+Schema migrations for the payments database.
+
+Migrations are numbered SQL scripts in database/migrations (NNN_name.sql).
+The number of the last applied script is stored in PRAGMA user_version,
+so checking for pending work is a read-only header lookup.
+"""
+
+import logging
+import re
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "database" / "migrations"
+
+_MIGRATION_NAME = re.compile(r"^(\d+)_.+\.sql$")
+
+
+def available_migrations(directory=MIGRATIONS_DIR):
+    """Return (version, path) for every migration script, in order"""
+    migrations = []
+    for path in Path(directory).glob("*.sql"):
+        match = _MIGRATION_NAME.match(path.name)
+        if match:
+            migrations.append((int(match.group(1)), path))
+    return sorted(migrations)
+
+
+def current_version(conn):
+    """Schema version recorded in the database header"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(conn, directory=MIGRATIONS_DIR):
+    """Migrations newer than the database's schema version"""
+    version = current_version(conn)
+    return [(number, path) for number, path in available_migrations(directory) if number > version]
+
+
+def apply_migrations(conn, directory=MIGRATIONS_DIR):
+    """
+    Apply pending migrations, each in its own transaction.
+    Returns the list of applied versions.
+    """
+    applied = []
+    for number, path in pending_migrations(conn, directory):
+        logger.info(f"Applying migration {path.name}")
+        script = path.read_text(encoding="utf-8")
+        try:
+            conn.executescript(
+                f"BEGIN;\n{script}\nPRAGMA user_version = {number};\nCOMMIT;"
+            )
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        applied.append(number)
+    return applied
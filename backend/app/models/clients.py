@@ -3,6 +3,9 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import date, datetime
 
+from .contracts import ContractModel, MissingPaymentPeriodViewModel
+from .payments import PaymentViewResponse, PaymentStatusViewModel
+
 # Base table models
 class ClientModel(BaseModel):
     """Model for the clients table"""
@@ -130,24 +133,34 @@ class ContactUpdate(BaseModel):
 # Response models
 class ClientResponse(BaseModel):
     items: List[ClientModel]
-    total: int
+    total: Optional[int] = None
 
 class ClientFolderResponse(BaseModel):
     items: List[ClientFolderModel]
-    total: int
+    total: Optional[int] = None
 
 class ClientProviderResponse(BaseModel):
     items: List[ClientProviderModel]
-    total: int
+    total: Optional[int] = None
 
 class ContactResponse(BaseModel):
     items: List[ContactModel] 
-    total: int
+    total: Optional[int] = None
 
 class ClientFirstPaymentResponse(BaseModel):
     items: List[ClientFirstPaymentViewModel]
-    total: int
+    total: Optional[int] = None
     
 class ClientLastPaymentResponse(BaseModel):
     items: List[ClientLastPaymentViewModel]
-    total: int
\ No newline at end of file
+    total: Optional[int] = None
+
+# Composite response for /api/clients/{client_id}/dashboard
+class ClientDashboardResponse(BaseModel):
+    client: ClientModel
+    contracts: List[ContractModel]
+    contacts: List[ContactModel]
+    payments: PaymentViewResponse
+    last_payment: Optional[ClientLastPaymentViewModel] = None
+    payment_status: List[PaymentStatusViewModel]
+    missing_periods: List[MissingPaymentPeriodViewModel]
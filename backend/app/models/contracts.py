@@ -85,16 +85,16 @@ class ContractUpdate(BaseModel):
 # Response models
 class ContractResponse(BaseModel):
     items: List[ContractModel]
-    total: int
+    total: Optional[int] = None
 
 class ActiveContractResponse(BaseModel):
     items: List[ActiveContractViewModel]
-    total: int
+    total: Optional[int] = None
 
 class ExpectedPeriodResponse(BaseModel):
     items: List[ExpectedPeriodViewModel]
-    total: int
+    total: Optional[int] = None
 
 class MissingPaymentPeriodResponse(BaseModel):
     items: List[MissingPaymentPeriodViewModel]
-    total: int
\ No newline at end of file
+    total: Optional[int] = None
\ No newline at end of file
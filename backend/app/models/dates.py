@@ -24,4 +24,4 @@ class DateDimensionModel(BaseModel):
 # Response model
 class DateDimensionResponse(BaseModel):
     items: List[DateDimensionModel]
-    total: int
\ No newline at end of file
+    total: Optional[int] = None
\ No newline at end of file
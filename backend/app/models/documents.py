@@ -62,12 +62,12 @@ class DocumentPaymentCreate(BaseModel):
 # Response models
 class DocumentResponse(BaseModel):
     items: List[DocumentModel]
-    total: int
+    total: Optional[int] = None
 
 class DocumentClientResponse(BaseModel):
     items: List[DocumentClientModel]
-    total: int
+    total: Optional[int] = None
 
 class DocumentPaymentResponse(BaseModel):
     items: List[DocumentPaymentModel]
-    total: int
\ No newline at end of file
+    total: Optional[int] = None
\ No newline at end of file
@@ -35,7 +35,7 @@ class PaymentViewModel(BaseModel):
     client_id: int
     received_date: date
     total_assets: Optional[float] = None  # Changed from int to float
-    actual_fee: float
+    actual_fee: Optional[float] = None  # Nullable in the payments table
     method: Optional[str] = None
     notes: Optional[str] = None
     start_period_monthly: Optional[str] = None
@@ -71,6 +71,7 @@ class ExpandedPaymentPeriodViewModel(BaseModel):
     client_id: int
     period_key: int
     payment_schedule: str
+    period_label: Optional[str] = None
     
     model_config = {"from_attributes": True}
 
@@ -79,12 +80,12 @@ class PaymentPeriodCoverageViewModel(BaseModel):
     payment_id: int
     client_id: int
     received_date: date
-    actual_fee: float
+    actual_fee: Optional[float] = None  # Nullable in the payments table
     is_split_payment: int
     covered_monthly_periods: Optional[str] = None
     covered_quarterly_periods: Optional[str] = None
     periods_covered: int
-    distributed_amount_per_period: float
+    distributed_amount_per_period: Optional[float] = None
     
     model_config = {"from_attributes": True}
 
@@ -150,24 +151,26 @@ class PaymentUpdate(BaseModel):
 # Response models
 class PaymentResponse(BaseModel):
     items: List[PaymentModel]
-    total: int
+    total: Optional[int] = None
 
 class PaymentViewResponse(BaseModel):
     items: List[PaymentViewModel]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class SplitPaymentDistributionResponse(BaseModel):
     items: List[SplitPaymentDistributionViewModel]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class ExpandedPaymentPeriodResponse(BaseModel):
     items: List[ExpandedPaymentPeriodViewModel]
-    total: int
+    total: Optional[int] = None
 
 class PaymentPeriodCoverageResponse(BaseModel):
     items: List[PaymentPeriodCoverageViewModel]
-    total: int
+    total: Optional[int] = None
 
 class PaymentStatusResponse(BaseModel):
     items: List[PaymentStatusViewModel]
-    total: int
\ No newline at end of file
+    total: Optional[int] = None
\ No newline at end of file
@@ -23,4 +23,4 @@ class ProviderUpdate(BaseModel):
 # Response model
 class ProviderResponse(BaseModel):
     items: List[ProviderModel]
-    total: int
\ No newline at end of file
+    total: Optional[int] = None
\ No newline at end of file
@@ -0,0 +1,167 @@
+# app/pagination.py
+"""
+Shared pagination for list endpoints.
+
+The page and the total row count come from a single execution: the total
+is a COUNT(*) OVER () window evaluated in the same pass that produces the
+page, instead of a separate SELECT COUNT(*) over the whole query.
+Routes with a unique sort key can also page by cursor (keyset pagination).
+"""
+
+import base64
+import json
+
+from fastapi import HTTPException
+
+TOTAL_COLUMN = "_total"
+
+
+def fetch_dicts(conn, sql, params):
+    """
+    Execute a query and return its rows as plain dicts keyed by the cursor
+    description, skipping the sqlite3.Row wrapper.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(sql, params)
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def fetch_page(conn, query, params, order_by, limit, offset, include_total=True):
+    """
+    Execute a list query with ORDER BY/LIMIT/OFFSET and return (rows, total).
+
+    query    - base SELECT (with its WHERE clause) without ordering or paging
+    order_by - ORDER BY expression in terms of the query's output columns
+    Rows are returned as plain dicts. total is None when include_total is False.
+    """
+    params = list(params)
+    if include_total:
+        sql = (
+            f"SELECT *, COUNT(*) OVER () AS {TOTAL_COLUMN} FROM ({query}) "
+            f"ORDER BY {order_by} LIMIT ? OFFSET ?"
+        )
+    else:
+        sql = f"SELECT * FROM ({query}) ORDER BY {order_by} LIMIT ? OFFSET ?"
+
+    rows = fetch_dicts(conn, sql, params + [limit, offset])
+
+    if not include_total:
+        return rows, None
+
+    if rows:
+        total = rows[0][TOTAL_COLUMN]
+        for row in rows:
+            del row[TOTAL_COLUMN]  # Last key, so the remaining order is the query's
+    elif offset > 0:
+        # Page past the end: the window has no row to report on, so count directly
+        cursor = conn.execute(f"SELECT COUNT(*) FROM ({query})", params)
+        total = cursor.fetchone()[0]
+    else:
+        total = 0
+    return rows, total
+
+
+# ----- KEYSET (CURSOR) PAGINATION -----
+# Keys are sequences of (column, "ASC" | "DESC") that uniquely order the rows.
+# Key columns must be non-null for the comparison to reach every row.
+
+def order_by_clause(keys):
+    """ORDER BY expression for a keyset definition"""
+    return ", ".join(f"{column} {direction}" for column, direction in keys)
+
+
+def encode_cursor(values):
+    """Opaque, URL-safe token for the key values of the last row on a page"""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, size):
+    """Key values from a cursor token; raises a 400 error if it is malformed"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Only scalars can be bound as sqlite parameters
+    if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _after_cursor(keys, values):
+    """WHERE clause (and params) selecting rows that sort after the cursor"""
+    directions = {direction for _, direction in keys}
+    if len(directions) == 1:
+        # Uniform direction: one row-value comparison the planner can use as an index range
+        op = "<" if directions.pop() == "DESC" else ">"
+        columns = ", ".join(column for column, _ in keys)
+        placeholders = ", ".join("?" for _ in keys)
+        return f"({columns}) {op} ({placeholders})", list(values)
+
+    # Mixed directions: bound the leading same-direction keys with a row value
+    # (usable as an index range), then expand the exact lexicographic OR form
+    lead_direction = keys[0][1]
+    prefix = 0
+    while prefix < len(keys) and keys[prefix][1] == lead_direction:
+        prefix += 1
+    op = "<=" if lead_direction == "DESC" else ">="
+    columns = ", ".join(column for column, _ in keys[:prefix])
+    placeholders = ", ".join("?" for _ in keys[:prefix])
+    bound = f"({columns}) {op} ({placeholders})"
+    params = list(values[:prefix])
+
+    clauses = []
+    for i, (column, direction) in enumerate(keys):
+        op = "<" if direction == "DESC" else ">"
+        parts = [f"{prev} = ?" for prev, _ in keys[:i]] + [f"{column} {op} ?"]
+        clauses.append("(" + " AND ".join(parts) + ")")
+        params.extend(values[:i + 1])
+    return f"{bound} AND (" + " OR ".join(clauses) + ")", params
+
+
+def _cursor_for(row, keys):
+    return encode_cursor(row[column] for column, _ in keys)
+
+
+def fetch_keyset_page(conn, query, params, keys, cursor, limit):
+    """
+    Execute a list query starting after a cursor and return (rows, next_cursor).
+    Cost depends on the page size, not on how deep the page is.
+    """
+    params = list(params)
+    sql = f"SELECT * FROM ({query})"
+    if cursor:
+        predicate, cursor_params = _after_cursor(keys, decode_cursor(cursor, len(keys)))
+        sql += f" WHERE {predicate}"
+        params.extend(cursor_params)
+    sql += f" ORDER BY {order_by_clause(keys)} LIMIT ?"
+
+    # One extra row tells us whether another page exists
+    rows = fetch_dicts(conn, sql, params + [limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = _cursor_for(rows[-1], keys) if has_more and rows else None
+    return rows, next_cursor
+
+
+def fetch_keyed_page(conn, query, params, keys, limit, offset, include_total=True, cursor=None):
+    """
+    Offset or cursor pagination over a keyset-ordered query.
+    Returns (rows, total, next_cursor); total is None in cursor mode.
+    Offset pages also carry next_cursor when more rows are known to follow,
+    so a client can switch to cursor mode after the first page.
+    """
+    if cursor is not None:
+        rows, next_cursor = fetch_keyset_page(conn, query, params, keys, cursor, limit)
+        return rows, None, next_cursor
+
+    rows, total = fetch_page(conn, query, params, order_by_clause(keys), limit, offset, include_total)
+    next_cursor = None
+    if rows and total is not None and offset + len(rows) < total:
+        next_cursor = _cursor_for(rows[-1], keys)
+    return rows, total, next_cursor
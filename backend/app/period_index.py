@@ -0,0 +1,114 @@
+# app/period_index.py
+"""
+In-memory lookup of date_dimension periods.
+
+Period keys (YYYYMM / YYYYQ) map arithmetically to an ordinal (months or
+quarters since year 0), so the periods of one schedule sit in flat arrays
+indexed by ordinal - first ordinal. Key -> label is an O(1) array read
+instead of a date_dimension lookup. date_dimension only
+changes with migrations, so the index is loaded once and reused.
+"""
+
+import threading
+from array import array
+
+from .db import get_read_connection
+
+# (key multiplier, periods per year) for each payment schedule
+SCHEDULES = {
+    "monthly": (100, 12),
+    "quarterly": (10, 4),
+}
+
+
+class PeriodIndex:
+    """Period keys and labels of one payment schedule, in period order"""
+
+    def __init__(self, schedule, periods):
+        """periods: (period_key, label) pairs in any order"""
+        self.schedule = schedule
+        self._multiplier, self._per_year = SCHEDULES[schedule]
+        periods = sorted(periods)
+        if periods:
+            self._first = self._ordinal(periods[0][0])
+            size = self._ordinal(periods[-1][0]) - self._first + 1
+        else:
+            self._first, size = 0, 0
+        # Slots for keys missing from date_dimension hold 0 / None
+        self._keys = array("l", [0]) * size
+        self._labels = [None] * size
+        for key, label in periods:
+            slot = self._ordinal(key) - self._first
+            self._keys[slot] = key
+            self._labels[slot] = label
+        self._count = len(periods)
+
+    def _ordinal(self, key):
+        """Periods since year 0 (consecutive periods differ by 1)"""
+        year, period = divmod(key, self._multiplier)
+        return year * self._per_year + period - 1
+
+    def _slot(self, key):
+        year, period = divmod(key, self._multiplier)
+        if not 1 <= period <= self._per_year:
+            return None
+        slot = self._ordinal(key) - self._first
+        if 0 <= slot < len(self._keys) and self._keys[slot] == key:
+            return slot
+        return None
+
+    def __contains__(self, key):
+        return self._slot(key) is not None
+
+    def __len__(self):
+        return self._count
+
+    def label(self, key):
+        """Display label ("Jan 2025", "Q1 2025"), or None for unknown keys"""
+        slot = self._slot(key)
+        return None if slot is None else self._labels[slot]
+
+
+def load_period_indexes(conn):
+    """{schedule: PeriodIndex} built from date_dimension"""
+    monthly = conn.execute(
+        "SELECT period_key_monthly, display_label_monthly FROM date_dimension"
+    ).fetchall()
+    quarterly = conn.execute(
+        "SELECT period_key_quarterly, display_label_quarterly FROM date_dimension "
+        "WHERE month IN (1, 4, 7, 10)"
+    ).fetchall()
+    return {
+        "monthly": PeriodIndex("monthly", [tuple(row) for row in monthly]),
+        "quarterly": PeriodIndex("quarterly", [tuple(row) for row in quarterly]),
+    }
+
+
+_indexes = None
+_lock = threading.Lock()
+
+
+def period_index(schedule, conn=None):
+    """
+    Process-wide PeriodIndex for 'monthly' or 'quarterly', loaded on first
+    use (through conn when the caller already holds one)
+    """
+    global _indexes
+    indexes = _indexes
+    if indexes is None:
+        with _lock:
+            if _indexes is None:
+                if conn is not None:
+                    _indexes = load_period_indexes(conn)
+                else:
+                    with get_read_connection() as conn:
+                        _indexes = load_period_indexes(conn)
+            indexes = _indexes
+    return indexes[schedule]
+
+
+def reset_period_indexes():
+    """Drop the loaded indexes so the next lookup rereads date_dimension"""
+    global _indexes
+    with _lock:
+        _indexes = None
@@ -0,0 +1,267 @@
+# app/profiling.py
+"""
+On-demand sampling profiler for single API requests.
+
+Profiling is enabled only when PAYMENTS_ADMIN_TOKEN is set. Otherwise
+app.main installs neither the middleware nor the /admin routes, so normal
+requests pay nothing. To profile a request, send the admin token in
+X-Admin-Token and either an X-Profile: 1 header or a profile=1 query
+parameter. Requests with a missing or wrong token are served normally,
+without a profile.
+
+While the request runs, a background thread samples the call stacks every
+PAYMENTS_PROFILE_INTERVAL_MS. It samples the event-loop thread and any
+executor worker that is running one of the request's jobs; db_executor
+registers those workers through current_profile(). Async work of other
+requests handled at the same moment can show up in the event-loop stacks.
+
+The response carries X-Profile-Id. The profile is kept in memory (the last
+PROFILE_HISTORY) and is served in collapsed-stack format, ready for
+flamegraph.pl or speedscope, at GET /admin/profiles/{profile_id}. When
+PAYMENTS_PROFILE_DIR is set it is also written there as
+<profile_id>.collapsed.
+"""
+
+import contextvars
+import hmac
+import logging
+import os
+import sys
+import sysconfig
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# Settings (environment variables)
+ADMIN_TOKEN = os.environ.get("PAYMENTS_ADMIN_TOKEN") or None
+PROFILE_INTERVAL_MS = float(os.environ.get("PAYMENTS_PROFILE_INTERVAL_MS", "2"))
+PROFILE_DIR = os.environ.get("PAYMENTS_PROFILE_DIR") or None
+PROFILE_HISTORY = 20
+
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Path prefixes trimmed from frame file names, most specific first
+_TRIMMED_PREFIXES = (
+    str(Path(__file__).resolve().parent.parent) + os.sep,
+    sysconfig.get_paths()["purelib"] + os.sep,
+    sysconfig.get_paths()["stdlib"] + os.sep,
+)
+
+
+def token_matches(token, expected=None):
+    expected = ADMIN_TOKEN if expected is None else expected
+    return bool(expected) and token is not None and hmac.compare_digest(token, expected)
+
+
+def _frame_name(frame):
+    """Short file name and qualified function name, without ';' (the stack separator)"""
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in _TRIMMED_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    return f"{filename}:{code.co_qualname}".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Samples the stacks of registered threads on a background thread"""
+
+    def __init__(self, interval_ms=None):
+        self.interval = (PROFILE_INTERVAL_MS if interval_ms is None else interval_ms) / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def add_thread(self, name=None):
+        """Sample the calling thread until remove_thread"""
+        thread = threading.current_thread()
+        with self._lock:
+            self._threads[thread.ident] = name or thread.name
+
+    def remove_thread(self):
+        with self._lock:
+            self._threads.pop(threading.get_ident(), None)
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        with self._lock:
+            threads = dict(self._threads)
+        frames = sys._current_frames()
+        for ident, name in threads.items():
+            frame = frames.get(ident)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                stack.append(name)
+                self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self):
+        """One "thread;outer;...;inner count" line per distinct stack"""
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in sorted(self.stacks.items())
+        )
+
+
+_active_profile = contextvars.ContextVar("request_profile", default=None)
+
+
+def current_profile():
+    """Profiler of the request being served, or None when it is not profiled"""
+    return _active_profile.get()
+
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def store_profile(profile_id, profiler, method, path):
+    """Keep the profile in memory (and in PROFILE_DIR when set)"""
+    entry = {
+        "profile_id": profile_id,
+        "method": method,
+        "path": path,
+        "duration_ms": round(profiler.duration * 1000, 3),
+        "samples": profiler.samples,
+        "collapsed": profiler.collapsed(),
+    }
+    with _profiles_lock:
+        _profiles[profile_id] = entry
+        while len(_profiles) > PROFILE_HISTORY:
+            _profiles.popitem(last=False)
+    if PROFILE_DIR:
+        directory = Path(PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{profile_id}.collapsed").write_text(entry["collapsed"])
+    logger.info(
+        f"Profiled {method} {path} as {profile_id}: "
+        f"{entry['duration_ms']:.1f} ms, {profiler.samples} samples"
+    )
+    return entry
+
+
+def get_profile(profile_id):
+    with _profiles_lock:
+        return _profiles.get(profile_id)
+
+
+def list_profiles():
+    with _profiles_lock:
+        return [
+            {key: value for key, value in entry.items() if key != "collapsed"}
+            for entry in reversed(_profiles.values())
+        ]
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles requests flagged with X-Profile: 1 or
+    ?profile=1 and authorized with X-Admin-Token
+    """
+
+    def __init__(self, app, token=None, interval_ms=None):
+        self.app = app
+        self.token = token or ADMIN_TOKEN
+        self.interval_ms = interval_ms
+
+    def _requested(self, scope):
+        """Admin token if the request asks to be profiled (None if it does not)"""
+        flagged = False
+        token = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                flagged = value == b"1"
+            elif name == b"x-admin-token":
+                token = value.decode("latin-1")
+        query = scope.get("query_string", b"")
+        if not flagged and b"profile=" in query:
+            flagged = parse_qs(query.decode("latin-1")).get("profile") == ["1"]
+        return flagged, token
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        flagged, token = self._requested(scope)
+        if not flagged:
+            await self.app(scope, receive, send)
+            return
+        if not token_matches(token, self.token):
+            logger.warning(f"Ignoring profile request without a valid admin token: {scope['path']}")
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:16]
+        profiler = SamplingProfiler(self.interval_ms)
+        profiler.add_thread("event-loop")
+        context_token = _active_profile.set(profiler)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = profile_id
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            _active_profile.reset(context_token)
+            store_profile(profile_id, profiler, scope["method"], scope["path"])
+
+
+# ----- ADMIN ROUTES -----
+router = APIRouter(prefix="/admin", include_in_schema=False)
+
+
+def _require_admin(token):
+    # Unknown rather than forbidden, so the routes do not advertise themselves
+    if not token_matches(token):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/profiles")
+async def get_profiles(x_admin_token: str = Header(None)):
+    """Recent request profiles, newest first"""
+    _require_admin(x_admin_token)
+    return {"items": list_profiles()}
+
+
+@router.get("/profiles/{profile_id}")
+async def get_collapsed_profile(profile_id: str, x_admin_token: str = Header(None)):
+    """Collapsed stacks of one profile (flamegraph.pl / speedscope input)"""
+    _require_admin(x_admin_token)
+    entry = get_profile(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return PlainTextResponse(entry["collapsed"])
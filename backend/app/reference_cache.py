@@ -0,0 +1,120 @@
+# app/reference_cache.py
+"""
+In-process cache for reference data that rarely changes (providers, date
+dimensions, active contracts).
+
+Each named ReferenceCache keeps encoded JSON response bodies keyed by the
+route's arguments. An entry is served only while all three conditions hold:
+- it is younger than REFERENCE_CACHE_TTL seconds;
+- the cache has not been invalidated since it was stored (write routes call
+  invalidate() after they commit);
+- PRAGMA data_version (db.data_version) has not changed since it was
+  stored. That value changes on any commit by another connection,
+  including the writers of other uvicorn worker processes.
+
+The data_version check is database-wide, so a write to any table also
+refreshes reference entries. The explicit invalidation covers the tables
+each cache reads from. Set PAYMENTS_REFERENCE_CACHE_TTL=0 to disable
+caching.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi.responses import Response
+
+from .db import data_version
+
+# Settings (environment variables)
+REFERENCE_CACHE_TTL = float(os.environ.get("PAYMENTS_REFERENCE_CACHE_TTL", "300"))
+# Entries kept per cache (distinct filter/page combinations), least recently used evicted
+REFERENCE_CACHE_SIZE = 256
+
+PROVIDERS_CACHE = "providers"
+DATE_DIMENSIONS_CACHE = "date_dimensions"
+ACTIVE_CONTRACTS_CACHE = "active_contracts"
+
+
+class ReferenceCache:
+    """Values keyed by route arguments, checked against TTL, invalidation and data_version"""
+
+    def __init__(self, name, ttl=None, max_entries=REFERENCE_CACHE_SIZE):
+        self.name = name
+        self.ttl = REFERENCE_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, key, load):
+        """Cached value for key, calling load() on a miss"""
+        if self.ttl <= 0:
+            return load()
+        version = data_version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry[0] == version
+                and entry[1] == self._generation
+                and entry[2] > now
+            ):
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry[3]
+            self._counters["misses"] += 1
+            generation = self._generation
+
+        # Load outside the lock; version and generation were read first, so a
+        # write that lands meanwhile leaves a stale entry that is never served
+        value = load()
+        with self._lock:
+            self._entries[key] = (version, generation, now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._counters["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {"ttl": self.ttl, "entries": len(self._entries), **self._counters}
+
+
+_caches = {
+    name: ReferenceCache(name)
+    for name in (PROVIDERS_CACHE, DATE_DIMENSIONS_CACHE, ACTIVE_CONTRACTS_CACHE)
+}
+
+
+def get_cache(name):
+    return _caches[name]
+
+
+def invalidate(*names):
+    """Drop the entries of the named caches (call after committing a write)"""
+    for name in names:
+        _caches[name].invalidate()
+
+
+def reference_cache_stats():
+    """Hit, miss, invalidation and entry counts per cache"""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def cached_response(name, key, build):
+    """
+    JSON response for key from the named cache; build() returns the
+    response (e.g. list_response) and is called only on a miss
+    """
+    body = get_cache(name).get(key, lambda: build().body)
+    return Response(body, media_type="application/json")
@@ -0,0 +1,164 @@
+# app/serialization.py
+"""
+Fast response path for rows read from our own database.
+
+List endpoints used to validate every row into a Pydantic model and then
+let FastAPI validate the response model a second time before encoding it
+with the standard json module. The trusted path projects rows onto the
+model's fields (dropping extra view columns) with a cheap type check and
+conversion per declared field, and encodes the result with orjson. Rows
+that fail the check (SQLite does not enforce column types, e.g. '-' in
+a REAL column) fall back to model validation, so bad data is coerced or
+rejected exactly as before. Returning a Response directly tells FastAPI
+to skip response_model validation; the response_model is still used for
+the OpenAPI schema.
+"""
+
+import functools
+import json
+import types
+import typing
+from datetime import date, datetime
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson when it is installed"""
+
+    def render(self, content):
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+def _base_type(annotation):
+    """Optional[X] -> (X, True); anything else -> (annotation, False)"""
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0], True
+    return annotation, False
+
+
+# Converters check a value against the field type and return its JSON form.
+# They raise ValueError for anything they cannot convert exactly as
+# model_dump(mode="json") would, and the row is then validated by the model.
+def _to_int(value):
+    if type(value) is int:
+        return value
+    raise ValueError(value)
+
+
+def _to_str(value):
+    if type(value) is str:
+        return value
+    raise ValueError(value)
+
+
+def _to_float(value):
+    # REAL columns can hold integers; the models serialize them as floats
+    if type(value) is float:
+        return value
+    if type(value) is int:
+        return float(value)
+    raise ValueError(value)
+
+
+def _to_iso_datetime(value):
+    # SQLite timestamps use a space separator; datetime fields render as ISO 8601
+    if type(value) is not str or len(value) != 19:
+        raise ValueError(value)
+    if value[10] == " ":
+        value = f"{value[:10]}T{value[11:]}"
+    datetime.fromisoformat(value)
+    return value
+
+
+def _to_iso_date(value):
+    if type(value) is not str or len(value) != 10:
+        raise ValueError(value)
+    date.fromisoformat(value)
+    return value
+
+
+_CONVERTERS = {
+    int: _to_int,
+    str: _to_str,
+    float: _to_float,
+    datetime: _to_iso_datetime,
+    date: _to_iso_date,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _row_plan(model, columns):
+    """
+    (field, column index, default, converter, nullable) for each model field,
+    or None when a field's type has no converter and rows must be validated
+    """
+    index = {column: i for i, column in enumerate(columns)}
+    plan = []
+    for name, field in model.model_fields.items():
+        annotation, nullable = _base_type(field.annotation)
+        converter = _CONVERTERS.get(annotation)
+        if converter is None:
+            return None
+        default = None if field.is_required() else field.get_default(call_default_factory=True)
+        plan.append((name, index.get(name), default, converter, nullable or not field.is_required()))
+    return tuple(plan)
+
+
+def _validated_row(model, row):
+    return model.model_validate(row).model_dump(mode="json")
+
+
+def _shape_row(model, plan, row):
+    values = tuple(row.values())
+    item = {}
+    try:
+        for name, i, default, converter, nullable in plan:
+            if i is None:
+                if default is None and not nullable:
+                    raise ValueError(name)
+                value = default
+            else:
+                value = values[i]
+                if value is not None:
+                    value = converter(value)
+                elif not nullable:
+                    raise ValueError(name)
+            item[name] = value
+    except ValueError:
+        # Not in the exact shape the model declares: let the model coerce or reject it
+        return _validated_row(model, row)
+    return item
+
+
+def trusted_rows(model, rows):
+    """
+    Shape database rows (dicts) like model.model_dump(mode="json"). Each
+    value is checked against its field's type; a row that does not match
+    is validated by the model instead, which coerces it or raises.
+    """
+    if not rows:
+        return rows
+    plan = _row_plan(model, tuple(rows[0]))
+    if plan is None:
+        return [_validated_row(model, row) for row in rows]
+    return [_shape_row(model, plan, row) for row in rows]
+
+
+def list_response(model, rows, **fields):
+    """
+    Response for a list endpoint ({"items": [...], "total": ..., ...})
+    built from trusted rows, bypassing per-row and response validation.
+    """
+    return FastJSONResponse({"items": trusted_rows(model, rows), **fields})
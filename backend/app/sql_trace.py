@@ -0,0 +1,275 @@
+# app/sql_trace.py
+"""
+Per-request SQL tracing and slow-query log.
+
+Pooled connections are TracedConnection instances. Their cursors time each
+statement (the execute call plus the fetches that step through its rows)
+and count the rows it returns. While a request is being served, every
+statement is recorded on that request's RequestTrace. The trace lives in a
+context variable, which db_executor carries into the worker threads, so
+statements run on either lane land on the right request. Outside a request
+(startup, manage_db.py) nothing is recorded.
+
+SQLTraceMiddleware starts a trace for each HTTP request and tags it with
+the request ID (the incoming X-Request-ID header, or a new one). It adds
+X-Request-ID, X-DB-Query-Count and X-DB-Time-Ms response headers and logs
+statements slower than SLOW_QUERY_MS once the response is finished. The
+headers are sent before the body, so for streamed exports they only count
+the queries run before streaming starts; the slow-query log covers the
+whole request.
+"""
+
+import contextvars
+import logging
+import os
+import re
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# Settings (environment variables)
+SQL_TRACE = os.environ.get("PAYMENTS_SQL_TRACE", "1") != "0"
+SLOW_QUERY_MS = float(os.environ.get("PAYMENTS_SLOW_QUERY_MS", "100"))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+DB_TIME_HEADER = "X-DB-Time-Ms"
+
+# Accept client-supplied request IDs only if they are short and printable
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+# Longest SQL text written to the slow-query log
+_LOGGED_SQL_LENGTH = 2000
+
+
+class StatementRecord:
+    """One executed statement: text, parameters, time spent and rows returned"""
+
+    __slots__ = ("sql", "params", "seconds", "rows")
+
+    def __init__(self, sql, params, seconds):
+        self.sql = sql
+        self.params = params
+        self.seconds = seconds
+        self.rows = 0
+
+
+class RequestTrace:
+    """Statements executed while serving one request"""
+
+    def __init__(self, request_id):
+        self.request_id = request_id
+        self.statements = []
+
+    def record(self, sql, params, seconds):
+        record = StatementRecord(sql, params, seconds)
+        self.statements.append(record)
+        return record
+
+    @property
+    def query_count(self):
+        return len(self.statements)
+
+    @property
+    def db_seconds(self):
+        return sum(record.seconds for record in self.statements)
+
+    def slow_statements(self, threshold_ms=None):
+        threshold = (SLOW_QUERY_MS if threshold_ms is None else threshold_ms) / 1000
+        return [record for record in self.statements if record.seconds >= threshold]
+
+
+_current_trace = contextvars.ContextVar("sql_trace", default=None)
+
+
+def current_trace():
+    """The RequestTrace of the request being served, or None"""
+    return _current_trace.get()
+
+
+def start_trace(request_id=None):
+    """Record statements on a new RequestTrace; returns (trace, token for end_trace)"""
+    trace = RequestTrace(request_id or uuid.uuid4().hex)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+@contextmanager
+def untraced():
+    """Run pool housekeeping (PRAGMAs, health checks) without recording it"""
+    token = _current_trace.set(None)
+    try:
+        yield
+    finally:
+        _current_trace.reset(token)
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that records its statements on the current RequestTrace"""
+
+    _record = None
+
+    def execute(self, sql, parameters=()):
+        trace = _current_trace.get()
+        if trace is None:
+            self._record = None
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record = trace.record(sql, parameters, time.perf_counter() - start)
+            if self.description is None:
+                # No result set; report the rows the statement changed
+                self._record.rows = max(self.rowcount, 0)
+
+    def executemany(self, sql, seq_of_parameters):
+        trace = _current_trace.get()
+        self._record = None
+        if trace is None:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record = trace.record(sql, None, time.perf_counter() - start)
+            record.rows = max(self.rowcount, 0)
+
+    # Rows are produced while fetching, so fetch time counts towards the statement
+
+    def fetchone(self):
+        record = self._record
+        if record is None:
+            return super().fetchone()
+        start = time.perf_counter()
+        row = super().fetchone()
+        record.seconds += time.perf_counter() - start
+        if row is not None:
+            record.rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        record = self._record
+        if record is None:
+            return super().fetchmany(self.arraysize if size is None else size)
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        record.seconds += time.perf_counter() - start
+        record.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        record = self._record
+        if record is None:
+            return super().fetchall()
+        start = time.perf_counter()
+        rows = super().fetchall()
+        record.seconds += time.perf_counter() - start
+        record.rows += len(rows)
+        return rows
+
+    def __next__(self):
+        record = self._record
+        if record is None:
+            return super().__next__()
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        finally:
+            record.seconds += time.perf_counter() - start
+        record.rows += 1
+        return row
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are TracedCursors"""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute bypasses Cursor.execute, so route it through a cursor
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _one_line(sql):
+    sql = " ".join(sql.split())
+    if len(sql) > _LOGGED_SQL_LENGTH:
+        sql = sql[:_LOGGED_SQL_LENGTH] + "..."
+    return sql
+
+
+def log_trace(trace, method, path, threshold_ms=None):
+    """Log the slow statements of a finished request (and a summary at DEBUG)"""
+    for record in trace.slow_statements(threshold_ms):
+        logger.warning(
+            f"Slow query ({record.seconds * 1000:.1f} ms, {record.rows} rows) "
+            f"request={trace.request_id} {method} {path}: "
+            f"{_one_line(record.sql)} params={record.params!r}"
+        )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            f"request={trace.request_id} {method} {path}: "
+            f"{trace.query_count} queries, {trace.db_seconds * 1000:.1f} ms"
+        )
+
+
+class SQLTraceMiddleware:
+    """
+    ASGI middleware that traces the SQL of each HTTP request and reports it
+    in response headers and the slow-query log
+    """
+
+    def __init__(self, app, enabled=None, slow_query_ms=None):
+        self.app = app
+        self.enabled = SQL_TRACE if enabled is None else enabled
+        self.slow_query_ms = SLOW_QUERY_MS if slow_query_ms is None else slow_query_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                value = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(value):
+                    request_id = value
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        if not self.enabled:
+            async def send_request_id(message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+                await send(message)
+
+            await self.app(scope, receive, send_request_id)
+            return
+
+        trace, token = start_trace(request_id)
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers[REQUEST_ID_HEADER] = request_id
+                headers[QUERY_COUNT_HEADER] = str(trace.query_count)
+                headers[DB_TIME_HEADER] = f"{trace.db_seconds * 1000:.2f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            end_trace(token)
+            log_trace(trace, scope["method"], scope["path"], self.slow_query_ms)
@@ -0,0 +1,207 @@
+# CPU cost against bytes saved for response compression
+# Usage (from the backend directory):
+#   python benchmarks/compression_benchmark.py                    # 10k preset
+#   python benchmarks/compression_benchmark.py --db payments.db
+#   python benchmarks/compression_benchmark.py --levels gzip:1,5,9 --repeat 20
+#
+# Uncompressed bodies of representative list pages and exports are fetched
+# from the in-process app. Each body is then compressed with every encoder
+# and level in the grid: gzip always, brotli and zstd when their packages
+# are installed. For each pair the benchmark reports the compressed size,
+# the ratio, the median compression time per response, the throughput, and
+# the CPU time spent per kilobyte saved. It also times a streamed
+# compression of the exports in the middleware's chunking, to show what
+# streaming costs in ratio. The results are written as JSON like the
+# endpoint benchmark's.
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from endpoint_benchmark import _git_commit
+from generate_data import PRESETS, generate_database
+
+from app.compression import BrotliEncoder, GzipEncoder, ZstdEncoder, brotli, zstandard
+
+# Representative responses: large list pages and whole exports
+PAYLOADS = {
+    "split-payments": "/api/split-payments?limit=500",
+    "expanded-payment-periods": "/api/expanded-payment-periods?limit=1000",
+    "payments": "/api/payments?limit=100",
+    "payment-status": "/api/payment-status?limit=500",
+    "export-split-payments.ndjson": "/api/export/split-payments?format=ndjson",
+    "export-expanded-periods.csv": "/api/export/expanded-payment-periods?format=csv",
+}
+
+DEFAULT_LEVELS = {
+    "gzip": (1, 3, 5, 6, 9),
+    "br": (1, 4, 6, 11),
+    "zstd": (1, 3, 9, 19),
+}
+
+ENCODERS = {"gzip": GzipEncoder, "br": BrotliEncoder, "zstd": ZstdEncoder}
+
+
+def available_levels(levels=None):
+    """{encoding: levels} for the encoders installed here"""
+    levels = dict(DEFAULT_LEVELS, **(levels or {}))
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return {name: values for name, values in levels.items() if installed[name]}
+
+
+def fetch_bodies(db_path, payloads):
+    """Uncompressed response bodies from the in-process app, by payload name"""
+    from app import db
+    from app.main import app
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            bodies = {}
+            for name, url in payloads.items():
+                response = await client.get(url, headers={"Accept-Encoding": "identity"})
+                response.raise_for_status()
+                bodies[name] = response.content
+            return bodies
+
+    saved_path = db.DB_PATH
+    db.close_pool()
+    db.DB_PATH = str(db_path)
+    try:
+        return asyncio.run(run())
+    finally:
+        db.close_pool()
+        db.DB_PATH = saved_path
+
+
+def _chunks(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)] or [b""]
+
+
+def measure(encoder, body, repeat, chunk_size=None):
+    """Compressed size and median seconds to compress body (streamed and synced per chunk if chunk_size)"""
+    times = []
+    size = 0
+    chunks = _chunks(body, chunk_size) if chunk_size else None
+    for _ in range(repeat):
+        start = time.process_time()
+        if chunks is None:
+            size = len(encoder.compress(body))
+        else:
+            compressor = encoder.compressor()
+            size = sum(len(compressor.compress(chunk)) + len(compressor.sync()) for chunk in chunks[:-1])
+            size += len(compressor.compress(chunks[-1])) + len(compressor.flush())
+        times.append(time.process_time() - start)
+    return size, statistics.median(times)
+
+
+def summarize(original, compressed, seconds):
+    saved = original - compressed
+    return {
+        "bytes": compressed,
+        "ratio": round(original / compressed, 2) if compressed else None,
+        "saved_pct": round(saved / original * 100, 1) if original else 0.0,
+        "ms": round(seconds * 1000, 3),
+        "mb_per_s": round(original / seconds / 1e6, 1) if seconds else None,
+        "us_per_kb_saved": round(seconds * 1e6 / (saved / 1024), 2) if saved > 0 else None,
+    }
+
+
+def run_grid(bodies, levels, repeat, chunk_size):
+    """Results per payload: original size and stats per "encoding:level" (and streamed)"""
+    results = {}
+    for name, body in bodies.items():
+        entry = {"original_bytes": len(body), "encodings": {}}
+        print(f"{name} ({len(body):,} bytes)")
+        for encoding, values in levels.items():
+            for level in values:
+                encoder = ENCODERS[encoding](level)
+                stats = summarize(len(body), *measure(encoder, body, repeat))
+                key = f"{encoding}:{level}"
+                if name.startswith("export-"):
+                    streamed = summarize(len(body), *measure(encoder, body, repeat, chunk_size))
+                    stats["streamed"] = streamed
+                entry["encodings"][key] = stats
+                print(
+                    f"  {key:<8} {stats['bytes']:>11,} B  x{stats['ratio']:<6} "
+                    f"{stats['ms']:>9.3f} ms  {stats['mb_per_s']:>7} MB/s  "
+                    f"{stats['us_per_kb_saved']} us/KB saved"
+                    + (f"  (streamed x{stats['streamed']['ratio']})" if "streamed" in stats else "")
+                )
+        results[name] = entry
+    return results
+
+
+def parse_levels(text):
+    """"gzip:1,5,9;br:4" -> {"gzip": (1, 5, 9), "br": (4,)}"""
+    levels = {}
+    for part in text.split(";"):
+        encoding, _, values = part.partition(":")
+        if encoding not in ENCODERS:
+            raise ValueError(f"unknown encoding {encoding}")
+        levels[encoding] = tuple(int(value) for value in values.split(","))
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compression CPU cost against bytes saved")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--preset", choices=sorted(PRESETS), default="10k", help="Generate a synthetic database")
+    source.add_argument("--db", help="Benchmark an existing database instead")
+    parser.add_argument("--levels", help='Encoders and levels, e.g. "gzip:1,5,9;zstd:3" (default: a grid per encoder)')
+    parser.add_argument("--repeat", type=int, default=10, help="Compressions per body and level (median is reported)")
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024, help="Chunk size for the streamed export runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results file (default benchmarks/results/compression-<commit>.json)")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    try:
+        levels = available_levels(parse_levels(args.levels) if args.levels else None)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            db_path, database = Path(args.db), {"path": args.db}
+        else:
+            db_path = Path(tmp) / "synthetic.db"
+            counts = generate_database(db_path, PRESETS[args.preset], args.seed)
+            database = {"preset": args.preset, "seed": args.seed, "payments": counts["payments"]}
+        bodies = fetch_bodies(db_path, PAYLOADS)
+
+    results = run_grid(bodies, levels, args.repeat, args.chunk_size)
+
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "database": database,
+            "repeat": args.repeat,
+            "chunk_size": args.chunk_size,
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+    output = Path(args.output or BACKEND_DIR / "benchmarks" / "results" / f"compression-{commit or 'local'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=1) + "\n")
+    print(f"Wrote {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,395 @@
+# Latency and throughput of every GET route
+# Usage (from the backend directory):
+#   python benchmarks/endpoint_benchmark.py                         # in-process, 10k preset
+#   python benchmarks/endpoint_benchmark.py --mode uvicorn --preset 100k
+#   python benchmarks/endpoint_benchmark.py --db payments.db --routes payments,payment-status
+#   python benchmarks/endpoint_benchmark.py --compare old.json      # compare with an earlier run
+#
+# Each route is driven with a mix of requests: first pages, deep offsets,
+# include_total=false, cursors and the route's filters, with values sampled
+# from the database. The in-process mode calls the ASGI app directly, and
+# the uvicorn mode starts a local server and goes over HTTP. Each route gets
+# --requests requests from --concurrency concurrent clients, after a few
+# warm-up requests. The results are p50/p95/p99/mean latency in
+# milliseconds and requests per second for each route. They are written as
+# JSON, together with the commit, database and settings, so two runs can be
+# compared with --compare.
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from generate_data import PRESETS, generate_database
+
+# Request mix per route; {name} placeholders are filled from sample_values
+ROUTES = {
+    "payments": (
+        "/api/payments?limit=50",
+        "/api/payments?limit=50&offset={offset}",
+        "/api/payments?limit=50&include_total=false",
+        "/api/payments?limit=50&cursor={payments_cursor}",
+        "/api/payments?client_id={client_id}",
+        "/api/payments?is_split=true&limit=50",
+    ),
+    "payments-table": (
+        "/api/payments-table?limit=50",
+        "/api/payments-table?limit=50&offset={offset}",
+        "/api/payments-table?client_id={client_id}",
+        "/api/payments-table?min_date=2024-01-01&max_date=2024-12-31&limit=50",
+    ),
+    "split-payments": (
+        "/api/split-payments?limit=50",
+        "/api/split-payments?limit=50&cursor={split_cursor}",
+        "/api/split-payments?client_id={client_id}",
+    ),
+    "payment-distributions": ("/api/payments/{split_payment_id}/distributions",),
+    "expanded-payment-periods": (
+        "/api/expanded-payment-periods?limit=100",
+        "/api/expanded-payment-periods?client_id={client_id}",
+    ),
+    "payment-coverage": (
+        "/api/payment-coverage?limit=100",
+        "/api/payment-coverage?client_id={client_id}",
+    ),
+    "current-period": ("/api/current-period",),
+    "payment-status": (
+        "/api/payment-status?limit=100",
+        "/api/payment-status?status=Unpaid&limit=100",
+        "/api/payment-status?client_id={client_id}",
+    ),
+    "missing-periods": (
+        "/api/missing-periods?limit=100",
+        "/api/missing-periods?limit=100&offset={offset}",
+        "/api/missing-periods?client_id={client_id}",
+    ),
+    "expected-periods": (
+        "/api/expected-periods?limit=100",
+        "/api/expected-periods?client_id={client_id}",
+    ),
+    "clients": (
+        "/api/clients?limit=100",
+        "/api/clients?client_id={client_id}",
+    ),
+    "clients-first-payments": (
+        "/api/clients/first-payments?limit=100",
+        "/api/clients/first-payments?client_id={client_id}",
+    ),
+    "clients-last-payments": (
+        "/api/clients/last-payments?limit=100",
+        "/api/clients/last-payments?min_days=60&limit=100",
+        "/api/clients/last-payments?client_id={client_id}",
+    ),
+    "client-folders": ("/api/client-folders?limit=100",),
+    "client-providers": (
+        "/api/client-providers?limit=100",
+        "/api/client-providers?client_id={client_id}",
+    ),
+    "contacts": (
+        "/api/contacts?limit=100",
+        "/api/contacts?client_id={client_id}",
+    ),
+    "contracts": (
+        "/api/contracts?limit=100",
+        "/api/contracts?client_id={client_id}",
+        "/api/contracts?payment_schedule=quarterly&limit=100",
+    ),
+    "active-contracts": (
+        "/api/active-contracts?limit=100",
+        "/api/active-contracts?client_id={client_id}",
+    ),
+    "documents": (
+        "/api/documents?limit=100",
+        "/api/documents?client_id={client_id}",
+    ),
+    "document-clients": ("/api/document-clients?client_id={client_id}",),
+    "document-payments": ("/api/document-payments?limit=100",),
+    "providers": ("/api/providers",),
+    "date-dimensions": (
+        "/api/date-dimensions?year=2024",
+        "/api/date-dimensions/current-month",
+        "/api/date-dimensions/previous-quarter",
+    ),
+    "export-payments": ("/api/export/payments?client_id={client_id}",),
+    "export-missing-periods": ("/api/export/missing-periods?client_id={client_id}&format=csv",),
+}
+
+CURSOR_PAGES = 20
+OFFSET_PAGES = 100
+
+
+def sample_values(db_path, seed):
+    """Pools of filter values drawn from the database"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    try:
+        client_ids = [row[0] for row in conn.execute(
+            "SELECT DISTINCT client_id FROM payments WHERE valid_to IS NULL"
+        )]
+        split_ids = [row[0] for row in conn.execute(
+            "SELECT DISTINCT payment_id FROM v_split_payment_distribution LIMIT 1000"
+        )]
+    finally:
+        conn.close()
+    return {
+        "client_id": rng.sample(client_ids, min(len(client_ids), 500)),
+        "split_payment_id": split_ids or [1],
+        "offset": [page * 50 for page in range(1, OFFSET_PAGES + 1)],
+    }
+
+
+async def collect_cursors(client, values):
+    """Walk the cursor-paginated routes to get next_cursor values to replay"""
+    for name, path in (("payments_cursor", "/api/payments"), ("split_cursor", "/api/split-payments")):
+        cursors = []
+        response = await client.get(f"{path}?limit=50")
+        cursor = response.json().get("next_cursor")
+        while cursor and len(cursors) < CURSOR_PAGES:
+            cursors.append(cursor)
+            response = await client.get(f"{path}?limit=50&cursor={cursor}")
+            cursor = response.json().get("next_cursor")
+        values[name] = cursors
+
+
+def request_urls(templates, values, rng, count):
+    urls = []
+    while len(urls) < count:
+        template = rng.choice(templates)
+        try:
+            urls.append(template.format(**{name: rng.choice(pool) for name, pool in values.items() if pool}))
+        except KeyError:
+            # No sample for this placeholder (e.g. nothing to page through); skip the variant
+            templates = [t for t in templates if t != template]
+            if not templates:
+                break
+    return urls
+
+
+def summarize(latencies, errors, elapsed):
+    """p50/p95/p99/mean in milliseconds and requests per second"""
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    ms = sorted(latency * 1000 for latency in latencies)
+    if len(ms) > 1:
+        cuts = statistics.quantiles(ms, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = ms[0]
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "max_ms": round(ms[-1], 3),
+        "throughput_rps": round(len(ms) / elapsed, 1) if elapsed else None,
+    }
+
+
+async def run_route(client, urls, concurrency):
+    latencies = []
+    errors = 0
+    pending = iter(urls)
+
+    async def worker():
+        nonlocal errors
+        for url in pending:
+            start = time.perf_counter()
+            response = await client.get(url)
+            await response.aread()
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_routes(client, routes, values, args):
+    await collect_cursors(client, values)
+    rng = random.Random(args.seed)
+    results = {}
+    for name in routes:
+        templates = ROUTES[name]
+        for url in request_urls(templates, values, rng, args.warmup):
+            await client.get(url)
+        urls = request_urls(templates, values, rng, args.requests)
+        results[name] = await run_route(client, urls, args.concurrency)
+        stats = results[name]
+        if stats["requests"]:
+            print(
+                f"  {name:<26} p50 {stats['p50_ms']:>9.2f}  p95 {stats['p95_ms']:>9.2f}  "
+                f"p99 {stats['p99_ms']:>9.2f} ms  {stats['throughput_rps']:>8.1f} req/s"
+                + (f"  {stats['errors']} errors" if stats["errors"] else "")
+            )
+    return results
+
+
+def run_in_process(db_path, routes, values, args):
+    """Call the ASGI app directly (no network or server overhead)"""
+    from app import db
+    from app.main import app
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            return await run_routes(client, routes, values, args)
+
+    saved_path = db.DB_PATH
+    db.close_pool()
+    db.DB_PATH = str(db_path)
+    try:
+        return asyncio.run(run())
+    finally:
+        db.close_pool()
+        db.DB_PATH = saved_path
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_uvicorn(db_path, routes, values, args):
+    """Start a local uvicorn server on the database and call it over HTTP"""
+    port = _free_port()
+    env = dict(os.environ, PAYMENTS_DB_PATH=str(Path(db_path).resolve()))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+    async def run():
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=None) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not start")
+                await asyncio.sleep(0.1)
+            return await run_routes(client, routes, values, args)
+
+    try:
+        return asyncio.run(run())
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(old, new):
+    """Per mode and route: (p50 change %, p95 change %, throughput change %)"""
+    changes = {}
+    for mode, routes in new["results"].items():
+        for name, stats in routes.items():
+            before = old.get("results", {}).get(mode, {}).get(name)
+            if not before or not before.get("requests") or not stats.get("requests"):
+                continue
+            changes[(mode, name)] = tuple(
+                round((stats[key] - before[key]) / before[key] * 100, 1) if before[key] else None
+                for key in ("p50_ms", "p95_ms", "throughput_rps")
+            )
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint latency benchmark")
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn", "both"), default="inprocess")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--preset", choices=sorted(PRESETS), default="10k", help="Generate a synthetic database")
+    source.add_argument("--db", help="Benchmark an existing database instead")
+    parser.add_argument("--routes", help=f"Comma-separated subset of: {', '.join(ROUTES)}")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5, help="Unrecorded requests per route")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results file (default benchmarks/results/endpoints-<commit>-<mode>.json)")
+    parser.add_argument("--compare", help="Earlier JSON results to compare with")
+    args = parser.parse_args()
+    # The app configures INFO logging, which would log every request the client makes
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    routes = args.routes.split(",") if args.routes else list(ROUTES)
+    unknown = [name for name in routes if name not in ROUTES]
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(unknown)}")
+    modes = ("inprocess", "uvicorn") if args.mode == "both" else (args.mode,)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            db_path, database = Path(args.db), {"path": args.db}
+        else:
+            db_path = Path(tmp) / "synthetic.db"
+            counts = generate_database(db_path, PRESETS[args.preset], args.seed)
+            database = {"preset": args.preset, "seed": args.seed, "payments": counts["payments"]}
+
+        results = {}
+        for mode in modes:
+            print(f"{mode}:")
+            values = sample_values(db_path, args.seed)
+            runner = run_in_process if mode == "inprocess" else run_uvicorn
+            results[mode] = runner(db_path, routes, values, args)
+
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "database": database,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "results": results,
+    }
+    output = Path(args.output or BACKEND_DIR / "benchmarks" / "results" / f"endpoints-{commit or 'local'}-{args.mode}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=1) + "\n")
+    print(f"Wrote {output}")
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text())
+        print(f"Change from {old['meta'].get('commit')} (negative latency is faster):")
+        for (mode, name), changes in sorted(compare_results(old, report).items()):
+            p50, p95, rps = ("    n/a" if c is None else f"{c:+6.1f}%" for c in changes)
+            print(f"  {mode:<10} {name:<26} p50 {p50}  p95 {p95}  req/s {rps}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
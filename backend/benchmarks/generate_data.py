@@ -0,0 +1,340 @@
+# Build a synthetic payments database at production-size volumes
+# Usage (from the backend directory):
+#   python benchmarks/generate_data.py --preset 100k --output /tmp/payments_100k.db
+#   python benchmarks/generate_data.py --payments 250000 --seed 7 --output /tmp/big.db
+#
+# The schema (tables, views, triggers, indexes and date_dimension) is copied
+# from payments.db and every other table is emptied. The generator then adds
+# clients until the requested number of payments is reached. Each client gets:
+#   * a provider, a client folder and one to three contacts (some soft-deleted);
+#   * an active monthly or quarterly contract (percentage or flat fee), and
+#     for some clients an older superseded contract with its own payments;
+#   * one payment per period from its start date to the current billing
+#     period, with some periods skipped, some split payments covering several
+#     periods, edited payments (the old row kept with valid_to set) and a
+#     few soft-deleted ones;
+#   * documents for some payments, linked through document_clients and
+#     document_payments.
+# Some clients and providers are soft-deleted as well. Rows are bulk loaded
+# with the triggers dropped, then payment_periods and the period ledger are
+# rebuilt and the triggers restored. The same seed and date always produce
+# the same database. ANALYZE is not run, so query plans match payments.db.
+import argparse
+import json
+import random
+import shutil
+import sqlite3
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.date_utils import BillingPeriods, quarter_first_month
+from app.maintenance import rebuild_payment_periods, rebuild_period_ledger
+from app.migrations import apply_migrations
+
+# Payments per preset
+PRESETS = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+# Tables emptied before loading; date_dimension and period_ledger_horizon keep their rows
+DATA_TABLES = (
+    "document_payments", "document_clients", "documents", "payment_periods",
+    "missing_periods", "expected_periods", "payments", "contracts", "contacts",
+    "client_providers", "client_folders", "clients", "providers",
+)
+
+FIRST_PERIOD = (2016, 1)
+CLIENTS_PER_PROVIDER = 25
+QUARTERLY_SHARE = 0.4
+PERCENT_FEE_SHARE = 0.55
+SKIPPED_PERIOD_RATE = 0.03
+SPLIT_PAYMENT_RATE = 0.05
+EDITED_PAYMENT_RATE = 0.02
+DELETED_PAYMENT_RATE = 0.005
+DOCUMENT_RATE = 0.1
+CONTRACT_HISTORY_RATE = 0.2
+DELETED_CLIENT_RATE = 0.02
+DELETED_PROVIDER_RATE = 0.05
+
+METHODS = ("Auto - ACH", "Auto - Check", "Check", "Invoice - Check", "Wire", None)
+CONTACT_TYPES = ("Primary", "Authorized", "Provider")
+DOCUMENT_TYPES = ("Check", "Statement", "Invoice")
+NAME_WORDS = (
+    "Alder", "Bayview", "Cascade", "Summit", "Harbor", "Evergreen", "Granite",
+    "Pioneer", "Rainier", "Sound", "Cedar", "Orca", "Pacific", "Olympic",
+    "Columbia", "Northwest", "Puget", "Madrona", "Skyline", "Tidewater",
+)
+NAME_SUFFIXES = ("Architects", "Engineering", "Dental", "Logistics", "Partners", "Consulting", "Builders")
+PROVIDER_NAMES = ("Ascensus", "Empower", "Fidelity", "John Hancock", "Principal", "Voya", "Transamerica")
+
+
+def _month_key(year, month):
+    return year * 100 + month
+
+
+def _quarter_of(month):
+    return (month - 1) // 3 + 1
+
+
+def _periods(schedule, start, end):
+    """(year, month-or-quarter) from start to end inclusive, in the schedule's units"""
+    year, period = start
+    per_year = 12 if schedule == "monthly" else 4
+    while (year, period) <= end:
+        yield year, period
+        year, period = (year + 1, 1) if period == per_year else (year, period + 1)
+
+
+def _received_date(rng, schedule, year, period, today):
+    """A date in the month after the period ends, no later than today"""
+    month = period if schedule == "monthly" else period * 3
+    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return min(date(year, month, rng.randint(1, 28)), today).isoformat()
+
+
+def _period_start(schedule, year, period):
+    """First day of a period as YYYY-MM-DD"""
+    month = period if schedule == "monthly" else quarter_first_month(period)
+    return f"{year:04d}-{month:02d}-01"
+
+
+def _timestamp(rng, year):
+    return f"{year:04d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00"
+
+
+class _Loader:
+    """Collects generated rows per table and assigns ids"""
+
+    def __init__(self, rng, periods):
+        self.rng = rng
+        self.periods = periods
+        self.rows = {table: [] for table in DATA_TABLES}
+        self.next_id = {table: 1 for table in DATA_TABLES}
+        self.payment_count = 0
+
+    def add(self, table, row):
+        row_id = self.next_id[table]
+        self.next_id[table] += 1
+        self.rows[table].append((row_id, *row))
+        return row_id
+
+    def add_providers(self, count):
+        rng = self.rng
+        for n in range(count):
+            name = f"{PROVIDER_NAMES[n % len(PROVIDER_NAMES)]} {n // len(PROVIDER_NAMES) + 1}"
+            deleted = _timestamp(rng, 2024) if rng.random() < DELETED_PROVIDER_RATE else None
+            self.add("providers", (name, _timestamp(rng, 2019), deleted))
+
+    def add_client(self, provider_count):
+        rng, periods = self.rng, self.periods
+        schedule = "quarterly" if rng.random() < QUARTERLY_SHARE else "monthly"
+        if schedule == "monthly":
+            end = (periods.current_month_year, periods.current_month)
+        else:
+            end = (periods.current_quarter_year, periods.current_quarter)
+
+        # Start somewhere between FIRST_PERIOD and a year before the current period
+        last_year, last_month = periods.current_month_year - 1, periods.current_month
+        span = (last_year - FIRST_PERIOD[0]) * 12 + last_month - FIRST_PERIOD[1]
+        offset = rng.randint(0, max(span, 0))
+        start_year, start_month = FIRST_PERIOD[0] + offset // 12, offset % 12 + 1
+        start = (start_year, start_month) if schedule == "monthly" else (start_year, _quarter_of(start_month))
+        start_date = f"{start_year:04d}-{start_month:02d}-01"
+
+        name = f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {rng.choice(NAME_SUFFIXES)}"
+        client_deleted = _timestamp(rng, periods.current_month_year) if rng.random() < DELETED_CLIENT_RATE else None
+        client_id = self.add("clients", (
+            name, f"THE {name.upper()} 401K PLAN", start_date, _timestamp(rng, start_year), client_deleted,
+        ))
+        self.rows["client_folders"].append((client_id, f"{name} ({client_id})"))
+
+        provider_id = rng.randint(1, provider_count)
+        self.rows["client_providers"].append((client_id, provider_id, start_date, None, 1))
+
+        for n, contact_type in enumerate(CONTACT_TYPES[:rng.randint(1, 3)]):
+            deleted = _timestamp(rng, periods.current_month_year) if n and rng.random() < 0.1 else None
+            self.add("contacts", (
+                client_id, contact_type, f"Contact {client_id}-{n + 1}",
+                f"206-555-{rng.randint(0, 9999):04d}", f"contact{client_id}.{n + 1}@example.com", None,
+                f"{rng.randint(100, 9999)} Main St, Seattle, WA 98101", None,
+                _timestamp(rng, start_year), deleted,
+            ))
+
+        percent = rng.random() < PERCENT_FEE_SHARE
+        fee_type = "percentage" if percent else "flat"
+        percent_rate = round(rng.uniform(0.0003, 0.001), 6) if percent else None
+        flat_rate = round(rng.uniform(300, 3000), 2) if not percent else None
+        contract = (
+            client_id, str(rng.randint(100000, 999999)), provider_id, fee_type,
+            percent_rate, flat_rate, schedule, rng.randint(3, 80),
+        )
+        schedule_periods = list(_periods(schedule, start, end))
+
+        # Older contracts were superseded by the active one partway through the history
+        switch = len(schedule_periods)
+        contract_ids = []
+        active_from = _timestamp(rng, start_year)
+        if len(schedule_periods) > 4 and rng.random() < CONTRACT_HISTORY_RATE:
+            switch = rng.randint(1, len(schedule_periods) - 1)
+            # In force from the client's start until the first day of the switch
+            # period (always a later period), when the active contract replaced it
+            switched = f"{_period_start(schedule, *schedule_periods[switch])} {rng.randint(9, 17):02d}:00:00"
+            old_rate = (round(percent_rate * 1.1, 6), None) if percent else (None, round(flat_rate * 0.9, 2))
+            contract_ids.append(self.add("contracts", (
+                *contract[:4], *old_rate, *contract[6:], f"{start_date} {rng.randint(9, 17):02d}:00:00",
+                switched, 0,
+            )))
+            active_from = switched
+        contract_ids.append(self.add("contracts", (*contract, active_from, None, 1)))
+
+        self.add_payments(client_id, contract_ids, switch, schedule, schedule_periods, percent, percent_rate, flat_rate, provider_id)
+        return client_id
+
+    def add_payments(self, client_id, contract_ids, switch, schedule, schedule_periods,
+                     percent, percent_rate, flat_rate, provider_id):
+        rng = self.rng
+        assets = rng.randint(50_000, 5_000_000)
+        index = 0
+        while index < len(schedule_periods):
+            if rng.random() < SKIPPED_PERIOD_RATE:
+                index += 1
+                continue
+            covered = rng.randint(2, 3) if rng.random() < SPLIT_PAYMENT_RATE else 1
+            first = schedule_periods[index]
+            last = schedule_periods[min(index + covered, len(schedule_periods)) - 1]
+            covered = min(covered, len(schedule_periods) - index)
+            contract_id = contract_ids[0] if index < switch else contract_ids[-1]
+            index += covered
+
+            assets = max(10_000, int(assets * rng.uniform(0.97, 1.04)))
+            rate_fee = assets * percent_rate if percent else flat_rate
+            fee = round(rate_fee * covered, 2)
+            received = _received_date(rng, schedule, *last, self.periods.today)
+
+            if schedule == "monthly":
+                applied = (first[1], first[0], last[1], last[0], None, None, None, None)
+                keys = (_month_key(*first), _month_key(*last))
+            else:
+                applied = (None, None, None, None, first[1], first[0], last[1], last[0])
+                keys = (first[0] * 10 + first[1], last[0] * 10 + last[1])
+            notes = f"Split across {covered} periods" if covered > 1 else None
+            valid_from = f"{received} 09:00:00"
+
+            if rng.random() < EDITED_PAYMENT_RATE:
+                # The superseded version stays behind as soft-deleted history
+                self.add("payments", (
+                    contract_id, client_id, received, assets, round(fee * 1.05, 2), rng.choice(METHODS),
+                    "Corrected amount", valid_from, f"{received} 17:00:00", *applied, *keys, covered,
+                ))
+                self.payment_count += 1
+            deleted = f"{received} 18:00:00" if rng.random() < DELETED_PAYMENT_RATE else None
+            payment_id = self.add("payments", (
+                contract_id, client_id, received, assets, fee, rng.choice(METHODS),
+                notes, valid_from, deleted, *applied, *keys, covered,
+            ))
+            self.payment_count += 1
+
+            if rng.random() < DOCUMENT_RATE:
+                document_type = rng.choice(DOCUMENT_TYPES)
+                file_name = f"{received.replace('-', '')}_{client_id}_{payment_id}_{document_type}.pdf"
+                document_id = self.add("documents", (
+                    provider_id, document_type, received, file_name, f"documents/{file_name}",
+                    json.dumps({"pages": rng.randint(1, 6)}), valid_from,
+                ))
+                self.add("document_clients", (document_id, client_id))
+                self.add("document_payments", (payment_id, document_id))
+
+
+def generate_database(target, payments, seed=0, template="payments.db", today=None):
+    """
+    Write a synthetic database with about `payments` payment rows to target.
+    Returns {table: row count}.
+    """
+    rng = random.Random(seed)
+    periods = BillingPeriods.for_date(today or date.today())
+    shutil.copy(template, target)
+
+    conn = sqlite3.connect(target)
+    try:
+        apply_migrations(conn)
+        triggers = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' ORDER BY name"
+        ).fetchall()
+        with conn:
+            for name, _ in triggers:
+                conn.execute(f"DROP TRIGGER {name}")
+            for table in DATA_TABLES:
+                conn.execute(f"DELETE FROM {table}")
+            conn.execute("DELETE FROM sqlite_sequence")
+            conn.execute(
+                "UPDATE period_ledger_horizon SET monthly_key = ?, quarterly_key = ?",
+                (periods.current_monthly_key, periods.current_quarterly_key),
+            )
+
+        loader = _Loader(rng, periods)
+        # Size the provider list from the expected client count (~50 payments per client)
+        provider_count = max(5, payments // 50 // CLIENTS_PER_PROVIDER)
+        loader.add_providers(provider_count)
+        while loader.payment_count < payments:
+            loader.add_client(provider_count)
+
+        with conn:
+            for table in reversed(DATA_TABLES):
+                rows = loader.rows[table]
+                if not rows:
+                    continue
+                placeholders = ", ".join("?" * len(rows[0]))
+                if table in ("client_folders", "client_providers"):
+                    conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+                else:
+                    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+                    conn.executemany(
+                        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows
+                    )
+
+        rebuild_payment_periods(conn)
+        rebuild_period_ledger(conn)
+        with conn:
+            for _, sql in triggers:
+                conn.execute(sql)
+
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in reversed(DATA_TABLES)
+        }
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic payments database")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--preset", choices=sorted(PRESETS), default="10k", help="Number of payments")
+    size.add_argument("--payments", type=int, help="Number of payments (overrides --preset)")
+    parser.add_argument("--output", required=True, help="Database file to write")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--template", default="payments.db", help="Database to copy the schema from")
+    parser.add_argument("--today", type=date.fromisoformat, help="Date the history runs up to (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    if output.resolve() == Path(args.template).resolve():
+        parser.error("--output must not be the template database")
+    start = time.perf_counter()
+    counts = generate_database(
+        output, args.payments or PRESETS[args.preset], args.seed, args.template, args.today
+    )
+    for table, count in counts.items():
+        print(f"{table:<20} {count:>10}")
+    print(f"Wrote {output} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+# Query-plan regression check for the SQL views and router queries
+# Usage (from the backend directory):
+#   python benchmarks/query_plans.py              # compare with the baseline
+#   python benchmarks/query_plans.py --update     # record a new baseline
+#   python benchmarks/query_plans.py --preset 1m
+#
+# Every GET route is called through the app (with no filters, with each
+# filter on its own, with include_total=false and with a cursor) against a
+# synthetic database from generate_data.py, and every SELECT the routes
+# issue is captured from the pooled connections. Each view is also planned
+# on its own. For each statement the EXPLAIN QUERY PLAN is reduced to how
+# each table is accessed (search < index scan < automatic index < full
+# scan) plus the number of temporary sort B-trees; a statement regresses
+# when any table's access gets worse, a new table is scanned, or a new sort
+# appears.
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_data import PRESETS, generate_database
+
+BASELINE_PATH = Path(__file__).resolve().parent / "query_plan_baseline.json"
+
+# Access types from best to worst
+ACCESS_RANK = {"search": 0, "index-scan": 1, "auto-index": 2, "scan": 3}
+
+# Filter values used when calling the routes (resolved against the database)
+SAMPLE_QUERIES = {
+    "client_id": "SELECT client_id FROM payments WHERE valid_to IS NULL GROUP BY client_id "
+                 "ORDER BY COUNT(*) DESC LIMIT 1",
+    "payment_id": "SELECT payment_id FROM v_payments WHERE is_split_payment = 1 LIMIT 1",
+    "contract_id": "SELECT contract_id FROM contracts WHERE valid_to IS NULL LIMIT 1",
+    "provider_id": "SELECT provider_id FROM providers WHERE valid_to IS NULL LIMIT 1",
+    "contact_id": "SELECT contact_id FROM contacts WHERE valid_to IS NULL LIMIT 1",
+    "document_id": "SELECT document_id FROM documents LIMIT 1",
+    "method": "SELECT method FROM payments WHERE method IS NOT NULL LIMIT 1",
+    "contact_type": "SELECT contact_type FROM contacts WHERE contact_type IS NOT NULL LIMIT 1",
+    "document_type": "SELECT document_type FROM documents WHERE document_type IS NOT NULL LIMIT 1",
+}
+SAMPLE_VALUES = {
+    "min_date": "2024-01-01",
+    "max_date": "2024-12-31",
+    "is_split": "true",
+    "is_active": 1,
+    "period_key": 202401,
+    "payment_schedule": "monthly",
+    "status": "Unpaid",
+    "min_days": 30,
+    "year": 2024,
+    "month": 1,
+    "quarter": 1,
+    "is_current_monthly": 1,
+    "is_current_quarterly": 1,
+}
+SKIPPED_PARAMS = {"limit", "offset", "include_total", "cursor", "format"}
+
+
+def normalize_sql(sql):
+    """Statement text with literals replaced by ? and whitespace collapsed"""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    return " ".join(sql.split())
+
+
+def summarize_plan(conn, sql):
+    """{"tables": {name: worst access}, "temp_btrees": n} for one statement"""
+    tables = {}
+    temp_btrees = 0
+    for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+        detail = row[3]
+        if detail.startswith("USE TEMP B-TREE"):
+            temp_btrees += 1
+            continue
+        match = re.match(r"(SCAN|SEARCH) (\S+)", detail)
+        # Skip constant rows and materialized subqueries; their tables are listed separately
+        if not match or match.group(2) == "CONSTANT" or match.group(2).startswith("("):
+            continue
+        if "AUTOMATIC" in detail:
+            access = "auto-index"
+        elif match.group(1) == "SEARCH":
+            access = "search"
+        elif " USING " in detail:
+            access = "index-scan"
+        else:
+            access = "scan"
+        name = match.group(2)
+        if name not in tables or ACCESS_RANK[access] > ACCESS_RANK[tables[name]]:
+            tables[name] = access
+    return {"tables": dict(sorted(tables.items())), "temp_btrees": temp_btrees}
+
+
+def sample_values(conn):
+    values = dict(SAMPLE_VALUES)
+    for name, query in SAMPLE_QUERIES.items():
+        row = conn.execute(query).fetchone()
+        if row is not None:
+            values[name] = row[0]
+    return values
+
+
+def route_calls(routes, values):
+    """(label, url) for every GET route and filter combination"""
+    for route in routes:
+        path = route.path
+        for param in route.dependant.path_params:
+            path = path.replace(f"{{{param.name}}}", str(values[param.name]))
+        query_params = [p.name for p in route.dependant.query_params]
+        yield f"GET {route.path}", path
+        if "include_total" in query_params:
+            yield f"GET {route.path}?include_total=false", f"{path}?include_total=false"
+        for name in query_params:
+            if name in SKIPPED_PARAMS or name not in values:
+                continue
+            yield f"GET {route.path}?{name}", f"{path}?{name}={values[name]}"
+
+
+def collect_statements(db_path):
+    """{label: [sql, ...]} for every view and every SELECT issued by the GET routes"""
+    from fastapi.testclient import TestClient
+
+    from app import db
+    from app.main import app
+    from app.api import clients, contracts, dates, documents, exports, payments, providers
+
+    statements = {}
+    conn = sqlite3.connect(db_path)
+    try:
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'view' ORDER BY name"
+        ):
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({name})")]
+            statements[f"VIEW {name}"] = [f"SELECT * FROM {name}"]
+            if "client_id" in columns:
+                statements[f"VIEW {name}?client_id"] = [f"SELECT * FROM {name} WHERE client_id = 1"]
+        values = sample_values(conn)
+    finally:
+        conn.close()
+
+    traced = []
+
+    def trace(conn):
+        conn.set_trace_callback(traced.append)
+
+    saved_path = db.DB_PATH
+    db.close_pool()
+    db.DB_PATH = str(db_path)
+    db.CONNECTION_HOOKS.append(trace)
+    try:
+        client = TestClient(app)
+        routes = [
+            route
+            for module in (clients, contracts, payments, documents, providers, dates, exports)
+            for route in module.router.routes
+            if "GET" in route.methods
+        ]
+        calls = list(route_calls(routes, values))
+        for route in routes:
+            if any(p.name == "cursor" for p in route.dependant.query_params):
+                response = client.get(f"{route.path}?limit=5")
+                cursor = response.json().get("next_cursor")
+                if cursor:
+                    calls.append((f"GET {route.path}?cursor", f"{route.path}?limit=5&cursor={cursor}"))
+        for label, url in calls:
+            traced.clear()
+            response = client.get(url)
+            if response.status_code >= 500:
+                raise RuntimeError(f"{url} failed with {response.status_code}")
+            selects = []
+            for sql in traced:
+                if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+                    continue
+                if normalize_sql(sql) in ("SELECT ?", "SELECT COUNT(*) FROM sqlite_master"):
+                    continue
+                if sql not in selects:
+                    selects.append(sql)
+            statements[label] = selects
+    finally:
+        db.CONNECTION_HOOKS.remove(trace)
+        db.close_pool()
+        db.DB_PATH = saved_path
+    return statements
+
+
+def plan_report(db_path):
+    """{label: {normalized sql: plan summary}}"""
+    statements = collect_statements(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            label: {normalize_sql(sql): summarize_plan(conn, sql) for sql in sqls}
+            for label, sqls in sorted(statements.items())
+        }
+    finally:
+        conn.close()
+
+
+def compare_plans(baseline, current):
+    """List of regression messages (empty when no plan got worse)"""
+    regressions = []
+    for label, plans in current.items():
+        for sql, plan in plans.items():
+            before = baseline.get(label, {}).get(sql)
+            if before is None:
+                continue
+            for table, access in plan["tables"].items():
+                old = before["tables"].get(table)
+                if old is None:
+                    if ACCESS_RANK[access] >= ACCESS_RANK["auto-index"]:
+                        regressions.append(f"{label}: new {access} of {table}")
+                elif ACCESS_RANK[access] > ACCESS_RANK[old]:
+                    regressions.append(f"{label}: {table} {old} -> {access}")
+            if plan["temp_btrees"] > before["temp_btrees"]:
+                regressions.append(
+                    f"{label}: temp B-trees {before['temp_btrees']} -> {plan['temp_btrees']}"
+                )
+    return regressions
+
+
+def unmatched(baseline, current):
+    """Baseline statements no longer issued, and new statements without a baseline"""
+    old = {(label, sql) for label, plans in baseline.items() for sql in plans}
+    new = {(label, sql) for label, plans in current.items() for sql in plans}
+    return sorted(old - new), sorted(new - old)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query-plan regression check")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="100k", help="Synthetic database size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--update", action="store_true", help="Record a new baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic = Path(tmp) / "synthetic.db"
+        generate_database(synthetic, PRESETS[args.preset], args.seed)
+        current = plan_report(synthetic)
+
+    baseline_path = Path(args.baseline)
+    if args.update or not baseline_path.exists():
+        baseline_path.write_text(json.dumps(current, indent=1, sort_keys=True) + "\n")
+        count = sum(len(plans) for plans in current.values())
+        print(f"Recorded {count} statement plans in {baseline_path}")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text())
+    regressions = compare_plans(baseline, current)
+    removed, added = unmatched(baseline, current)
+    for label, sql in added:
+        print(f"new statement (not in baseline): {label}: {sql[:120]}")
+    for label, sql in removed:
+        print(f"statement no longer issued: {label}: {sql[:120]}")
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if regressions:
+        print(f"{len(regressions)} plan regressions; rerun with --update if they are intended")
+        return 1
+    print("No plan regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# Compare the validated response path with the trusted-row fast path
+# Usage (from the backend directory):
+#   python benchmarks/serialization_benchmark.py [--rows 1000] [--repeat 20]
+import argparse
+import statistics
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.db import DB_PATH
+from app.models.payments import (
+    PaymentViewModel, PaymentViewResponse,
+    SplitPaymentDistributionViewModel, SplitPaymentDistributionResponse,
+)
+from app.pagination import fetch_dicts
+from app.serialization import FastJSONResponse, trusted_rows
+
+CASES = {
+    "payments": (
+        "SELECT p.*, c.display_name FROM v_payments p "
+        "LEFT JOIN clients c ON p.client_id = c.client_id "
+        "WHERE p.valid_to IS NULL AND typeof(p.total_assets) != 'text' "
+        "ORDER BY received_date DESC LIMIT ?",
+        PaymentViewModel, PaymentViewResponse,
+    ),
+    "split-payments": (
+        "SELECT * FROM v_split_payment_distribution ORDER BY received_date DESC LIMIT ?",
+        SplitPaymentDistributionViewModel, SplitPaymentDistributionResponse,
+    ),
+}
+
+
+def validated_path(rows, model, response_model, adapter):
+    """What list routes did before: validate rows, then FastAPI validates the response again"""
+    items = [model.model_validate(dict(row)) for row in rows]
+    response = response_model(items=items, total=len(items))
+    # FastAPI's serialize_response: re-validate against response_model, dump to JSON types
+    content = adapter.dump_python(adapter.validate_python(response.model_dump()), mode="json")
+    return JSONResponse(content).body
+
+
+def trusted_path(rows, model, response_model, adapter):
+    items = trusted_rows(model, [dict(row) for row in rows])
+    return FastJSONResponse({"items": items, "total": len(items)}).body
+
+
+def timed(fn, repeat, *args):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization benchmark")
+    parser.add_argument("--db", default=DB_PATH, help="Path to SQLite database")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    print(f"{'case':<16}{'rows':>6}{'validated ms':>15}{'trusted ms':>13}{'speedup':>9}")
+    for name, (query, model, response_model) in CASES.items():
+        rows = fetch_dicts(conn, query, [args.rows])
+        adapter = TypeAdapter(response_model)
+        slow = timed(validated_path, args.repeat, rows, model, response_model, adapter)
+        fast = timed(trusted_path, args.repeat, rows, model, response_model, adapter)
+        print(f"{name:<16}{len(rows):>6}{slow:>15.2f}{fast:>13.2f}{slow / fast:>8.1f}x")
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,8 @@ import sqlite3
 import json
 from pathlib import Path
 
+from app.date_utils import current_periods
+
 # Connect to the database
 db_path = Path(__file__).parent / "payments.db"
 conn = sqlite3.connect(str(db_path))
@@ -13,9 +15,7 @@ conn.row_factory = sqlite3.Row
 cursor = conn.execute("""
     SELECT period_date, year, month, quarter, 
            period_key_monthly, period_key_quarterly,
-           display_label_monthly, display_label_quarterly,
-           is_current_monthly, is_current_quarterly,
-           is_previous_month, is_previous_quarter
+           display_label_monthly, display_label_quarterly
     FROM date_dimension
     ORDER BY period_date DESC
     LIMIT 10
@@ -25,14 +25,10 @@ cursor = conn.execute("""
 result = [dict(row) for row in cursor.fetchall()]
 print(json.dumps(result, indent=2))
 
-# Check if there are any records with previous flags set
-cursor = conn.execute("""
-    SELECT COUNT(*) as count
-    FROM date_dimension
-    WHERE is_previous_month = 1 OR is_previous_quarter = 1
-""")
-previous_count = cursor.fetchone()[0]
-print(f"\nRecords with previous period flags set: {previous_count}")
+# Current and previous billing periods from the application's calendar
+periods = current_periods()
+print(f"\nCurrent billing periods: monthly={periods.current_monthly_key}, quarterly={periods.current_quarterly_key}")
+print(f"Previous billing periods: monthly={periods.previous_monthly_key}, quarterly={periods.previous_quarterly_key}")
 
 # Check provider deletion behavior
 cursor = conn.execute("""
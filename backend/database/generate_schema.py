@@ -4,6 +4,25 @@ import os
 import argparse
 from pathlib import Path
 
+def bookkeeping_statements(cursor):
+    """
+    Rows the app's own bookkeeping tables need in a new database, and the
+    schema version, so a database built from schema.sql is fully migrated.
+    """
+    statements = []
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'table_versions'")
+    if cursor.fetchone():
+        cursor.execute("SELECT table_name FROM table_versions ORDER BY table_name")
+        names = ",\n".join(f"    ('{row[0]}')" for row in cursor.fetchall())
+        statements.append(f"INSERT INTO table_versions (table_name) VALUES\n{names};")
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'period_ledger_horizon'")
+    if cursor.fetchone():
+        # Start below every period; the first ledger sync advances it to today
+        statements.append("INSERT INTO period_ledger_horizon (id, monthly_key, quarterly_key) VALUES (1, 0, 0);")
+    cursor.execute("PRAGMA user_version")
+    statements.append(f"PRAGMA user_version = {cursor.fetchone()[0]};")
+    return statements
+
 def generate_full_schema(cursor, output_file):
     """Generate full SQL schema and write to file without double spacing."""
     cursor.execute("""
@@ -32,6 +51,9 @@ def generate_full_schema(cursor, output_file):
                 sql += ';'
             f.write(f"-- {name}\n")
             f.write(f"{sql}\n")
+        f.write("\n-- BOOKKEEPING ROWS AND SCHEMA VERSION\n")
+        for statement in bookkeeping_statements(cursor):
+            f.write(f"{statement}\n")
 
 def generate_compact_schema(conn, output_file):
     """Generate compact schema representation."""
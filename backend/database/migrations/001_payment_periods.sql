@@ -0,0 +1,141 @@
+-- 001: Materialize the periods covered by each active payment.
+-- payment_periods holds one row per (payment, covered period) and is kept in
+-- sync by triggers on payments, so views no longer range-join date_dimension
+-- on every read. Rebuild with: python manage_db.py rebuild-payment-periods
+
+-- v_payments joined every month of a quarter for quarterly payments,
+-- returning those payments three times; match only the quarter's first month
+DROP VIEW IF EXISTS v_payments;
+CREATE VIEW v_payments AS
+SELECT
+  p.*,
+  dm.display_label_monthly AS start_period_monthly,
+  dq.display_label_quarterly AS start_period_quarterly,
+  CASE
+    WHEN p.applied_start_month IS NOT NULL THEN dm.period_key_monthly
+    ELSE NULL
+  END AS period_key_monthly,
+  CASE
+    WHEN p.applied_start_quarter IS NOT NULL THEN dq.period_key_quarterly
+    ELSE NULL
+  END AS period_key_quarterly,
+  CASE
+    WHEN (p.applied_start_month != p.applied_end_month OR
+          p.applied_start_month_year != p.applied_end_month_year OR
+          p.applied_start_quarter != p.applied_end_quarter OR
+          p.applied_start_quarter_year != p.applied_end_quarter_year)
+         AND p.applied_end_month IS NOT NULL
+    THEN 1
+    ELSE 0
+  END AS is_split_payment
+FROM payments p
+LEFT JOIN date_dimension dm ON
+  (p.applied_start_month_year * 100 + p.applied_start_month) = dm.period_key_monthly
+LEFT JOIN date_dimension dq ON
+  (p.applied_start_quarter_year * 10 + p.applied_start_quarter) = dq.period_key_quarterly
+  AND dq.month IN (1, 4, 7, 10)
+WHERE p.valid_to IS NULL;
+
+-- Periods covered by each active payment, computed from the payments table.
+-- Used by the triggers below (filtered by payment_id) and by the rebuild command.
+CREATE VIEW v_payment_period_source AS
+SELECT
+    p.client_id,
+    'monthly' AS payment_schedule,
+    dd.period_key_monthly AS period_key,
+    p.payment_id,
+    dd.display_label_monthly AS period_label
+FROM payments p
+JOIN date_dimension dd ON
+    dd.period_key_monthly BETWEEN
+        (p.applied_start_month_year * 100 + p.applied_start_month) AND
+        (p.applied_end_month_year * 100 + p.applied_end_month)
+WHERE p.applied_start_month IS NOT NULL AND p.valid_to IS NULL
+UNION ALL
+SELECT
+    p.client_id,
+    'quarterly' AS payment_schedule,
+    dd.period_key_quarterly AS period_key,
+    p.payment_id,
+    dd.display_label_quarterly AS period_label
+FROM payments p
+JOIN date_dimension dd ON
+    dd.period_key_quarterly BETWEEN
+        (p.applied_start_quarter_year * 10 + p.applied_start_quarter) AND
+        (p.applied_end_quarter_year * 10 + p.applied_end_quarter)
+    AND dd.month IN (1, 4, 7, 10)
+WHERE p.applied_start_quarter IS NOT NULL AND p.valid_to IS NULL;
+
+CREATE TABLE payment_periods (
+    client_id INTEGER NOT NULL,
+    payment_schedule TEXT NOT NULL,   -- 'monthly' or 'quarterly'
+    period_key INTEGER NOT NULL,      -- YYYYMM or YYYYQ
+    payment_id INTEGER NOT NULL,
+    period_label TEXT NOT NULL,       -- "Jan 2023" or "Q1 2023"
+    PRIMARY KEY (client_id, payment_schedule, period_key, payment_id)
+) WITHOUT ROWID;
+
+CREATE INDEX idx_payment_periods_payment ON payment_periods(payment_id, period_key);
+
+INSERT INTO payment_periods (client_id, payment_schedule, period_key, payment_id, period_label)
+SELECT client_id, payment_schedule, period_key, payment_id, period_label
+FROM v_payment_period_source;
+
+CREATE TRIGGER trg_payments_periods_insert
+AFTER INSERT ON payments
+WHEN NEW.valid_to IS NULL
+BEGIN
+    INSERT INTO payment_periods (client_id, payment_schedule, period_key, payment_id, period_label)
+    SELECT client_id, payment_schedule, period_key, payment_id, period_label
+    FROM v_payment_period_source
+    WHERE payment_id = NEW.payment_id;
+END;
+
+-- Covers edits to the applied periods as well as soft deletes (valid_to set)
+CREATE TRIGGER trg_payments_periods_update
+AFTER UPDATE OF client_id, valid_to,
+    applied_start_month, applied_start_month_year, applied_end_month, applied_end_month_year,
+    applied_start_quarter, applied_start_quarter_year, applied_end_quarter, applied_end_quarter_year
+ON payments
+BEGIN
+    DELETE FROM payment_periods WHERE payment_id = OLD.payment_id;
+    INSERT INTO payment_periods (client_id, payment_schedule, period_key, payment_id, period_label)
+    SELECT client_id, payment_schedule, period_key, payment_id, period_label
+    FROM v_payment_period_source
+    WHERE payment_id = NEW.payment_id;
+END;
+
+CREATE TRIGGER trg_payments_periods_delete
+AFTER DELETE ON payments
+BEGIN
+    DELETE FROM payment_periods WHERE payment_id = OLD.payment_id;
+END;
+
+-- Views that expanded payments on every read now read the materialized rows
+DROP VIEW IF EXISTS v_expanded_payment_periods;
+CREATE VIEW v_expanded_payment_periods AS
+SELECT
+    payment_id,
+    client_id,
+    period_key,
+    payment_schedule
+FROM payment_periods;
+
+DROP VIEW IF EXISTS v_split_payment_distribution;
+CREATE VIEW v_split_payment_distribution AS
+SELECT
+    pp.payment_id,
+    pp.client_id,
+    c.display_name AS client_name,
+    p.received_date,
+    p.actual_fee AS total_payment_amount,
+    1 AS is_split_payment,
+    COUNT(*) OVER (PARTITION BY pp.payment_id, pp.payment_schedule) AS total_periods_covered,
+    pp.period_key,
+    pp.period_label,
+    pp.payment_schedule,
+    ROUND(p.actual_fee / COUNT(*) OVER (PARTITION BY pp.payment_id, pp.payment_schedule), 2) AS distributed_amount
+FROM payment_periods pp
+JOIN v_payments p ON p.payment_id = pp.payment_id
+JOIN clients c ON pp.client_id = c.client_id
+WHERE p.is_split_payment = 1;
@@ -0,0 +1,26 @@
+-- 002: Count periods per payment with an indexed lookup instead of a window.
+-- COUNT(*) OVER (PARTITION BY payment_id) forced SQLite to compute the whole
+-- view before applying a client, date or cursor filter; the correlated count
+-- lets those filters reach payments and payment_periods through their indexes.
+DROP VIEW IF EXISTS v_split_payment_distribution;
+CREATE VIEW v_split_payment_distribution AS
+SELECT
+    pp.payment_id,
+    pp.client_id,
+    c.display_name AS client_name,
+    p.received_date,
+    p.actual_fee AS total_payment_amount,
+    1 AS is_split_payment,
+    (SELECT COUNT(*) FROM payment_periods x
+     WHERE x.payment_id = pp.payment_id AND x.payment_schedule = pp.payment_schedule) AS total_periods_covered,
+    pp.period_key,
+    pp.period_label,
+    pp.payment_schedule,
+    ROUND(p.actual_fee / (
+        SELECT COUNT(*) FROM payment_periods x
+        WHERE x.payment_id = pp.payment_id AND x.payment_schedule = pp.payment_schedule
+    ), 2) AS distributed_amount
+FROM v_payments p
+JOIN payment_periods pp ON pp.payment_id = p.payment_id
+JOIN clients c ON pp.client_id = c.client_id
+WHERE p.is_split_payment = 1;
@@ -0,0 +1,119 @@
+-- 003: Store each payment's period range and period count on the row.
+-- start_period_key / end_period_key are YYYYMM for monthly payments and YYYYQ
+-- for quarterly ones; periods_covered is the number of periods in between
+-- (1 when no period is applied). Triggers fill them in on insert and when the
+-- applied_* columns change, so v_payment_period_coverage no longer counts
+-- date_dimension rows up to four times per payment on every read.
+
+ALTER TABLE payments ADD COLUMN start_period_key INTEGER;
+ALTER TABLE payments ADD COLUMN end_period_key INTEGER;
+ALTER TABLE payments ADD COLUMN periods_covered INTEGER;
+
+UPDATE payments SET
+    start_period_key = CASE
+        WHEN applied_start_month IS NOT NULL THEN applied_start_month_year * 100 + applied_start_month
+        WHEN applied_start_quarter IS NOT NULL THEN applied_start_quarter_year * 10 + applied_start_quarter
+    END,
+    end_period_key = CASE
+        WHEN applied_start_month IS NOT NULL THEN applied_end_month_year * 100 + applied_end_month
+        WHEN applied_start_quarter IS NOT NULL THEN applied_end_quarter_year * 10 + applied_end_quarter
+    END,
+    periods_covered = CASE
+        WHEN applied_start_month IS NOT NULL THEN MAX(0,
+            (applied_end_month_year * 12 + applied_end_month) -
+            (applied_start_month_year * 12 + applied_start_month) + 1)
+        WHEN applied_start_quarter IS NOT NULL THEN MAX(0,
+            (applied_end_quarter_year * 4 + applied_end_quarter) -
+            (applied_start_quarter_year * 4 + applied_start_quarter) + 1)
+        ELSE 1
+    END;
+
+CREATE TRIGGER trg_payments_period_columns_insert
+AFTER INSERT ON payments
+BEGIN
+    UPDATE payments SET
+        start_period_key = CASE
+            WHEN applied_start_month IS NOT NULL THEN applied_start_month_year * 100 + applied_start_month
+            WHEN applied_start_quarter IS NOT NULL THEN applied_start_quarter_year * 10 + applied_start_quarter
+        END,
+        end_period_key = CASE
+            WHEN applied_start_month IS NOT NULL THEN applied_end_month_year * 100 + applied_end_month
+            WHEN applied_start_quarter IS NOT NULL THEN applied_end_quarter_year * 10 + applied_end_quarter
+        END,
+        periods_covered = CASE
+            WHEN applied_start_month IS NOT NULL THEN MAX(0,
+                (applied_end_month_year * 12 + applied_end_month) -
+                (applied_start_month_year * 12 + applied_start_month) + 1)
+            WHEN applied_start_quarter IS NOT NULL THEN MAX(0,
+                (applied_end_quarter_year * 4 + applied_end_quarter) -
+                (applied_start_quarter_year * 4 + applied_start_quarter) + 1)
+            ELSE 1
+        END
+    WHERE payment_id = NEW.payment_id;
+END;
+
+CREATE TRIGGER trg_payments_period_columns_update
+AFTER UPDATE OF
+    applied_start_month, applied_start_month_year,
+    applied_end_month, applied_end_month_year,
+    applied_start_quarter, applied_start_quarter_year,
+    applied_end_quarter, applied_end_quarter_year
+ON payments
+BEGIN
+    UPDATE payments SET
+        start_period_key = CASE
+            WHEN applied_start_month IS NOT NULL THEN applied_start_month_year * 100 + applied_start_month
+            WHEN applied_start_quarter IS NOT NULL THEN applied_start_quarter_year * 10 + applied_start_quarter
+        END,
+        end_period_key = CASE
+            WHEN applied_start_month IS NOT NULL THEN applied_end_month_year * 100 + applied_end_month
+            WHEN applied_start_quarter IS NOT NULL THEN applied_end_quarter_year * 10 + applied_end_quarter
+        END,
+        periods_covered = CASE
+            WHEN applied_start_month IS NOT NULL THEN MAX(0,
+                (applied_end_month_year * 12 + applied_end_month) -
+                (applied_start_month_year * 12 + applied_start_month) + 1)
+            WHEN applied_start_quarter IS NOT NULL THEN MAX(0,
+                (applied_end_quarter_year * 4 + applied_end_quarter) -
+                (applied_start_quarter_year * 4 + applied_start_quarter) + 1)
+            ELSE 1
+        END
+    WHERE payment_id = NEW.payment_id;
+END;
+
+-- Coverage reads payments once: the period count comes from the stored
+-- columns and the period lists from payment_periods (an indexed lookup per
+-- payment, in period order), with no date_dimension access at all
+DROP VIEW IF EXISTS v_payment_period_coverage;
+CREATE VIEW v_payment_period_coverage AS
+SELECT
+    p.payment_id,
+    p.client_id,
+    p.received_date,
+    p.actual_fee,
+    CASE
+      WHEN (p.applied_start_month != p.applied_end_month OR
+            p.applied_start_month_year != p.applied_end_month_year OR
+            p.applied_start_quarter != p.applied_end_quarter OR
+            p.applied_start_quarter_year != p.applied_end_quarter_year)
+           AND p.applied_end_month IS NOT NULL
+      THEN 1
+      ELSE 0
+    END AS is_split_payment,
+    CASE WHEN p.applied_start_month IS NOT NULL THEN
+        (SELECT GROUP_CONCAT(pp.period_key || '|' || pp.period_label, '; ')
+         FROM payment_periods pp
+         WHERE pp.payment_id = p.payment_id AND pp.payment_schedule = 'monthly')
+    ELSE NULL END AS covered_monthly_periods,
+    CASE WHEN p.applied_start_quarter IS NOT NULL THEN
+        (SELECT GROUP_CONCAT(pp.period_key || '|' || pp.period_label, '; ')
+         FROM payment_periods pp
+         WHERE pp.payment_id = p.payment_id AND pp.payment_schedule = 'quarterly')
+    ELSE NULL END AS covered_quarterly_periods,
+    p.periods_covered,
+    CASE
+        WHEN p.periods_covered > 1 THEN ROUND(p.actual_fee / p.periods_covered, 2)
+        ELSE p.actual_fee
+    END AS distributed_amount_per_period
+FROM payments p
+WHERE p.valid_to IS NULL;
@@ -0,0 +1,100 @@
+-- 004: Find each client's first/last payment with one index seek per client.
+-- The old views re-ran "ORDER BY received_date LIMIT 1" as a separate
+-- correlated subquery for every output column, and grouped every active
+-- payment to get MIN/MAX(received_date). Now one lookup along
+-- idx_payments_client_date picks the payment (row 1 of the client's payments
+-- in date order), and its columns are read by primary key.
+-- Ties on received_date go to the lower payment_id for the first payment and
+-- the higher one for the last payment, as the old index-ordered lookups did.
+
+-- The active contract decides whether a period is reported monthly or quarterly
+CREATE INDEX IF NOT EXISTS idx_contracts_client ON contracts(client_id);
+
+DROP VIEW IF EXISTS v_client_payment_first;
+CREATE VIEW v_client_payment_first AS
+SELECT
+  f.client_id,
+  f.display_name,
+  p.payment_id AS first_payment_id,
+  p.received_date AS first_payment_date,
+  p.actual_fee AS first_payment_amount,
+  p.method AS first_payment_method,
+  p.total_assets AS first_payment_assets,
+  CASE
+    WHEN ct.payment_schedule = 'monthly' THEN p.applied_start_month_year * 100 + p.applied_start_month
+    ELSE p.applied_start_quarter_year * 10 + p.applied_start_quarter
+  END AS first_payment_period_key,
+  CASE
+    WHEN ct.contract_id IS NULL THEN NULL
+    WHEN ct.payment_schedule = 'monthly' THEN
+      (SELECT display_label_monthly FROM date_dimension
+       WHERE period_key_monthly = p.applied_start_month_year * 100 + p.applied_start_month
+       LIMIT 1)
+    ELSE
+      (SELECT display_label_quarterly FROM date_dimension
+       WHERE period_key_quarterly = p.applied_start_quarter_year * 10 + p.applied_start_quarter
+       LIMIT 1)
+  END AS first_payment_period
+FROM (
+  SELECT
+    c.client_id,
+    c.display_name,
+    (SELECT p2.payment_id
+     FROM payments p2
+     WHERE p2.client_id = c.client_id AND p2.valid_to IS NULL
+     ORDER BY p2.received_date ASC, p2.payment_id ASC
+     LIMIT 1) AS payment_id,
+    (SELECT ct2.contract_id
+     FROM contracts ct2
+     WHERE ct2.client_id = c.client_id AND ct2.is_active = 1 AND ct2.valid_to IS NULL
+     LIMIT 1) AS contract_id
+  FROM clients c
+  WHERE c.valid_to IS NULL
+) f
+JOIN payments p ON p.payment_id = f.payment_id
+LEFT JOIN contracts ct ON ct.contract_id = f.contract_id;
+
+DROP VIEW IF EXISTS v_client_payment_last;
+CREATE VIEW v_client_payment_last AS
+SELECT
+  l.client_id,
+  l.display_name,
+  p.payment_id AS last_payment_id,
+  p.received_date AS last_payment_date,
+  p.actual_fee AS last_payment_amount,
+  p.method AS last_payment_method,
+  p.total_assets AS last_payment_assets,
+  CASE
+    WHEN ct.payment_schedule = 'monthly' THEN p.applied_start_month_year * 100 + p.applied_start_month
+    ELSE p.applied_start_quarter_year * 10 + p.applied_start_quarter
+  END AS last_payment_period_key,
+  CASE
+    WHEN ct.contract_id IS NULL THEN NULL
+    WHEN ct.payment_schedule = 'monthly' THEN
+      (SELECT display_label_monthly FROM date_dimension
+       WHERE period_key_monthly = p.applied_start_month_year * 100 + p.applied_start_month
+       LIMIT 1)
+    ELSE
+      (SELECT display_label_quarterly FROM date_dimension
+       WHERE period_key_quarterly = p.applied_start_quarter_year * 10 + p.applied_start_quarter
+       LIMIT 1)
+  END AS last_payment_period,
+  JULIANDAY(CURRENT_DATE) - JULIANDAY(p.received_date) AS days_since_last_payment
+FROM (
+  SELECT
+    c.client_id,
+    c.display_name,
+    (SELECT p2.payment_id
+     FROM payments p2
+     WHERE p2.client_id = c.client_id AND p2.valid_to IS NULL
+     ORDER BY p2.received_date DESC, p2.payment_id DESC
+     LIMIT 1) AS payment_id,
+    (SELECT ct2.contract_id
+     FROM contracts ct2
+     WHERE ct2.client_id = c.client_id AND ct2.is_active = 1 AND ct2.valid_to IS NULL
+     LIMIT 1) AS contract_id
+  FROM clients c
+  WHERE c.valid_to IS NULL
+) l
+JOIN payments p ON p.payment_id = l.payment_id
+LEFT JOIN contracts ct ON ct.contract_id = l.contract_id;
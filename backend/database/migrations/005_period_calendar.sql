@@ -0,0 +1,151 @@
+-- 005: Current billing periods come from the application's period calendar.
+-- The is_current_* / is_previous_* flags in date_dimension were rewritten on
+-- every startup and went stale between restarts; they are dropped. The API
+-- passes the current period keys to its queries as parameters, bounding the
+-- unbounded views below. v_client_expected_periods, v_all_missing_payment_periods
+-- and v_current_period_payment_status remain for ad-hoc SQL and bound
+-- themselves with v_current_period.
+
+DROP VIEW IF EXISTS v_current_period_payment_status;
+DROP VIEW IF EXISTS v_all_missing_payment_periods;
+DROP VIEW IF EXISTS v_client_expected_periods;
+
+-- Every period from each active client's start, with no upper bound
+CREATE VIEW v_client_schedule_periods AS
+WITH
+  -- Get first payment or client start date, whichever is earlier
+  client_start AS (
+    SELECT
+      c.client_id,
+      c.payment_schedule,
+      COALESCE(
+        MIN(cp.start_date),
+        MIN(p.received_date)
+      ) AS start_date
+    FROM v_active_contracts c
+    LEFT JOIN client_providers cp ON c.client_id = cp.client_id
+    LEFT JOIN payments p ON c.client_id = p.client_id
+    GROUP BY c.client_id, c.payment_schedule
+  ),
+  -- Convert start date to period keys
+  date_info AS (
+    SELECT
+      cs.client_id,
+      cs.payment_schedule,
+      CAST(strftime('%Y', cs.start_date) AS INTEGER) AS start_year,
+      CAST(strftime('%m', cs.start_date) AS INTEGER) AS start_month,
+      (CAST(strftime('%m', cs.start_date) AS INTEGER) + 2) / 3 AS start_quarter
+    FROM client_start cs
+  )
+SELECT
+  di.client_id,
+  di.payment_schedule,
+  dd.period_key_monthly,
+  dd.period_key_quarterly,
+  CASE
+    WHEN di.payment_schedule = 'monthly' THEN dd.period_key_monthly
+    ELSE dd.period_key_quarterly
+  END AS period_key,
+  CASE
+    WHEN di.payment_schedule = 'monthly' THEN dd.display_label_monthly
+    ELSE dd.display_label_quarterly
+  END AS period_label
+FROM date_info di
+JOIN date_dimension dd ON
+  (di.payment_schedule = 'monthly' AND
+   dd.period_key_monthly >= (di.start_year * 100 + di.start_month))
+  OR
+  (di.payment_schedule = 'quarterly' AND
+   dd.period_key_quarterly >= (di.start_year * 10 + di.start_quarter) AND
+   dd.month IN (1, 4, 7, 10));
+
+-- Scheduled periods with no payment covering them, with no upper bound
+CREATE VIEW v_client_unpaid_periods AS
+SELECT
+  e.client_id,
+  e.payment_schedule,
+  e.period_key,
+  e.period_label,
+  'Missing' AS status
+FROM v_client_schedule_periods e
+WHERE NOT EXISTS (
+  SELECT 1 FROM payment_periods p
+  WHERE p.client_id = e.client_id
+    AND p.payment_schedule = e.payment_schedule
+    AND p.period_key = e.period_key
+);
+
+CREATE VIEW v_client_expected_periods AS
+SELECT e.*
+FROM v_client_schedule_periods e
+CROSS JOIN v_current_period cp
+WHERE (e.payment_schedule = 'monthly' AND e.period_key <= cp.current_monthly_key)
+   OR (e.payment_schedule = 'quarterly' AND e.period_key <= cp.current_quarterly_key);
+
+CREATE VIEW v_all_missing_payment_periods AS
+SELECT u.*
+FROM v_client_unpaid_periods u
+CROSS JOIN v_current_period cp
+WHERE (u.payment_schedule = 'monthly' AND u.period_key <= cp.current_monthly_key)
+   OR (u.payment_schedule = 'quarterly' AND u.period_key <= cp.current_quarterly_key);
+
+CREATE VIEW v_current_period_payment_status AS
+SELECT
+  c.client_id,
+  c.payment_schedule,
+  CASE
+    WHEN c.payment_schedule = 'monthly' THEN cp.current_monthly_key
+    ELSE cp.current_quarterly_key
+  END AS period_key,
+  CASE
+    WHEN c.payment_schedule = 'monthly' THEN dm.display_label_monthly
+    ELSE dq.display_label_quarterly
+  END AS period_label,
+  CASE
+    WHEN EXISTS (
+      SELECT 1 FROM payment_periods pp
+      WHERE pp.client_id = c.client_id
+        AND pp.payment_schedule = c.payment_schedule
+        AND pp.period_key = CASE
+          WHEN c.payment_schedule = 'monthly' THEN cp.current_monthly_key
+          ELSE cp.current_quarterly_key
+        END
+    ) THEN 'Paid'
+    ELSE 'Unpaid'
+  END AS status
+FROM v_active_contracts c
+CROSS JOIN v_current_period cp
+JOIN date_dimension dm ON dm.period_key_monthly = cp.current_monthly_key
+JOIN date_dimension dq ON
+  dq.period_key_quarterly = cp.current_quarterly_key AND dq.month IN (1, 4, 7, 10);
+
+-- Rebuild date_dimension without the flag columns (DROP COLUMN cannot parse
+-- the commented CREATE TABLE statement)
+CREATE TABLE date_dimension_new (
+  period_date TEXT PRIMARY KEY,            -- YYYY-MM-DD for first day of period
+  year INTEGER NOT NULL,                   -- Year component (YYYY)
+  month INTEGER,                           -- Month component (1-12)
+  month_name TEXT,                         -- Jan, Feb, etc.
+  quarter INTEGER,                         -- Quarter component (1-4)
+  period_key_monthly INTEGER NOT NULL,     -- YYYYMM format
+  period_key_quarterly INTEGER NOT NULL,   -- YYYYQ format
+  display_label_monthly TEXT NOT NULL,     -- "Jan 2023", etc.
+  display_label_quarterly TEXT NOT NULL    -- "Q1 2023", etc.
+);
+
+INSERT INTO date_dimension_new (
+  period_date, year, month, month_name, quarter,
+  period_key_monthly, period_key_quarterly,
+  display_label_monthly, display_label_quarterly
+)
+SELECT
+  period_date, year, month, month_name, quarter,
+  period_key_monthly, period_key_quarterly,
+  display_label_monthly, display_label_quarterly
+FROM date_dimension;
+
+-- Legacy rename leaves the views that name date_dimension untouched
+PRAGMA legacy_alter_table = ON;
+DROP TABLE date_dimension;
+ALTER TABLE date_dimension_new RENAME TO date_dimension;
+PRAGMA legacy_alter_table = OFF;
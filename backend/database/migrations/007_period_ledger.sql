@@ -0,0 +1,194 @@
+-- 007: Persisted ledger of expected and missing payment periods.
+-- Missing periods were recomputed from each client's start date on every
+-- request (schedule x date_dimension, anti-joined against payment_periods).
+-- expected_periods now holds every period an active contract should have
+-- paid, up to the ledger horizon, and missing_periods the ones that no
+-- payment covers. Triggers keep both in sync:
+--   * payment_periods rows (themselves trigger-maintained from payments)
+--     close and reopen single gaps;
+--   * changes that move a client's start or schedule (contracts,
+--     client_providers, a new earliest payment, deleted payments) recompute
+--     that client through period_ledger_refresh.
+-- The horizon is the current billing period. The application advances it
+-- once per period rollover (app.maintenance.advance_period_ledger); it is
+-- seeded here from v_current_period.
+
+CREATE TABLE period_ledger_horizon (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    monthly_key INTEGER NOT NULL,     -- YYYYMM of the last monthly period in the ledger
+    quarterly_key INTEGER NOT NULL    -- YYYYQ of the last quarterly period in the ledger
+);
+
+INSERT INTO period_ledger_horizon (id, monthly_key, quarterly_key)
+SELECT 1, current_monthly_key, current_quarterly_key FROM v_current_period;
+
+CREATE TABLE expected_periods (
+    client_id INTEGER NOT NULL,
+    payment_schedule TEXT NOT NULL,   -- 'monthly' or 'quarterly'
+    period_key INTEGER NOT NULL,      -- YYYYMM or YYYYQ
+    period_key_monthly INTEGER NOT NULL,
+    period_key_quarterly INTEGER NOT NULL,
+    period_label TEXT NOT NULL,       -- "Jan 2023" or "Q1 2023"
+    PRIMARY KEY (client_id, payment_schedule, period_key)
+) WITHOUT ROWID;
+
+CREATE TABLE missing_periods (
+    client_id INTEGER NOT NULL,
+    payment_schedule TEXT NOT NULL,
+    period_key INTEGER NOT NULL,
+    period_label TEXT NOT NULL,
+    PRIMARY KEY (client_id, payment_schedule, period_key)
+) WITHOUT ROWID;
+
+INSERT INTO expected_periods (
+    client_id, payment_schedule, period_key,
+    period_key_monthly, period_key_quarterly, period_label
+)
+SELECT
+    s.client_id, s.payment_schedule, s.period_key,
+    s.period_key_monthly, s.period_key_quarterly, s.period_label
+FROM v_client_schedule_periods s
+CROSS JOIN period_ledger_horizon h
+WHERE (s.payment_schedule = 'monthly' AND s.period_key <= h.monthly_key)
+   OR (s.payment_schedule = 'quarterly' AND s.period_key <= h.quarterly_key);
+
+INSERT INTO missing_periods (client_id, payment_schedule, period_key, period_label)
+SELECT e.client_id, e.payment_schedule, e.period_key, e.period_label
+FROM expected_periods e
+WHERE NOT EXISTS (
+    SELECT 1 FROM payment_periods pp
+    WHERE pp.client_id = e.client_id
+      AND pp.payment_schedule = e.payment_schedule
+      AND pp.period_key = e.period_key
+);
+
+-- Inserting a client_id here recomputes that client's ledger rows. It is a
+-- view, so nothing is stored; the INSTEAD OF trigger does the work.
+CREATE VIEW period_ledger_refresh AS
+SELECT NULL AS client_id WHERE 0;
+
+CREATE TRIGGER trg_period_ledger_refresh
+INSTEAD OF INSERT ON period_ledger_refresh
+BEGIN
+    DELETE FROM missing_periods WHERE client_id = NEW.client_id;
+    DELETE FROM expected_periods WHERE client_id = NEW.client_id;
+    INSERT INTO expected_periods (
+        client_id, payment_schedule, period_key,
+        period_key_monthly, period_key_quarterly, period_label
+    )
+    SELECT
+        s.client_id, s.payment_schedule, s.period_key,
+        s.period_key_monthly, s.period_key_quarterly, s.period_label
+    FROM v_client_schedule_periods s
+    CROSS JOIN period_ledger_horizon h
+    WHERE s.client_id = NEW.client_id
+      AND ((s.payment_schedule = 'monthly' AND s.period_key <= h.monthly_key)
+        OR (s.payment_schedule = 'quarterly' AND s.period_key <= h.quarterly_key));
+    INSERT INTO missing_periods (client_id, payment_schedule, period_key, period_label)
+    SELECT e.client_id, e.payment_schedule, e.period_key, e.period_label
+    FROM expected_periods e
+    WHERE e.client_id = NEW.client_id
+      AND NOT EXISTS (
+        SELECT 1 FROM payment_periods pp
+        WHERE pp.client_id = e.client_id
+          AND pp.payment_schedule = e.payment_schedule
+          AND pp.period_key = e.period_key
+      );
+END;
+
+-- A covered period is no longer missing
+CREATE TRIGGER trg_payment_periods_ledger_insert
+AFTER INSERT ON payment_periods
+BEGIN
+    DELETE FROM missing_periods
+    WHERE client_id = NEW.client_id
+      AND payment_schedule = NEW.payment_schedule
+      AND period_key = NEW.period_key;
+END;
+
+-- An expected period loses its last payment
+CREATE TRIGGER trg_payment_periods_ledger_delete
+AFTER DELETE ON payment_periods
+BEGIN
+    INSERT OR IGNORE INTO missing_periods (client_id, payment_schedule, period_key, period_label)
+    SELECT e.client_id, e.payment_schedule, e.period_key, e.period_label
+    FROM expected_periods e
+    WHERE e.client_id = OLD.client_id
+      AND e.payment_schedule = OLD.payment_schedule
+      AND e.period_key = OLD.period_key
+      AND NOT EXISTS (
+        SELECT 1 FROM payment_periods pp
+        WHERE pp.client_id = OLD.client_id
+          AND pp.payment_schedule = OLD.payment_schedule
+          AND pp.period_key = OLD.period_key
+      );
+END;
+
+-- Start dates fall back to the earliest payment (soft-deleted ones included),
+-- so only a new earliest payment, a moved payment or a hard delete can shift them
+CREATE TRIGGER trg_payments_ledger_insert
+AFTER INSERT ON payments
+WHEN NEW.received_date < COALESCE(
+    (SELECT MIN(received_date) FROM payments
+     WHERE client_id = NEW.client_id AND payment_id != NEW.payment_id),
+    '9999-12-31')
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (NEW.client_id);
+END;
+
+CREATE TRIGGER trg_payments_ledger_update
+AFTER UPDATE OF client_id, received_date ON payments
+WHEN OLD.client_id != NEW.client_id OR OLD.received_date IS NOT NEW.received_date
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (OLD.client_id);
+    INSERT INTO period_ledger_refresh (client_id)
+    SELECT NEW.client_id WHERE NEW.client_id != OLD.client_id;
+END;
+
+CREATE TRIGGER trg_payments_ledger_delete
+AFTER DELETE ON payments
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (OLD.client_id);
+END;
+
+-- The active contract decides whether a client is expected to pay and on which schedule
+CREATE TRIGGER trg_contracts_ledger_insert
+AFTER INSERT ON contracts
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (NEW.client_id);
+END;
+
+CREATE TRIGGER trg_contracts_ledger_update
+AFTER UPDATE OF client_id, payment_schedule, is_active, valid_to ON contracts
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (OLD.client_id);
+    INSERT INTO period_ledger_refresh (client_id)
+    SELECT NEW.client_id WHERE NEW.client_id != OLD.client_id;
+END;
+
+CREATE TRIGGER trg_contracts_ledger_delete
+AFTER DELETE ON contracts
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (OLD.client_id);
+END;
+
+-- Provider start dates take precedence over the first payment
+CREATE TRIGGER trg_client_providers_ledger_insert
+AFTER INSERT ON client_providers
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (NEW.client_id);
+END;
+
+CREATE TRIGGER trg_client_providers_ledger_update
+AFTER UPDATE OF client_id, start_date ON client_providers
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (OLD.client_id);
+    INSERT INTO period_ledger_refresh (client_id)
+    SELECT NEW.client_id WHERE NEW.client_id != OLD.client_id;
+END;
+
+CREATE TRIGGER trg_client_providers_ledger_delete
+AFTER DELETE ON client_providers
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (OLD.client_id);
+END;
@@ -0,0 +1,95 @@
+-- 008: Indexes for the valid_to IS NULL (not soft-deleted) row sets.
+-- Router queries and views read active rows only, but the one soft-delete
+-- index (idx_payments_valid_to) keyed every payment by valid_to, so
+-- "ORDER BY received_date DESC LIMIT n" still sorted every active payment and
+-- clients/contracts/contacts/providers were scanned. Each index below is
+-- partial on valid_to IS NULL (deleted rows cost nothing to skip or
+-- maintain) and keyed by the filter and sort columns of the queries that
+-- use it. The planner picks a partial index only when the query repeats the
+-- index's WHERE terms, which all of these queries do.
+--
+-- EXPLAIN QUERY PLAN on a 60x copy of the bundled data (53k payments,
+-- 4k clients), before -> after:
+--   /api/payments?include_total=false, /api/payments?cursor=...
+--     SEARCH p USING INDEX idx_payments_valid_to (valid_to=?)
+--     USE TEMP B-TREE FOR ORDER BY                           70 ms / 54 ms
+--     -> SCAN p USING INDEX idx_payments_active_received     5 ms / 4 ms
+--   /api/split-payments?include_total=false
+--     SEARCH p USING INDEX idx_payments_valid_to (valid_to=?)
+--     USE TEMP B-TREE FOR ORDER BY
+--     -> SCAN p USING INDEX idx_payments_active_received
+--        SEARCH pp USING INDEX idx_payment_periods_payment (payment_id=?)
+--   v_client_payment_first / v_client_payment_last (per client)
+--     SEARCH p2 USING INDEX idx_payments_client_date (client_id=?)
+--     SEARCH ct2 USING INDEX idx_contracts_client (client_id=?)
+--     -> SEARCH p2 USING INDEX idx_payments_active_client (client_id=?)
+--        SEARCH ct2 USING INDEX idx_contracts_active_client (client_id=? AND is_active=?)
+--   /api/contacts?client_id=
+--     SCAN contacts
+--     -> SEARCH contacts USING INDEX idx_contacts_active_client (client_id=?)
+--   /api/clients, /api/providers, /api/contracts, /api/active-contracts
+--     SCAN clients / providers / contracts, USE TEMP B-TREE FOR ORDER BY
+--     -> SCAN ... USING INDEX idx_clients_active_name / idx_providers_active_name /
+--        idx_contracts_active_client (rows come out in list order)
+
+-- Superseded: the active-row indexes cover every query that used these
+DROP INDEX IF EXISTS idx_payments_valid_to;
+DROP INDEX IF EXISTS idx_payments_received_date;
+DROP INDEX IF EXISTS idx_contracts_client;
+
+-- Payment lists, exports and cursor pages (PAYMENT_KEYSET order)
+CREATE INDEX idx_payments_active_received
+ON payments(received_date DESC, payment_id DESC)
+WHERE valid_to IS NULL;
+
+-- Per-client payment lists and first/last payment seeks (covering)
+CREATE INDEX idx_payments_active_client
+ON payments(client_id, received_date, payment_id)
+WHERE valid_to IS NULL;
+
+-- /api/clients and the first/last payment views list clients by name
+CREATE INDEX idx_clients_active_name
+ON clients(display_name)
+WHERE valid_to IS NULL;
+
+-- /api/contracts, v_active_contracts and the active-contract lookups
+CREATE INDEX idx_contracts_active_client
+ON contracts(client_id, is_active)
+WHERE valid_to IS NULL;
+
+-- /api/contacts filters by client and sorts by client_id, contact_type
+CREATE INDEX idx_contacts_active_client
+ON contacts(client_id, contact_type)
+WHERE valid_to IS NULL;
+
+-- /api/providers lists by name
+CREATE INDEX idx_providers_active_name
+ON providers(provider_name)
+WHERE valid_to IS NULL;
+
+-- Split distributions: without idx_payments_valid_to the planner drove this
+-- view from a full payment_periods scan. CROSS JOIN keeps payments as the
+-- outer table, and the payment columns are exposed so client, payment and
+-- date filters reach the payments indexes.
+DROP VIEW IF EXISTS v_split_payment_distribution;
+CREATE VIEW v_split_payment_distribution AS
+SELECT
+    p.payment_id,
+    p.client_id,
+    c.display_name AS client_name,
+    p.received_date,
+    p.actual_fee AS total_payment_amount,
+    1 AS is_split_payment,
+    (SELECT COUNT(*) FROM payment_periods x
+     WHERE x.payment_id = pp.payment_id AND x.payment_schedule = pp.payment_schedule) AS total_periods_covered,
+    pp.period_key,
+    pp.period_label,
+    pp.payment_schedule,
+    ROUND(p.actual_fee / (
+        SELECT COUNT(*) FROM payment_periods x
+        WHERE x.payment_id = pp.payment_id AND x.payment_schedule = pp.payment_schedule
+    ), 2) AS distributed_amount
+FROM v_payments p
+CROSS JOIN payment_periods pp ON pp.payment_id = p.payment_id
+JOIN clients c ON p.client_id = c.client_id
+WHERE p.is_split_payment = 1;
@@ -0,0 +1,300 @@
+-- 009: Per-table change counters for conditional GET (ETag / If-None-Match).
+-- Every insert, update or delete on a data table bumps that table's row in
+-- table_versions, including changes made by other triggers (the payment
+-- period and ledger maintenance) and by other processes. A GET route's
+-- ETag is derived from the versions of the tables it reads
+-- (app/http_cache.py), so an unchanged poll is answered with 304 after one
+-- lookup in this table instead of running the route's queries.
+-- The counters are per row changed; only equality matters, not the value.
+
+CREATE TABLE table_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+INSERT INTO table_versions (table_name) VALUES
+    ('client_folders'),
+    ('client_providers'),
+    ('clients'),
+    ('contacts'),
+    ('contracts'),
+    ('date_dimension'),
+    ('document_clients'),
+    ('document_payments'),
+    ('documents'),
+    ('expected_periods'),
+    ('missing_periods'),
+    ('payment_periods'),
+    ('payments'),
+    ('period_ledger_horizon'),
+    ('providers');
+
+CREATE TRIGGER trg_client_folders_version_insert
+AFTER INSERT ON client_folders
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'client_folders';
+END;
+
+CREATE TRIGGER trg_client_folders_version_update
+AFTER UPDATE ON client_folders
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'client_folders';
+END;
+
+CREATE TRIGGER trg_client_folders_version_delete
+AFTER DELETE ON client_folders
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'client_folders';
+END;
+
+CREATE TRIGGER trg_client_providers_version_insert
+AFTER INSERT ON client_providers
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'client_providers';
+END;
+
+CREATE TRIGGER trg_client_providers_version_update
+AFTER UPDATE ON client_providers
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'client_providers';
+END;
+
+CREATE TRIGGER trg_client_providers_version_delete
+AFTER DELETE ON client_providers
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'client_providers';
+END;
+
+CREATE TRIGGER trg_clients_version_insert
+AFTER INSERT ON clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'clients';
+END;
+
+CREATE TRIGGER trg_clients_version_update
+AFTER UPDATE ON clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'clients';
+END;
+
+CREATE TRIGGER trg_clients_version_delete
+AFTER DELETE ON clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'clients';
+END;
+
+CREATE TRIGGER trg_contacts_version_insert
+AFTER INSERT ON contacts
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'contacts';
+END;
+
+CREATE TRIGGER trg_contacts_version_update
+AFTER UPDATE ON contacts
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'contacts';
+END;
+
+CREATE TRIGGER trg_contacts_version_delete
+AFTER DELETE ON contacts
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'contacts';
+END;
+
+CREATE TRIGGER trg_contracts_version_insert
+AFTER INSERT ON contracts
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'contracts';
+END;
+
+CREATE TRIGGER trg_contracts_version_update
+AFTER UPDATE ON contracts
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'contracts';
+END;
+
+CREATE TRIGGER trg_contracts_version_delete
+AFTER DELETE ON contracts
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'contracts';
+END;
+
+CREATE TRIGGER trg_date_dimension_version_insert
+AFTER INSERT ON date_dimension
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'date_dimension';
+END;
+
+CREATE TRIGGER trg_date_dimension_version_update
+AFTER UPDATE ON date_dimension
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'date_dimension';
+END;
+
+CREATE TRIGGER trg_date_dimension_version_delete
+AFTER DELETE ON date_dimension
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'date_dimension';
+END;
+
+CREATE TRIGGER trg_document_clients_version_insert
+AFTER INSERT ON document_clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'document_clients';
+END;
+
+CREATE TRIGGER trg_document_clients_version_update
+AFTER UPDATE ON document_clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'document_clients';
+END;
+
+CREATE TRIGGER trg_document_clients_version_delete
+AFTER DELETE ON document_clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'document_clients';
+END;
+
+CREATE TRIGGER trg_document_payments_version_insert
+AFTER INSERT ON document_payments
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'document_payments';
+END;
+
+CREATE TRIGGER trg_document_payments_version_update
+AFTER UPDATE ON document_payments
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'document_payments';
+END;
+
+CREATE TRIGGER trg_document_payments_version_delete
+AFTER DELETE ON document_payments
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'document_payments';
+END;
+
+CREATE TRIGGER trg_documents_version_insert
+AFTER INSERT ON documents
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'documents';
+END;
+
+CREATE TRIGGER trg_documents_version_update
+AFTER UPDATE ON documents
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'documents';
+END;
+
+CREATE TRIGGER trg_documents_version_delete
+AFTER DELETE ON documents
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'documents';
+END;
+
+CREATE TRIGGER trg_expected_periods_version_insert
+AFTER INSERT ON expected_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'expected_periods';
+END;
+
+CREATE TRIGGER trg_expected_periods_version_update
+AFTER UPDATE ON expected_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'expected_periods';
+END;
+
+CREATE TRIGGER trg_expected_periods_version_delete
+AFTER DELETE ON expected_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'expected_periods';
+END;
+
+CREATE TRIGGER trg_missing_periods_version_insert
+AFTER INSERT ON missing_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'missing_periods';
+END;
+
+CREATE TRIGGER trg_missing_periods_version_update
+AFTER UPDATE ON missing_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'missing_periods';
+END;
+
+CREATE TRIGGER trg_missing_periods_version_delete
+AFTER DELETE ON missing_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'missing_periods';
+END;
+
+CREATE TRIGGER trg_payment_periods_version_insert
+AFTER INSERT ON payment_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'payment_periods';
+END;
+
+CREATE TRIGGER trg_payment_periods_version_update
+AFTER UPDATE ON payment_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'payment_periods';
+END;
+
+CREATE TRIGGER trg_payment_periods_version_delete
+AFTER DELETE ON payment_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'payment_periods';
+END;
+
+CREATE TRIGGER trg_payments_version_insert
+AFTER INSERT ON payments
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'payments';
+END;
+
+CREATE TRIGGER trg_payments_version_update
+AFTER UPDATE ON payments
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'payments';
+END;
+
+CREATE TRIGGER trg_payments_version_delete
+AFTER DELETE ON payments
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'payments';
+END;
+
+CREATE TRIGGER trg_period_ledger_horizon_version_insert
+AFTER INSERT ON period_ledger_horizon
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'period_ledger_horizon';
+END;
+
+CREATE TRIGGER trg_period_ledger_horizon_version_update
+AFTER UPDATE ON period_ledger_horizon
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'period_ledger_horizon';
+END;
+
+CREATE TRIGGER trg_period_ledger_horizon_version_delete
+AFTER DELETE ON period_ledger_horizon
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'period_ledger_horizon';
+END;
+
+CREATE TRIGGER trg_providers_version_insert
+AFTER INSERT ON providers
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'providers';
+END;
+
+CREATE TRIGGER trg_providers_version_update
+AFTER UPDATE ON providers
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'providers';
+END;
+
+CREATE TRIGGER trg_providers_version_delete
+AFTER DELETE ON providers
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'providers';
+END;
@@ -56,7 +56,7 @@ CREATE TABLE "contracts" (
   is_active INTEGER NOT NULL DEFAULT 1
 );
 -- date_dimension
-CREATE TABLE date_dimension (
+CREATE TABLE "date_dimension" (
   period_date TEXT PRIMARY KEY,            -- YYYY-MM-DD for first day of period
   year INTEGER NOT NULL,                   -- Year component (YYYY)
   month INTEGER,                           -- Month component (1-12)
@@ -65,11 +65,7 @@ CREATE TABLE date_dimension (
   period_key_monthly INTEGER NOT NULL,     -- YYYYMM format
   period_key_quarterly INTEGER NOT NULL,   -- YYYYQ format
   display_label_monthly TEXT NOT NULL,     -- "Jan 2023", etc.
-  display_label_quarterly TEXT NOT NULL,   -- "Q1 2023", etc.
-  is_current_monthly INTEGER DEFAULT 0,    -- 1 if this is current monthly period (today-1 month)
-  is_current_quarterly INTEGER DEFAULT 0,  -- 1 if this is current quarterly period (today-1 quarter)
-  is_previous_month INTEGER DEFAULT 0,     -- For easy filtering
-  is_previous_quarter INTEGER DEFAULT 0    -- For easy filtering
+  display_label_quarterly TEXT NOT NULL    -- "Q1 2023", etc.
 );
 -- document_clients
 CREATE TABLE document_clients (
@@ -102,6 +98,33 @@ CREATE TABLE documents (
     uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (provider_id) REFERENCES providers(provider_id)
 );
+-- expected_periods
+CREATE TABLE expected_periods (
+    client_id INTEGER NOT NULL,
+    payment_schedule TEXT NOT NULL,   -- 'monthly' or 'quarterly'
+    period_key INTEGER NOT NULL,      -- YYYYMM or YYYYQ
+    period_key_monthly INTEGER NOT NULL,
+    period_key_quarterly INTEGER NOT NULL,
+    period_label TEXT NOT NULL,       -- "Jan 2023" or "Q1 2023"
+    PRIMARY KEY (client_id, payment_schedule, period_key)
+) WITHOUT ROWID;
+-- missing_periods
+CREATE TABLE missing_periods (
+    client_id INTEGER NOT NULL,
+    payment_schedule TEXT NOT NULL,
+    period_key INTEGER NOT NULL,
+    period_label TEXT NOT NULL,
+    PRIMARY KEY (client_id, payment_schedule, period_key)
+) WITHOUT ROWID;
+-- payment_periods
+CREATE TABLE payment_periods (
+    client_id INTEGER NOT NULL,
+    payment_schedule TEXT NOT NULL,   -- 'monthly' or 'quarterly'
+    period_key INTEGER NOT NULL,      -- YYYYMM or YYYYQ
+    payment_id INTEGER NOT NULL,
+    period_label TEXT NOT NULL,       -- "Jan 2023" or "Q1 2023"
+    PRIMARY KEY (client_id, payment_schedule, period_key, payment_id)
+) WITHOUT ROWID;
 -- payments
 CREATE TABLE "payments" (
 	"payment_id"	INTEGER NOT NULL,
@@ -121,11 +144,17 @@ CREATE TABLE "payments" (
 	"applied_start_quarter"	INTEGER,
 	"applied_start_quarter_year"	INTEGER,
 	"applied_end_quarter"	INTEGER,
-	"applied_end_quarter_year"	INTEGER,
+	"applied_end_quarter_year"	INTEGER, start_period_key INTEGER, end_period_key INTEGER, periods_covered INTEGER,
 	PRIMARY KEY("payment_id" AUTOINCREMENT),
 	FOREIGN KEY("client_id") REFERENCES "clients"("client_id") ON DELETE CASCADE,
 	FOREIGN KEY("contract_id") REFERENCES "contracts"("contract_id") ON DELETE CASCADE
 );
+-- period_ledger_horizon
+CREATE TABLE period_ledger_horizon (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    monthly_key INTEGER NOT NULL,     -- YYYYMM of the last monthly period in the ledger
+    quarterly_key INTEGER NOT NULL    -- YYYYQ of the last quarterly period in the ledger
+);
 -- providers
 CREATE TABLE "providers" (
   provider_id INTEGER PRIMARY KEY,
@@ -133,7 +162,15 @@ CREATE TABLE "providers" (
   valid_from DATETIME DEFAULT CURRENT_TIMESTAMP,
   valid_to DATETIME
 );
+-- table_versions
+CREATE TABLE table_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
 -- VIEW DEFINITIONS
+-- period_ledger_refresh
+CREATE VIEW period_ledger_refresh AS
+SELECT NULL AS client_id WHERE 0;
 -- v_active_contracts
 CREATE VIEW v_active_contracts AS
 SELECT
@@ -142,20 +179,107 @@ FROM contracts c
 WHERE is_active = 1 AND valid_to IS NULL;
 -- v_all_missing_payment_periods
 CREATE VIEW v_all_missing_payment_periods AS
-SELECT
-  e.client_id,
-  e.payment_schedule,
-  e.period_key,
-  e.period_label,
-  'Missing' AS status
-FROM v_client_expected_periods e
-LEFT JOIN v_expanded_payment_periods p ON
-  e.client_id = p.client_id AND
-  e.period_key = p.period_key AND
-  e.payment_schedule = p.payment_schedule
-WHERE p.payment_id IS NULL;
+SELECT u.*
+FROM v_client_unpaid_periods u
+CROSS JOIN v_current_period cp
+WHERE (u.payment_schedule = 'monthly' AND u.period_key <= cp.current_monthly_key)
+   OR (u.payment_schedule = 'quarterly' AND u.period_key <= cp.current_quarterly_key);
 -- v_client_expected_periods
 CREATE VIEW v_client_expected_periods AS
+SELECT e.*
+FROM v_client_schedule_periods e
+CROSS JOIN v_current_period cp
+WHERE (e.payment_schedule = 'monthly' AND e.period_key <= cp.current_monthly_key)
+   OR (e.payment_schedule = 'quarterly' AND e.period_key <= cp.current_quarterly_key);
+-- v_client_payment_first
+CREATE VIEW v_client_payment_first AS
+SELECT
+  f.client_id,
+  f.display_name,
+  p.payment_id AS first_payment_id,
+  p.received_date AS first_payment_date,
+  p.actual_fee AS first_payment_amount,
+  p.method AS first_payment_method,
+  p.total_assets AS first_payment_assets,
+  CASE
+    WHEN ct.payment_schedule = 'monthly' THEN p.applied_start_month_year * 100 + p.applied_start_month
+    ELSE p.applied_start_quarter_year * 10 + p.applied_start_quarter
+  END AS first_payment_period_key,
+  CASE
+    WHEN ct.contract_id IS NULL THEN NULL
+    WHEN ct.payment_schedule = 'monthly' THEN
+      (SELECT display_label_monthly FROM date_dimension
+       WHERE period_key_monthly = p.applied_start_month_year * 100 + p.applied_start_month
+       LIMIT 1)
+    ELSE
+      (SELECT display_label_quarterly FROM date_dimension
+       WHERE period_key_quarterly = p.applied_start_quarter_year * 10 + p.applied_start_quarter
+       LIMIT 1)
+  END AS first_payment_period
+FROM (
+  SELECT
+    c.client_id,
+    c.display_name,
+    (SELECT p2.payment_id
+     FROM payments p2
+     WHERE p2.client_id = c.client_id AND p2.valid_to IS NULL
+     ORDER BY p2.received_date ASC, p2.payment_id ASC
+     LIMIT 1) AS payment_id,
+    (SELECT ct2.contract_id
+     FROM contracts ct2
+     WHERE ct2.client_id = c.client_id AND ct2.is_active = 1 AND ct2.valid_to IS NULL
+     LIMIT 1) AS contract_id
+  FROM clients c
+  WHERE c.valid_to IS NULL
+) f
+JOIN payments p ON p.payment_id = f.payment_id
+LEFT JOIN contracts ct ON ct.contract_id = f.contract_id;
+-- v_client_payment_last
+CREATE VIEW v_client_payment_last AS
+SELECT
+  l.client_id,
+  l.display_name,
+  p.payment_id AS last_payment_id,
+  p.received_date AS last_payment_date,
+  p.actual_fee AS last_payment_amount,
+  p.method AS last_payment_method,
+  p.total_assets AS last_payment_assets,
+  CASE
+    WHEN ct.payment_schedule = 'monthly' THEN p.applied_start_month_year * 100 + p.applied_start_month
+    ELSE p.applied_start_quarter_year * 10 + p.applied_start_quarter
+  END AS last_payment_period_key,
+  CASE
+    WHEN ct.contract_id IS NULL THEN NULL
+    WHEN ct.payment_schedule = 'monthly' THEN
+      (SELECT display_label_monthly FROM date_dimension
+       WHERE period_key_monthly = p.applied_start_month_year * 100 + p.applied_start_month
+       LIMIT 1)
+    ELSE
+      (SELECT display_label_quarterly FROM date_dimension
+       WHERE period_key_quarterly = p.applied_start_quarter_year * 10 + p.applied_start_quarter
+       LIMIT 1)
+  END AS last_payment_period,
+  JULIANDAY(CURRENT_DATE) - JULIANDAY(p.received_date) AS days_since_last_payment
+FROM (
+  SELECT
+    c.client_id,
+    c.display_name,
+    (SELECT p2.payment_id
+     FROM payments p2
+     WHERE p2.client_id = c.client_id AND p2.valid_to IS NULL
+     ORDER BY p2.received_date DESC, p2.payment_id DESC
+     LIMIT 1) AS payment_id,
+    (SELECT ct2.contract_id
+     FROM contracts ct2
+     WHERE ct2.client_id = c.client_id AND ct2.is_active = 1 AND ct2.valid_to IS NULL
+     LIMIT 1) AS contract_id
+  FROM clients c
+  WHERE c.valid_to IS NULL
+) l
+JOIN payments p ON p.payment_id = l.payment_id
+LEFT JOIN contracts ct ON ct.contract_id = l.contract_id;
+-- v_client_schedule_periods
+CREATE VIEW v_client_schedule_periods AS
 WITH
   -- Get first payment or client start date, whichever is earlier
   client_start AS (
@@ -176,23 +300,10 @@ WITH
     SELECT
       cs.client_id,
       cs.payment_schedule,
-      cs.start_date,
       CAST(strftime('%Y', cs.start_date) AS INTEGER) AS start_year,
       CAST(strftime('%m', cs.start_date) AS INTEGER) AS start_month,
-      CASE
-        WHEN CAST(strftime('%m', cs.start_date) AS INTEGER) <= 3 THEN 1
-        WHEN CAST(strftime('%m', cs.start_date) AS INTEGER) <= 6 THEN 2
-        WHEN CAST(strftime('%m', cs.start_date) AS INTEGER) <= 9 THEN 3
-        ELSE 4
-      END AS start_quarter
+      (CAST(strftime('%m', cs.start_date) AS INTEGER) + 2) / 3 AS start_quarter
     FROM client_start cs
-  ),
-  -- Get current period information
-  current_period AS (
-    SELECT
-      current_monthly_key,
-      current_quarterly_key
-    FROM v_current_period
   )
 SELECT
   di.client_id,
@@ -208,161 +319,28 @@ SELECT
     ELSE dd.display_label_quarterly
   END AS period_label
 FROM date_info di
-CROSS JOIN date_dimension dd
-CROSS JOIN current_period cp
-WHERE
-  -- Include only relevant periods based on payment schedule
-  (
-    (di.payment_schedule = 'monthly') OR
-    (di.payment_schedule = 'quarterly' AND dd.month IN (1, 4, 7, 10))
-  )
-  -- Include periods from client start to current period
-  AND (
-    (di.payment_schedule = 'monthly' AND
-     dd.period_key_monthly >= (di.start_year * 100 + di.start_month) AND
-     dd.period_key_monthly <= cp.current_monthly_key)
-    OR
-    (di.payment_schedule = 'quarterly' AND
-     dd.period_key_quarterly >= (di.start_year * 10 + di.start_quarter) AND
-     dd.period_key_quarterly <= cp.current_quarterly_key AND
-     dd.month IN (1, 4, 7, 10))
-  );
--- v_client_payment_first
-CREATE VIEW v_client_payment_first AS
-SELECT
-  c.client_id,
-  c.display_name,
-  MIN(p.payment_id) AS first_payment_id,
-  MIN(p.received_date) AS first_payment_date,
-  (SELECT p2.actual_fee
-   FROM payments p2
-   WHERE p2.client_id = c.client_id
-   AND p2.valid_to IS NULL
-   ORDER BY p2.received_date ASC
-   LIMIT 1) AS first_payment_amount,
-  (SELECT p2.method
-   FROM payments p2
-   WHERE p2.client_id = c.client_id
-   AND p2.valid_to IS NULL
-   ORDER BY p2.received_date ASC
-   LIMIT 1) AS first_payment_method,
-  (SELECT p2.total_assets
-   FROM payments p2
-   WHERE p2.client_id = c.client_id
-   AND p2.valid_to IS NULL
-   ORDER BY p2.received_date ASC
-   LIMIT 1) AS first_payment_assets,
-  CASE
-    WHEN (SELECT payment_schedule FROM contracts WHERE client_id = c.client_id AND is_active = 1 AND valid_to IS NULL LIMIT 1) = 'monthly' THEN
-      (SELECT p2.applied_start_month_year * 100 + p2.applied_start_month
-       FROM payments p2
-       WHERE p2.client_id = c.client_id
-       AND p2.valid_to IS NULL
-       ORDER BY p2.received_date ASC
-       LIMIT 1)
-    ELSE
-      (SELECT p2.applied_start_quarter_year * 10 + p2.applied_start_quarter
-       FROM payments p2
-       WHERE p2.client_id = c.client_id
-       AND p2.valid_to IS NULL
-       ORDER BY p2.received_date ASC
-       LIMIT 1)
-  END AS first_payment_period_key,
-  (SELECT
-     CASE
-       WHEN payment_schedule = 'monthly' THEN
-         (SELECT display_label_monthly
-          FROM date_dimension
-          WHERE period_key_monthly = (p2.applied_start_month_year * 100 + p2.applied_start_month)
-          LIMIT 1)
-       ELSE
-         (SELECT display_label_quarterly
-          FROM date_dimension
-          WHERE period_key_quarterly = (p2.applied_start_quarter_year * 10 + p2.applied_start_quarter)
-          LIMIT 1)
-     END
-   FROM payments p2
-   JOIN contracts ct ON p2.client_id = ct.client_id AND ct.is_active = 1 AND ct.valid_to IS NULL
-   WHERE p2.client_id = c.client_id
-   AND p2.valid_to IS NULL
-   ORDER BY p2.received_date ASC
-   LIMIT 1) AS first_payment_period
-FROM clients c
-LEFT JOIN payments p ON c.client_id = p.client_id AND p.valid_to IS NULL
-WHERE c.valid_to IS NULL
-GROUP BY c.client_id, c.display_name
-HAVING COUNT(p.payment_id) > 0;
--- v_client_payment_last
-CREATE VIEW v_client_payment_last AS
+JOIN date_dimension dd ON
+  (di.payment_schedule = 'monthly' AND
+   dd.period_key_monthly >= (di.start_year * 100 + di.start_month))
+  OR
+  (di.payment_schedule = 'quarterly' AND
+   dd.period_key_quarterly >= (di.start_year * 10 + di.start_quarter) AND
+   dd.month IN (1, 4, 7, 10));
+-- v_client_unpaid_periods
+CREATE VIEW v_client_unpaid_periods AS
 SELECT
-  c.client_id,
-  c.display_name,
-  (SELECT p2.payment_id
-   FROM payments p2
-   WHERE p2.client_id = c.client_id
-   AND p2.valid_to IS NULL
-   ORDER BY p2.received_date DESC
-   LIMIT 1) AS last_payment_id,
-  MAX(p.received_date) AS last_payment_date,
-  (SELECT p2.actual_fee
-   FROM payments p2
-   WHERE p2.client_id = c.client_id
-   AND p2.valid_to IS NULL
-   ORDER BY p2.received_date DESC
-   LIMIT 1) AS last_payment_amount,
-  (SELECT p2.method
-   FROM payments p2
-   WHERE p2.client_id = c.client_id
-   AND p2.valid_to IS NULL
-   ORDER BY p2.received_date DESC
-   LIMIT 1) AS last_payment_method,
-  (SELECT p2.total_assets
-   FROM payments p2
-   WHERE p2.client_id = c.client_id
-   AND p2.valid_to IS NULL
-   ORDER BY p2.received_date DESC
-   LIMIT 1) AS last_payment_assets,
-  CASE
-    WHEN (SELECT payment_schedule FROM contracts WHERE client_id = c.client_id AND is_active = 1 AND valid_to IS NULL LIMIT 1) = 'monthly' THEN
-      (SELECT p2.applied_start_month_year * 100 + p2.applied_start_month
-       FROM payments p2
-       WHERE p2.client_id = c.client_id
-       AND p2.valid_to IS NULL
-       ORDER BY p2.received_date DESC
-       LIMIT 1)
-    ELSE
-      (SELECT p2.applied_start_quarter_year * 10 + p2.applied_start_quarter
-       FROM payments p2
-       WHERE p2.client_id = c.client_id
-       AND p2.valid_to IS NULL
-       ORDER BY p2.received_date DESC
-       LIMIT 1)
-  END AS last_payment_period_key,
-  (SELECT
-     CASE
-       WHEN payment_schedule = 'monthly' THEN
-         (SELECT display_label_monthly
-          FROM date_dimension
-          WHERE period_key_monthly = (p2.applied_start_month_year * 100 + p2.applied_start_month)
-          LIMIT 1)
-       ELSE
-         (SELECT display_label_quarterly
-          FROM date_dimension
-          WHERE period_key_quarterly = (p2.applied_start_quarter_year * 10 + p2.applied_start_quarter)
-          LIMIT 1)
-     END
-   FROM payments p2
-   JOIN contracts ct ON p2.client_id = ct.client_id AND ct.is_active = 1 AND ct.valid_to IS NULL
-   WHERE p2.client_id = c.client_id
-   AND p2.valid_to IS NULL
-   ORDER BY p2.received_date DESC
-   LIMIT 1) AS last_payment_period,
-  JULIANDAY(CURRENT_DATE) - JULIANDAY(MAX(p.received_date)) AS days_since_last_payment
-FROM clients c
-LEFT JOIN payments p ON c.client_id = p.client_id AND p.valid_to IS NULL
-WHERE c.valid_to IS NULL
-GROUP BY c.client_id, c.display_name
-HAVING COUNT(p.payment_id) > 0;
+  e.client_id,
+  e.payment_schedule,
+  e.period_key,
+  e.period_label,
+  'Missing' AS status
+FROM v_client_schedule_periods e
+WHERE NOT EXISTS (
+  SELECT 1 FROM payment_periods p
+  WHERE p.client_id = e.client_id
+    AND p.payment_schedule = e.payment_schedule
+    AND p.period_key = e.period_key
+);
 -- v_current_period
 CREATE VIEW v_current_period AS
 WITH current_info AS (
@@ -400,36 +378,80 @@ SELECT
   c.client_id,
   c.payment_schedule,
   CASE
-    WHEN c.payment_schedule = 'monthly' THEN dm.period_key_monthly
-    ELSE dq.period_key_quarterly
+    WHEN c.payment_schedule = 'monthly' THEN cp.current_monthly_key
+    ELSE cp.current_quarterly_key
   END AS period_key,
   CASE
     WHEN c.payment_schedule = 'monthly' THEN dm.display_label_monthly
     ELSE dq.display_label_quarterly
   END AS period_label,
   CASE
-    WHEN pe.payment_id IS NOT NULL THEN 'Paid'
+    WHEN EXISTS (
+      SELECT 1 FROM payment_periods pp
+      WHERE pp.client_id = c.client_id
+        AND pp.payment_schedule = c.payment_schedule
+        AND pp.period_key = CASE
+          WHEN c.payment_schedule = 'monthly' THEN cp.current_monthly_key
+          ELSE cp.current_quarterly_key
+        END
+    ) THEN 'Paid'
     ELSE 'Unpaid'
   END AS status
 FROM v_active_contracts c
-CROSS JOIN (
-  SELECT * FROM date_dimension WHERE is_current_monthly = 1
-) dm
-CROSS JOIN (
-  SELECT * FROM date_dimension WHERE is_current_quarterly = 1
-) dq
-LEFT JOIN v_expanded_payment_periods pe ON
-  c.client_id = pe.client_id AND
-  ((c.payment_schedule = 'monthly' AND pe.period_key = dm.period_key_monthly) OR
-   (c.payment_schedule = 'quarterly' AND pe.period_key = dq.period_key_quarterly));
+CROSS JOIN v_current_period cp
+JOIN date_dimension dm ON dm.period_key_monthly = cp.current_monthly_key
+JOIN date_dimension dq ON
+  dq.period_key_quarterly = cp.current_quarterly_key AND dq.month IN (1, 4, 7, 10);
 -- v_expanded_payment_periods
 CREATE VIEW v_expanded_payment_periods AS
+SELECT
+    payment_id,
+    client_id,
+    period_key,
+    payment_schedule
+FROM payment_periods;
+-- v_payment_period_coverage
+CREATE VIEW v_payment_period_coverage AS
 SELECT
     p.payment_id,
     p.client_id,
+    p.received_date,
+    p.actual_fee,
+    CASE
+      WHEN (p.applied_start_month != p.applied_end_month OR
+            p.applied_start_month_year != p.applied_end_month_year OR
+            p.applied_start_quarter != p.applied_end_quarter OR
+            p.applied_start_quarter_year != p.applied_end_quarter_year)
+           AND p.applied_end_month IS NOT NULL
+      THEN 1
+      ELSE 0
+    END AS is_split_payment,
+    CASE WHEN p.applied_start_month IS NOT NULL THEN
+        (SELECT GROUP_CONCAT(pp.period_key || '|' || pp.period_label, '; ')
+         FROM payment_periods pp
+         WHERE pp.payment_id = p.payment_id AND pp.payment_schedule = 'monthly')
+    ELSE NULL END AS covered_monthly_periods,
+    CASE WHEN p.applied_start_quarter IS NOT NULL THEN
+        (SELECT GROUP_CONCAT(pp.period_key || '|' || pp.period_label, '; ')
+         FROM payment_periods pp
+         WHERE pp.payment_id = p.payment_id AND pp.payment_schedule = 'quarterly')
+    ELSE NULL END AS covered_quarterly_periods,
+    p.periods_covered,
+    CASE
+        WHEN p.periods_covered > 1 THEN ROUND(p.actual_fee / p.periods_covered, 2)
+        ELSE p.actual_fee
+    END AS distributed_amount_per_period
+FROM payments p
+WHERE p.valid_to IS NULL;
+-- v_payment_period_source
+CREATE VIEW v_payment_period_source AS
+SELECT
+    p.client_id,
+    'monthly' AS payment_schedule,
     dd.period_key_monthly AS period_key,
-    'monthly' AS payment_schedule
-FROM v_payments p
+    p.payment_id,
+    dd.display_label_monthly AS period_label
+FROM payments p
 JOIN date_dimension dd ON
     dd.period_key_monthly BETWEEN
         (p.applied_start_month_year * 100 + p.applied_start_month) AND
@@ -437,100 +459,18 @@ JOIN date_dimension dd ON
 WHERE p.applied_start_month IS NOT NULL AND p.valid_to IS NULL
 UNION ALL
 SELECT
-    p.payment_id,
     p.client_id,
+    'quarterly' AS payment_schedule,
     dd.period_key_quarterly AS period_key,
-    'quarterly' AS payment_schedule
-FROM v_payments p
+    p.payment_id,
+    dd.display_label_quarterly AS period_label
+FROM payments p
 JOIN date_dimension dd ON
     dd.period_key_quarterly BETWEEN
         (p.applied_start_quarter_year * 10 + p.applied_start_quarter) AND
         (p.applied_end_quarter_year * 10 + p.applied_end_quarter)
     AND dd.month IN (1, 4, 7, 10)
 WHERE p.applied_start_quarter IS NOT NULL AND p.valid_to IS NULL;
--- v_payment_period_coverage
-CREATE VIEW v_payment_period_coverage AS
-SELECT
-    p.payment_id,
-    p.client_id,
-    p.received_date,
-    p.actual_fee,
-    p.is_split_payment,
-    -- For monthly payments
-    CASE WHEN p.applied_start_month IS NOT NULL THEN
-        (SELECT GROUP_CONCAT(period_key_monthly || '|' || display_label_monthly, '; ')
-         FROM date_dimension
-         WHERE period_key_monthly BETWEEN
-             (p.applied_start_month_year * 100 + p.applied_start_month) AND
-             (p.applied_end_month_year * 100 + p.applied_end_month))
-    ELSE NULL END AS covered_monthly_periods,
-    -- For quarterly payments
-    CASE WHEN p.applied_start_quarter IS NOT NULL THEN
-        (SELECT GROUP_CONCAT(period_key_quarterly || '|' || display_label_quarterly, '; ')
-         FROM date_dimension
-         WHERE period_key_quarterly BETWEEN
-             (p.applied_start_quarter_year * 10 + p.applied_start_quarter) AND
-             (p.applied_end_quarter_year * 10 + p.applied_end_quarter)
-             AND month IN (1, 4, 7, 10))
-    ELSE NULL END AS covered_quarterly_periods,
-    -- Number of periods covered (for proration calculation)
-    CASE
-        WHEN p.applied_start_month IS NOT NULL THEN
-            (SELECT COUNT(*)
-             FROM date_dimension
-             WHERE period_key_monthly BETWEEN
-                 (p.applied_start_month_year * 100 + p.applied_start_month) AND
-                 (p.applied_end_month_year * 100 + p.applied_end_month))
-        WHEN p.applied_start_quarter IS NOT NULL THEN
-            (SELECT COUNT(*)
-             FROM date_dimension
-             WHERE period_key_quarterly BETWEEN
-                 (p.applied_start_quarter_year * 10 + p.applied_start_quarter) AND
-                 (p.applied_end_quarter_year * 10 + p.applied_end_quarter)
-                 AND month IN (1, 4, 7, 10))
-        ELSE 1
-    END AS periods_covered,
-    -- NEW: Distributed amount per period
-    CASE
-        WHEN (
-            CASE
-                WHEN p.applied_start_month IS NOT NULL THEN
-                    (SELECT COUNT(*)
-                    FROM date_dimension
-                    WHERE period_key_monthly BETWEEN
-                        (p.applied_start_month_year * 100 + p.applied_start_month) AND
-                        (p.applied_end_month_year * 100 + p.applied_end_month))
-                WHEN p.applied_start_quarter IS NOT NULL THEN
-                    (SELECT COUNT(*)
-                    FROM date_dimension
-                    WHERE period_key_quarterly BETWEEN
-                        (p.applied_start_quarter_year * 10 + p.applied_start_quarter) AND
-                        (p.applied_end_quarter_year * 10 + p.applied_end_quarter)
-                        AND month IN (1, 4, 7, 10))
-                ELSE 1
-            END
-        ) > 1 THEN ROUND(p.actual_fee / (
-            CASE
-                WHEN p.applied_start_month IS NOT NULL THEN
-                    (SELECT COUNT(*)
-                    FROM date_dimension
-                    WHERE period_key_monthly BETWEEN
-                        (p.applied_start_month_year * 100 + p.applied_start_month) AND
-                        (p.applied_end_month_year * 100 + p.applied_end_month))
-                WHEN p.applied_start_quarter IS NOT NULL THEN
-                    (SELECT COUNT(*)
-                    FROM date_dimension
-                    WHERE period_key_quarterly BETWEEN
-                        (p.applied_start_quarter_year * 10 + p.applied_start_quarter) AND
-                        (p.applied_end_quarter_year * 10 + p.applied_end_quarter)
-                        AND month IN (1, 4, 7, 10))
-                ELSE 1
-            END
-        ), 2)
-        ELSE p.actual_fee
-    END AS distributed_amount_per_period
-FROM v_payments p
-WHERE p.valid_to IS NULL;
 -- v_payments
 CREATE VIEW v_payments AS
 SELECT
@@ -559,34 +499,10 @@ LEFT JOIN date_dimension dm ON
   (p.applied_start_month_year * 100 + p.applied_start_month) = dm.period_key_monthly
 LEFT JOIN date_dimension dq ON
   (p.applied_start_quarter_year * 10 + p.applied_start_quarter) = dq.period_key_quarterly
+  AND dq.month IN (1, 4, 7, 10)
 WHERE p.valid_to IS NULL;
 -- v_split_payment_distribution
 CREATE VIEW v_split_payment_distribution AS
--- Monthly periods
-SELECT
-    p.payment_id,
-    p.client_id,
-    c.display_name AS client_name,
-    p.received_date,
-    p.actual_fee AS total_payment_amount,
-    1 AS is_split_payment,
-    COUNT(*) OVER (PARTITION BY p.payment_id) AS total_periods_covered,
-    dd.period_key_monthly AS period_key,
-    dd.display_label_monthly AS period_label,
-    'monthly' AS payment_schedule,
-    ROUND(p.actual_fee / COUNT(*) OVER (PARTITION BY p.payment_id), 2) AS distributed_amount
-FROM v_payments p
-JOIN clients c ON p.client_id = c.client_id
-JOIN date_dimension dd ON
-    dd.period_key_monthly BETWEEN
-    (p.applied_start_month_year * 100 + p.applied_start_month) AND
-    (p.applied_end_month_year * 100 + p.applied_end_month)
-WHERE
-    p.applied_start_month IS NOT NULL
-    AND p.valid_to IS NULL
-    AND p.is_split_payment = 1
-UNION ALL
--- Quarterly periods
 SELECT
     p.payment_id,
     p.client_id,
@@ -594,23 +510,512 @@ SELECT
     p.received_date,
     p.actual_fee AS total_payment_amount,
     1 AS is_split_payment,
-    COUNT(*) OVER (PARTITION BY p.payment_id) AS total_periods_covered,
-    dd.period_key_quarterly AS period_key,
-    dd.display_label_quarterly AS period_label,
-    'quarterly' AS payment_schedule,
-    ROUND(p.actual_fee / COUNT(*) OVER (PARTITION BY p.payment_id), 2) AS distributed_amount
+    (SELECT COUNT(*) FROM payment_periods x
+     WHERE x.payment_id = pp.payment_id AND x.payment_schedule = pp.payment_schedule) AS total_periods_covered,
+    pp.period_key,
+    pp.period_label,
+    pp.payment_schedule,
+    ROUND(p.actual_fee / (
+        SELECT COUNT(*) FROM payment_periods x
+        WHERE x.payment_id = pp.payment_id AND x.payment_schedule = pp.payment_schedule
+    ), 2) AS distributed_amount
 FROM v_payments p
+CROSS JOIN payment_periods pp ON pp.payment_id = p.payment_id
 JOIN clients c ON p.client_id = c.client_id
-JOIN date_dimension dd ON
-    dd.period_key_quarterly BETWEEN
-    (p.applied_start_quarter_year * 10 + p.applied_start_quarter) AND
-    (p.applied_end_quarter_year * 10 + p.applied_end_quarter)
-    AND dd.month IN (1, 4, 7, 10)
-WHERE
-    p.applied_start_quarter IS NOT NULL
-    AND p.valid_to IS NULL
-    AND p.is_split_payment = 1;
+WHERE p.is_split_payment = 1;
+-- TRIGGER DEFINITIONS
+-- trg_client_folders_version_delete
+CREATE TRIGGER trg_client_folders_version_delete
+AFTER DELETE ON client_folders
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'client_folders';
+END;
+-- trg_client_folders_version_insert
+CREATE TRIGGER trg_client_folders_version_insert
+AFTER INSERT ON client_folders
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'client_folders';
+END;
+-- trg_client_folders_version_update
+CREATE TRIGGER trg_client_folders_version_update
+AFTER UPDATE ON client_folders
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'client_folders';
+END;
+-- trg_client_providers_ledger_delete
+CREATE TRIGGER trg_client_providers_ledger_delete
+AFTER DELETE ON client_providers
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (OLD.client_id);
+END;
+-- trg_client_providers_ledger_insert
+CREATE TRIGGER trg_client_providers_ledger_insert
+AFTER INSERT ON client_providers
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (NEW.client_id);
+END;
+-- trg_client_providers_ledger_update
+CREATE TRIGGER trg_client_providers_ledger_update
+AFTER UPDATE OF client_id, start_date ON client_providers
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (OLD.client_id);
+    INSERT INTO period_ledger_refresh (client_id)
+    SELECT NEW.client_id WHERE NEW.client_id != OLD.client_id;
+END;
+-- trg_client_providers_version_delete
+CREATE TRIGGER trg_client_providers_version_delete
+AFTER DELETE ON client_providers
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'client_providers';
+END;
+-- trg_client_providers_version_insert
+CREATE TRIGGER trg_client_providers_version_insert
+AFTER INSERT ON client_providers
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'client_providers';
+END;
+-- trg_client_providers_version_update
+CREATE TRIGGER trg_client_providers_version_update
+AFTER UPDATE ON client_providers
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'client_providers';
+END;
+-- trg_clients_version_delete
+CREATE TRIGGER trg_clients_version_delete
+AFTER DELETE ON clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'clients';
+END;
+-- trg_clients_version_insert
+CREATE TRIGGER trg_clients_version_insert
+AFTER INSERT ON clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'clients';
+END;
+-- trg_clients_version_update
+CREATE TRIGGER trg_clients_version_update
+AFTER UPDATE ON clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'clients';
+END;
+-- trg_contacts_version_delete
+CREATE TRIGGER trg_contacts_version_delete
+AFTER DELETE ON contacts
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'contacts';
+END;
+-- trg_contacts_version_insert
+CREATE TRIGGER trg_contacts_version_insert
+AFTER INSERT ON contacts
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'contacts';
+END;
+-- trg_contacts_version_update
+CREATE TRIGGER trg_contacts_version_update
+AFTER UPDATE ON contacts
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'contacts';
+END;
+-- trg_contracts_ledger_delete
+CREATE TRIGGER trg_contracts_ledger_delete
+AFTER DELETE ON contracts
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (OLD.client_id);
+END;
+-- trg_contracts_ledger_insert
+CREATE TRIGGER trg_contracts_ledger_insert
+AFTER INSERT ON contracts
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (NEW.client_id);
+END;
+-- trg_contracts_ledger_update
+CREATE TRIGGER trg_contracts_ledger_update
+AFTER UPDATE OF client_id, payment_schedule, is_active, valid_to ON contracts
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (OLD.client_id);
+    INSERT INTO period_ledger_refresh (client_id)
+    SELECT NEW.client_id WHERE NEW.client_id != OLD.client_id;
+END;
+-- trg_contracts_version_delete
+CREATE TRIGGER trg_contracts_version_delete
+AFTER DELETE ON contracts
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'contracts';
+END;
+-- trg_contracts_version_insert
+CREATE TRIGGER trg_contracts_version_insert
+AFTER INSERT ON contracts
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'contracts';
+END;
+-- trg_contracts_version_update
+CREATE TRIGGER trg_contracts_version_update
+AFTER UPDATE ON contracts
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'contracts';
+END;
+-- trg_date_dimension_version_delete
+CREATE TRIGGER trg_date_dimension_version_delete
+AFTER DELETE ON date_dimension
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'date_dimension';
+END;
+-- trg_date_dimension_version_insert
+CREATE TRIGGER trg_date_dimension_version_insert
+AFTER INSERT ON date_dimension
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'date_dimension';
+END;
+-- trg_date_dimension_version_update
+CREATE TRIGGER trg_date_dimension_version_update
+AFTER UPDATE ON date_dimension
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'date_dimension';
+END;
+-- trg_document_clients_version_delete
+CREATE TRIGGER trg_document_clients_version_delete
+AFTER DELETE ON document_clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'document_clients';
+END;
+-- trg_document_clients_version_insert
+CREATE TRIGGER trg_document_clients_version_insert
+AFTER INSERT ON document_clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'document_clients';
+END;
+-- trg_document_clients_version_update
+CREATE TRIGGER trg_document_clients_version_update
+AFTER UPDATE ON document_clients
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'document_clients';
+END;
+-- trg_document_payments_version_delete
+CREATE TRIGGER trg_document_payments_version_delete
+AFTER DELETE ON document_payments
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'document_payments';
+END;
+-- trg_document_payments_version_insert
+CREATE TRIGGER trg_document_payments_version_insert
+AFTER INSERT ON document_payments
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'document_payments';
+END;
+-- trg_document_payments_version_update
+CREATE TRIGGER trg_document_payments_version_update
+AFTER UPDATE ON document_payments
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'document_payments';
+END;
+-- trg_documents_version_delete
+CREATE TRIGGER trg_documents_version_delete
+AFTER DELETE ON documents
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'documents';
+END;
+-- trg_documents_version_insert
+CREATE TRIGGER trg_documents_version_insert
+AFTER INSERT ON documents
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'documents';
+END;
+-- trg_documents_version_update
+CREATE TRIGGER trg_documents_version_update
+AFTER UPDATE ON documents
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'documents';
+END;
+-- trg_expected_periods_version_delete
+CREATE TRIGGER trg_expected_periods_version_delete
+AFTER DELETE ON expected_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'expected_periods';
+END;
+-- trg_expected_periods_version_insert
+CREATE TRIGGER trg_expected_periods_version_insert
+AFTER INSERT ON expected_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'expected_periods';
+END;
+-- trg_expected_periods_version_update
+CREATE TRIGGER trg_expected_periods_version_update
+AFTER UPDATE ON expected_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'expected_periods';
+END;
+-- trg_missing_periods_version_delete
+CREATE TRIGGER trg_missing_periods_version_delete
+AFTER DELETE ON missing_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'missing_periods';
+END;
+-- trg_missing_periods_version_insert
+CREATE TRIGGER trg_missing_periods_version_insert
+AFTER INSERT ON missing_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'missing_periods';
+END;
+-- trg_missing_periods_version_update
+CREATE TRIGGER trg_missing_periods_version_update
+AFTER UPDATE ON missing_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'missing_periods';
+END;
+-- trg_payment_periods_ledger_delete
+CREATE TRIGGER trg_payment_periods_ledger_delete
+AFTER DELETE ON payment_periods
+BEGIN
+    INSERT OR IGNORE INTO missing_periods (client_id, payment_schedule, period_key, period_label)
+    SELECT e.client_id, e.payment_schedule, e.period_key, e.period_label
+    FROM expected_periods e
+    WHERE e.client_id = OLD.client_id
+      AND e.payment_schedule = OLD.payment_schedule
+      AND e.period_key = OLD.period_key
+      AND NOT EXISTS (
+        SELECT 1 FROM payment_periods pp
+        WHERE pp.client_id = OLD.client_id
+          AND pp.payment_schedule = OLD.payment_schedule
+          AND pp.period_key = OLD.period_key
+      );
+END;
+-- trg_payment_periods_ledger_insert
+CREATE TRIGGER trg_payment_periods_ledger_insert
+AFTER INSERT ON payment_periods
+BEGIN
+    DELETE FROM missing_periods
+    WHERE client_id = NEW.client_id
+      AND payment_schedule = NEW.payment_schedule
+      AND period_key = NEW.period_key;
+END;
+-- trg_payment_periods_version_delete
+CREATE TRIGGER trg_payment_periods_version_delete
+AFTER DELETE ON payment_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'payment_periods';
+END;
+-- trg_payment_periods_version_insert
+CREATE TRIGGER trg_payment_periods_version_insert
+AFTER INSERT ON payment_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'payment_periods';
+END;
+-- trg_payment_periods_version_update
+CREATE TRIGGER trg_payment_periods_version_update
+AFTER UPDATE ON payment_periods
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'payment_periods';
+END;
+-- trg_payments_ledger_delete
+CREATE TRIGGER trg_payments_ledger_delete
+AFTER DELETE ON payments
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (OLD.client_id);
+END;
+-- trg_payments_ledger_insert
+CREATE TRIGGER trg_payments_ledger_insert
+AFTER INSERT ON payments
+WHEN NEW.received_date < COALESCE(
+    (SELECT MIN(received_date) FROM payments
+     WHERE client_id = NEW.client_id AND payment_id != NEW.payment_id),
+    '9999-12-31')
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (NEW.client_id);
+END;
+-- trg_payments_ledger_update
+CREATE TRIGGER trg_payments_ledger_update
+AFTER UPDATE OF client_id, received_date ON payments
+WHEN OLD.client_id != NEW.client_id OR OLD.received_date IS NOT NEW.received_date
+BEGIN
+    INSERT INTO period_ledger_refresh (client_id) VALUES (OLD.client_id);
+    INSERT INTO period_ledger_refresh (client_id)
+    SELECT NEW.client_id WHERE NEW.client_id != OLD.client_id;
+END;
+-- trg_payments_period_columns_insert
+CREATE TRIGGER trg_payments_period_columns_insert
+AFTER INSERT ON payments
+BEGIN
+    UPDATE payments SET
+        start_period_key = CASE
+            WHEN applied_start_month IS NOT NULL THEN applied_start_month_year * 100 + applied_start_month
+            WHEN applied_start_quarter IS NOT NULL THEN applied_start_quarter_year * 10 + applied_start_quarter
+        END,
+        end_period_key = CASE
+            WHEN applied_start_month IS NOT NULL THEN applied_end_month_year * 100 + applied_end_month
+            WHEN applied_start_quarter IS NOT NULL THEN applied_end_quarter_year * 10 + applied_end_quarter
+        END,
+        periods_covered = CASE
+            WHEN applied_start_month IS NOT NULL THEN MAX(0,
+                (applied_end_month_year * 12 + applied_end_month) -
+                (applied_start_month_year * 12 + applied_start_month) + 1)
+            WHEN applied_start_quarter IS NOT NULL THEN MAX(0,
+                (applied_end_quarter_year * 4 + applied_end_quarter) -
+                (applied_start_quarter_year * 4 + applied_start_quarter) + 1)
+            ELSE 1
+        END
+    WHERE payment_id = NEW.payment_id;
+END;
+-- trg_payments_period_columns_update
+CREATE TRIGGER trg_payments_period_columns_update
+AFTER UPDATE OF
+    applied_start_month, applied_start_month_year,
+    applied_end_month, applied_end_month_year,
+    applied_start_quarter, applied_start_quarter_year,
+    applied_end_quarter, applied_end_quarter_year
+ON payments
+BEGIN
+    UPDATE payments SET
+        start_period_key = CASE
+            WHEN applied_start_month IS NOT NULL THEN applied_start_month_year * 100 + applied_start_month
+            WHEN applied_start_quarter IS NOT NULL THEN applied_start_quarter_year * 10 + applied_start_quarter
+        END,
+        end_period_key = CASE
+            WHEN applied_start_month IS NOT NULL THEN applied_end_month_year * 100 + applied_end_month
+            WHEN applied_start_quarter IS NOT NULL THEN applied_end_quarter_year * 10 + applied_end_quarter
+        END,
+        periods_covered = CASE
+            WHEN applied_start_month IS NOT NULL THEN MAX(0,
+                (applied_end_month_year * 12 + applied_end_month) -
+                (applied_start_month_year * 12 + applied_start_month) + 1)
+            WHEN applied_start_quarter IS NOT NULL THEN MAX(0,
+                (applied_end_quarter_year * 4 + applied_end_quarter) -
+                (applied_start_quarter_year * 4 + applied_start_quarter) + 1)
+            ELSE 1
+        END
+    WHERE payment_id = NEW.payment_id;
+END;
+-- trg_payments_periods_delete
+CREATE TRIGGER trg_payments_periods_delete
+AFTER DELETE ON payments
+BEGIN
+    DELETE FROM payment_periods WHERE payment_id = OLD.payment_id;
+END;
+-- trg_payments_periods_insert
+CREATE TRIGGER trg_payments_periods_insert
+AFTER INSERT ON payments
+WHEN NEW.valid_to IS NULL
+BEGIN
+    INSERT INTO payment_periods (client_id, payment_schedule, period_key, payment_id, period_label)
+    SELECT client_id, payment_schedule, period_key, payment_id, period_label
+    FROM v_payment_period_source
+    WHERE payment_id = NEW.payment_id;
+END;
+-- trg_payments_periods_update
+CREATE TRIGGER trg_payments_periods_update
+AFTER UPDATE OF client_id, valid_to,
+    applied_start_month, applied_start_month_year, applied_end_month, applied_end_month_year,
+    applied_start_quarter, applied_start_quarter_year, applied_end_quarter, applied_end_quarter_year
+ON payments
+BEGIN
+    DELETE FROM payment_periods WHERE payment_id = OLD.payment_id;
+    INSERT INTO payment_periods (client_id, payment_schedule, period_key, payment_id, period_label)
+    SELECT client_id, payment_schedule, period_key, payment_id, period_label
+    FROM v_payment_period_source
+    WHERE payment_id = NEW.payment_id;
+END;
+-- trg_payments_version_delete
+CREATE TRIGGER trg_payments_version_delete
+AFTER DELETE ON payments
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'payments';
+END;
+-- trg_payments_version_insert
+CREATE TRIGGER trg_payments_version_insert
+AFTER INSERT ON payments
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'payments';
+END;
+-- trg_payments_version_update
+CREATE TRIGGER trg_payments_version_update
+AFTER UPDATE ON payments
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'payments';
+END;
+-- trg_period_ledger_horizon_version_delete
+CREATE TRIGGER trg_period_ledger_horizon_version_delete
+AFTER DELETE ON period_ledger_horizon
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'period_ledger_horizon';
+END;
+-- trg_period_ledger_horizon_version_insert
+CREATE TRIGGER trg_period_ledger_horizon_version_insert
+AFTER INSERT ON period_ledger_horizon
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'period_ledger_horizon';
+END;
+-- trg_period_ledger_horizon_version_update
+CREATE TRIGGER trg_period_ledger_horizon_version_update
+AFTER UPDATE ON period_ledger_horizon
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'period_ledger_horizon';
+END;
+-- trg_period_ledger_refresh
+CREATE TRIGGER trg_period_ledger_refresh
+INSTEAD OF INSERT ON period_ledger_refresh
+BEGIN
+    DELETE FROM missing_periods WHERE client_id = NEW.client_id;
+    DELETE FROM expected_periods WHERE client_id = NEW.client_id;
+    INSERT INTO expected_periods (
+        client_id, payment_schedule, period_key,
+        period_key_monthly, period_key_quarterly, period_label
+    )
+    SELECT
+        s.client_id, s.payment_schedule, s.period_key,
+        s.period_key_monthly, s.period_key_quarterly, s.period_label
+    FROM v_client_schedule_periods s
+    CROSS JOIN period_ledger_horizon h
+    WHERE s.client_id = NEW.client_id
+      AND ((s.payment_schedule = 'monthly' AND s.period_key <= h.monthly_key)
+        OR (s.payment_schedule = 'quarterly' AND s.period_key <= h.quarterly_key));
+    INSERT INTO missing_periods (client_id, payment_schedule, period_key, period_label)
+    SELECT e.client_id, e.payment_schedule, e.period_key, e.period_label
+    FROM expected_periods e
+    WHERE e.client_id = NEW.client_id
+      AND NOT EXISTS (
+        SELECT 1 FROM payment_periods pp
+        WHERE pp.client_id = e.client_id
+          AND pp.payment_schedule = e.payment_schedule
+          AND pp.period_key = e.period_key
+      );
+END;
+-- trg_providers_version_delete
+CREATE TRIGGER trg_providers_version_delete
+AFTER DELETE ON providers
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'providers';
+END;
+-- trg_providers_version_insert
+CREATE TRIGGER trg_providers_version_insert
+AFTER INSERT ON providers
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'providers';
+END;
+-- trg_providers_version_update
+CREATE TRIGGER trg_providers_version_update
+AFTER UPDATE ON providers
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'providers';
+END;
 -- INDEX DEFINITIONS
+-- idx_clients_active_name
+CREATE INDEX idx_clients_active_name
+ON clients(display_name)
+WHERE valid_to IS NULL;
+-- idx_contacts_active_client
+CREATE INDEX idx_contacts_active_client
+ON contacts(client_id, contact_type)
+WHERE valid_to IS NULL;
+-- idx_contracts_active_client
+CREATE INDEX idx_contracts_active_client
+ON contracts(client_id, is_active)
+WHERE valid_to IS NULL;
+-- idx_date_dimension_monthly
+CREATE UNIQUE INDEX idx_date_dimension_monthly
+ON date_dimension(period_key_monthly);
+-- idx_date_dimension_quarterly
+CREATE UNIQUE INDEX idx_date_dimension_quarterly
+ON date_dimension(period_key_quarterly)
+WHERE month IN (1, 4, 7, 10);
 -- idx_document_clients_client_id
 CREATE INDEX idx_document_clients_client_id ON document_clients(client_id);
 -- idx_document_clients_doc_id
@@ -619,9 +1024,38 @@ CREATE INDEX idx_document_clients_doc_id ON document_clients(document_id);
 CREATE INDEX idx_payment_documents_document_id ON "document_payments"(document_id);
 -- idx_payment_documents_payment_id
 CREATE INDEX idx_payment_documents_payment_id ON "document_payments"(payment_id);
+-- idx_payment_periods_payment
+CREATE INDEX idx_payment_periods_payment ON payment_periods(payment_id, period_key);
+-- idx_payments_active_client
+CREATE INDEX idx_payments_active_client
+ON payments(client_id, received_date, payment_id)
+WHERE valid_to IS NULL;
+-- idx_payments_active_received
+CREATE INDEX idx_payments_active_received
+ON payments(received_date DESC, payment_id DESC)
+WHERE valid_to IS NULL;
 -- idx_payments_client_date
 CREATE INDEX idx_payments_client_date ON payments(client_id, received_date);
--- idx_payments_received_date
-CREATE INDEX idx_payments_received_date ON payments(received_date);
--- idx_payments_valid_to
-CREATE INDEX idx_payments_valid_to ON payments(valid_to);
\ No newline at end of file
+-- idx_providers_active_name
+CREATE INDEX idx_providers_active_name
+ON providers(provider_name)
+WHERE valid_to IS NULL;
+-- BOOKKEEPING ROWS AND SCHEMA VERSION
+INSERT INTO table_versions (table_name) VALUES
+    ('client_folders'),
+    ('client_providers'),
+    ('clients'),
+    ('contacts'),
+    ('contracts'),
+    ('date_dimension'),
+    ('document_clients'),
+    ('document_payments'),
+    ('documents'),
+    ('expected_periods'),
+    ('missing_periods'),
+    ('payment_periods'),
+    ('payments'),
+    ('period_ledger_horizon'),
+    ('providers');
+INSERT INTO period_ledger_horizon (id, monthly_key, quarterly_key) VALUES (1, 0, 0);
+PRAGMA user_version = 9;
\ No newline at end of file
@@ -0,0 +1,58 @@
+# Database maintenance commands
+# Usage (from the backend directory):
+#   python manage_db.py migrate
+#   python manage_db.py rebuild-payment-periods
+#   python manage_db.py rebuild-period-ledger
+import argparse
+import logging
+import sqlite3
+import sys
+
+from app.db import DB_PATH
+from app.maintenance import rebuild_payment_periods, rebuild_period_ledger
+from app.migrations import apply_migrations, current_version
+
+
+def migrate(conn):
+    applied = apply_migrations(conn)
+    if applied:
+        print(f"Applied migrations: {', '.join(str(n) for n in applied)}")
+    else:
+        print("Database is up to date")
+    print(f"Schema version: {current_version(conn)}")
+
+
+def rebuild_periods(conn):
+    rows = rebuild_payment_periods(conn)
+    print(f"payment_periods rebuilt with {rows} rows")
+
+
+def rebuild_ledger(conn):
+    rows = rebuild_period_ledger(conn)
+    print(f"expected_periods rebuilt with {rows} rows")
+
+
+COMMANDS = {
+    "migrate": migrate,
+    "rebuild-payment-periods": rebuild_periods,
+    "rebuild-period-ledger": rebuild_ledger,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Payments database maintenance")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--db", default=DB_PATH, help="Path to SQLite database")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    conn = sqlite3.connect(args.db)
+    try:
+        COMMANDS[args.command](conn)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,44 @@
 
+import os
 import pytest
+import shutil
 import sqlite3
+import tempfile
 from fastapi.testclient import TestClient
 import sys
 from pathlib import Path
 
 # Add the parent directory to the path to import from app
-sys.path.insert(0, str(Path(__file__).parent.parent))
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Run the suite against a migrated copy of payments.db in a temporary
+# directory, so test writes (and the -wal/-shm files) never reach the
+# tracked database. Set before app.db is imported, which reads the path.
+TEST_DB_DIR = tempfile.mkdtemp(prefix="payments-tests-")
+TEST_DB_PATH = os.path.join(TEST_DB_DIR, "payments.db")
+os.environ["PAYMENTS_DB_PATH"] = TEST_DB_PATH
+
+from app.migrations import apply_migrations
+
+source = sqlite3.connect(f"{(BACKEND_DIR / 'payments.db').resolve().as_uri()}?mode=ro", uri=True)
+target = sqlite3.connect(TEST_DB_PATH)
+source.backup(target)
+source.close()
+apply_migrations(target)
+target.close()
 
 from app.main import app
+from app.db import close_pool
+
+@pytest.fixture(scope="session", autouse=True)
+def release_pooled_connections():
+    """
+    Close pooled connections after the test run and remove the test database
+    """
+    yield
+    close_pool()
+    shutil.rmtree(TEST_DB_DIR, ignore_errors=True)
 
 @pytest.fixture
 def client():
@@ -22,7 +52,7 @@ def db_connection():
     """
     Create a direct database connection for testing
     """
-    conn = sqlite3.connect("payments.db")
+    conn = sqlite3.connect(TEST_DB_PATH)
     conn.row_factory = sqlite3.Row
     yield conn
     conn.close()
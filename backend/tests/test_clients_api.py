@@ -227,3 +227,26 @@ def test_client_payment_views(client, db_connection):
     assert last_payment["last_payment_date"] is not None
     assert last_payment["last_payment_amount"] is not None
     assert "days_since_last_payment" in last_payment
+
+def test_client_payment_views_pick_first_and_last_payment(db_connection):
+    """Each client's first/last row describes its earliest/latest active payment"""
+    rows = db_connection.execute(
+        "SELECT client_id, received_date, payment_id, actual_fee FROM payments "
+        "WHERE valid_to IS NULL ORDER BY client_id, received_date, payment_id"
+    ).fetchall()
+    first, last = {}, {}
+    for row in rows:
+        first.setdefault(row["client_id"], row)
+        last[row["client_id"]] = row
+    
+    for row in db_connection.execute("SELECT * FROM v_client_payment_first"):
+        expected = first[row["client_id"]]
+        assert row["first_payment_id"] == expected["payment_id"]
+        assert row["first_payment_date"] == expected["received_date"]
+        assert row["first_payment_amount"] == expected["actual_fee"]
+    
+    for row in db_connection.execute("SELECT * FROM v_client_payment_last"):
+        expected = last[row["client_id"]]
+        assert row["last_payment_id"] == expected["payment_id"]
+        assert row["last_payment_date"] == expected["received_date"]
+        assert row["last_payment_amount"] == expected["actual_fee"]
@@ -0,0 +1,126 @@
+import asyncio
+import gzip
+import sys
+import zlib
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from app.compression import CompressionMiddleware, GzipEncoder, choose_encoder
+from compression_benchmark import measure, summarize
+
+def test_choose_encoder_honours_q_values():
+    """Test Accept-Encoding negotiation, including q=0 and the wildcard"""
+    encoders = [GzipEncoder()]
+    assert choose_encoder("gzip, deflate", encoders).name == "gzip"
+    assert choose_encoder("br;q=1.0, gzip;q=0.5", encoders).name == "gzip"
+    assert choose_encoder("*", encoders).name == "gzip"
+    assert choose_encoder("gzip;q=0", encoders) is None
+    assert choose_encoder("identity", encoders) is None
+    assert choose_encoder(None, encoders) is None
+
+def compression_app(minimum_size=100):
+    app = FastAPI()
+
+    @app.get("/big")
+    def big():
+        return JSONResponse([{"period_label": "Jan 2024", "payment_schedule": "monthly"}] * 50, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"row {i}\n" for i in range(1000)), media_type="text/csv")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size, levels={"gzip": 5})
+    return app
+
+def test_compresses_large_bodies_only():
+    """Test that bodies over the threshold are gzipped and small ones are left alone"""
+    client = TestClient(compression_app())
+
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["etag"] == 'W/"abc"'
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()) == 50
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"ok": True}
+
+    response = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"abc"'
+
+def test_compresses_streamed_responses():
+    """Test that streamed bodies are compressed incrementally without a Content-Length"""
+    client = TestClient(compression_app())
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw).decode().splitlines()[-1] == "row 999"
+
+def test_streamed_chunks_decode_as_they_arrive():
+    """Test that each streamed chunk is flushed so the client can decode it before the next"""
+    chunks = [b"".join(f"{n},row {i}\n".encode() for i in range(50)) for n in range(3)]
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/csv")]})
+        for n, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": n < len(chunks) - 1})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=100)(scope, None, send))
+
+    bodies = [message["body"] for message in sent if message["type"] == "http.response.body"]
+    assert len(bodies) == len(chunks)
+    decoder = zlib.decompressobj(31)
+    for body, chunk in zip(bodies, chunks):
+        assert decoder.decompress(body) == chunk
+
+def test_api_responses_are_compressed(client):
+    """Test that list pages and exports from the app are compressed and decode to the same data"""
+    url = "/api/split-payments?limit=200"
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json() == plain.json()
+
+    url = "/api/export/split-payments?format=ndjson"
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.content == plain.content
+
+    # 304s from conditional GET pass through untouched
+    etag = compressed.headers["etag"]
+    cached = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert "content-encoding" not in cached.headers
+
+def test_benchmark_measure_reports_savings():
+    """Test the compression benchmark's size and cost figures for a repetitive body"""
+    body = b'{"period_label":"Jan 2024","payment_schedule":"monthly"},' * 2000
+    size, seconds = measure(GzipEncoder(5), body, repeat=2)
+    streamed_size, _ = measure(GzipEncoder(5), body, repeat=2, chunk_size=4096)
+    assert size < len(body) / 20
+    assert streamed_size < len(body) / 20
+
+    stats = summarize(len(body), size, seconds)
+    assert stats["ratio"] > 20
+    assert stats["saved_pct"] > 95
@@ -1,7 +1,13 @@
 
+import sqlite3
+from datetime import date
+
 import pytest
 from fastapi.testclient import TestClient
 
+from app.date_utils import BillingPeriods, through_current_period
+from app.maintenance import advance_period_ledger
+
 def test_get_contracts(client):
     """Test retrieving all contracts"""
     response = client.get("/api/contracts")
@@ -313,3 +319,68 @@ def test_missing_periods(client):
     # We should find at least some of these keys
     found_keys = [key for key in expected_missing if key in period_keys]
     assert len(found_keys) > 0, "Should find some expected missing periods"
+
+def test_missing_periods_ledger_matches_schedule(db_connection):
+    """The trigger-maintained ledger holds the same gaps as the computed views"""
+    bound, params = through_current_period()
+    computed = db_connection.execute(
+        f"SELECT client_id, payment_schedule, period_key FROM v_client_unpaid_periods WHERE {bound}",
+        params
+    ).fetchall()
+    ledger = db_connection.execute(
+        f"SELECT client_id, payment_schedule, period_key FROM missing_periods WHERE {bound}",
+        params
+    ).fetchall()
+    
+    assert sorted(map(tuple, ledger)) == sorted(map(tuple, computed))
+
+def test_missing_periods_follow_payment_writes(client):
+    """A payment closes its periods' gaps and soft deleting it reopens them"""
+    def missing_keys():
+        response = client.get("/api/missing-periods?client_id=1&limit=1000")
+        assert response.status_code == 200
+        return {p["period_key"] for p in response.json()["items"]}
+    
+    assert 202502 in missing_keys()
+    
+    payment_data = {
+        "client_id": 1,
+        "contract_id": 1,
+        "received_date": "2025-03-25",
+        "actual_fee": 100.00,
+        "method": "Test",
+        "applied_start_month": 2,
+        "applied_start_month_year": 2025,
+        "applied_end_month": 2,
+        "applied_end_month_year": 2025
+    }
+    response = client.post("/api/payments", json=payment_data)
+    assert response.status_code == 200
+    payment_id = response.json()["payment_id"]
+    assert 202502 not in missing_keys()
+    
+    response = client.delete(f"/api/payments/{payment_id}")
+    assert response.status_code == 200
+    assert 202502 in missing_keys()
+
+def test_advance_period_ledger(db_connection):
+    """A period rollover adds only the new periods to the ledger"""
+    conn = sqlite3.connect(":memory:")
+    db_connection.backup(conn)
+    monthly_key, quarterly_key = conn.execute(
+        "SELECT monthly_key, quarterly_key FROM period_ledger_horizon"
+    ).fetchone()
+    later = BillingPeriods.for_date(date(monthly_key // 100 + 1, 1, 15))
+    
+    added = advance_period_ledger(conn, later)
+    
+    assert added > 0
+    assert advance_period_ledger(conn, later) == 0
+    expected = conn.execute(
+        "SELECT COUNT(*) FROM v_client_schedule_periods WHERE "
+        "(payment_schedule = 'monthly' AND period_key <= ?) OR "
+        "(payment_schedule = 'quarterly' AND period_key <= ?)",
+        (later.current_monthly_key, later.current_quarterly_key)
+    ).fetchone()[0]
+    assert conn.execute("SELECT COUNT(*) FROM expected_periods").fetchone()[0] == expected
+    conn.close()
@@ -0,0 +1,44 @@
+def _items(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.json()["items"]
+
+def _key(row):
+    return sorted(row.items(), key=lambda item: item[0])
+
+def test_dashboard_matches_individual_endpoints(client):
+    """Test that each dashboard section equals what the individual endpoints return"""
+    for client_id in (1, 2, 5):
+        response = client.get(f"/api/clients/{client_id}/dashboard?payments_limit=5")
+        assert response.status_code == 200
+        dashboard = response.json()
+
+        assert [dashboard["client"]] == _items(client, f"/api/clients?client_id={client_id}")
+        contracts = _items(client, f"/api/contracts?client_id={client_id}&limit=1000")
+        assert dashboard["contracts"] == contracts
+        contacts = _items(client, f"/api/contacts?client_id={client_id}&limit=1000")
+        assert dashboard["contacts"] == contacts
+
+        last_payment = _items(client, f"/api/clients/last-payments?client_id={client_id}")
+        assert dashboard["last_payment"] == (last_payment[0] if last_payment else None)
+
+        payments = client.get(f"/api/payments?client_id={client_id}&limit=5").json()
+        assert dashboard["payments"] == payments
+
+        status = _items(client, f"/api/payment-status?client_id={client_id}&limit=1000")
+        assert sorted(map(_key, dashboard["payment_status"])) == sorted(map(_key, status))
+
+        missing = _items(client, f"/api/missing-periods?client_id={client_id}&limit=10000")
+        assert dashboard["missing_periods"] == missing
+
+def test_dashboard_unknown_client(client):
+    """Test that the dashboard of an unknown client returns 404"""
+    response = client.get("/api/clients/999999/dashboard")
+    assert response.status_code == 404
+
+def test_dashboard_supports_conditional_get(client):
+    """Test that an unchanged dashboard is answered with 304 for its ETag"""
+    response = client.get("/api/clients/1/dashboard")
+    assert response.status_code == 200
+    again = client.get("/api/clients/1/dashboard", headers={"If-None-Match": response.headers["etag"]})
+    assert again.status_code == 304
@@ -1,37 +1,65 @@
+from datetime import date
 
-import pytest
-from app.date_utils import update_date_flags
+from app.date_utils import BillingPeriods, PeriodCalendar, through_current_period
+from app.period_index import PeriodIndex, load_period_indexes
 
-def test_update_date_flags(db_connection):
-    """Test the date flag update functionality"""
-    # First reset all flags to ensure we're starting from a clean state
-    db_connection.execute("""
-        UPDATE date_dimension 
-        SET is_current_monthly = 0, 
-            is_current_quarterly = 0,
-            is_previous_month = 0,
-            is_previous_quarter = 0
-    """)
-    db_connection.commit()
-    
-    # Run the update function
-    success = update_date_flags()
-    
-    # It should return True indicating success
-    assert success
-    
-    # Verify we have exactly one record with each flag set
-    cursor = db_connection.execute("""
-        SELECT 
-            SUM(is_current_monthly) as current_monthly_count,
-            SUM(is_current_quarterly) as current_quarterly_count,
-            SUM(is_previous_month) as prev_monthly_count,
-            SUM(is_previous_quarter) as prev_quarterly_count
-        FROM date_dimension
-    """)
-    counts = cursor.fetchone()
-    
-    assert counts['current_monthly_count'] == 1
-    assert counts['current_quarterly_count'] == 1
-    assert counts['prev_monthly_count'] == 1
-    assert counts['prev_quarterly_count'] == 1
+def test_billing_periods_for_date():
+    """Current periods are the month and quarter before today"""
+    periods = BillingPeriods.for_date(date(2025, 3, 25))
+    
+    assert periods.current_monthly_key == 202502
+    assert periods.current_quarterly_key == 20244
+    assert periods.previous_monthly_key == 202501
+    assert periods.previous_quarterly_key == 20243
+
+def test_billing_periods_year_rollover():
+    """January bills December and Q4 of the previous year"""
+    periods = BillingPeriods.for_date(date(2025, 1, 1))
+    
+    assert periods.current_monthly_key == 202412
+    assert periods.current_quarterly_key == 20244
+    assert periods.previous_monthly_key == 202411
+    assert periods.previous_quarterly_key == 20243
+
+def test_period_calendar_rolls_over():
+    """The calendar recomputes periods when the date changes"""
+    today = [date(2025, 3, 31)]
+    calendar = PeriodCalendar(clock=lambda: today[0])
+    
+    first = calendar.current()
+    assert first.current_monthly_key == 202502
+    assert calendar.current() is first
+    
+    today[0] = date(2025, 4, 1)
+    periods = calendar.current()
+    assert periods.current_monthly_key == 202503
+    assert periods.current_quarterly_key == 20251
+
+def test_through_current_period():
+    """The period bound takes the current keys as parameters"""
+    condition, params = through_current_period(BillingPeriods.for_date(date(2025, 3, 25)))
+    
+    assert condition.count("?") == 2
+    assert params == [202502, 20244]
+
+def test_period_index_lookups(db_connection):
+    """The period index maps keys to labels without SQL"""
+    indexes = load_period_indexes(db_connection)
+    monthly, quarterly = indexes["monthly"], indexes["quarterly"]
+    
+    assert monthly.label(202502) == "Feb 2025"
+    assert quarterly.label(20244) == "Q4 2024"
+    assert 202413 not in monthly
+    assert monthly.label(190001) is None
+    
+    count = db_connection.execute("SELECT COUNT(*) FROM date_dimension").fetchone()[0]
+    assert len(monthly) == count
+    assert len(quarterly) == count // 3
+
+def test_period_index_gaps():
+    """Keys missing from the source rows have no label"""
+    index = PeriodIndex("monthly", [(202501, "Jan 2025"), (202503, "Mar 2025")])
+    
+    assert 202502 not in index
+    assert index.label(202502) is None
+    assert index.label(202503) == "Mar 2025"
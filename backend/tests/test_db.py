@@ -1,5 +1,9 @@
 
 import pytest
+import sqlite3
+from pathlib import Path
+from app.db import DB_PATH, ConnectionPool, PoolTimeoutError, get_connection
+from app.migrations import available_migrations, current_version, pending_migrations
 
 def test_db_connection(db_connection):
     """Test that the database connection works"""
@@ -47,3 +51,107 @@ def test_clients_data(db_connection):
     client = cursor.fetchone()
     assert client is not None, "Client with ID 1 should exist"
     assert client['display_name'] == 'AirSea America', "Client 1 should be AirSea America"
+
+def test_pool_reuses_configured_connections():
+    """Pooled connections are configured once and handed out again"""
+    pool = ConnectionPool(database=DB_PATH, max_size=2)
+    conn = pool.acquire()
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    pool.release(conn)
+    
+    assert pool.acquire() is conn
+    stats = pool.stats()
+    assert stats["created"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["in_use"] == 1
+    pool.release(conn)
+    pool.close()
+
+def test_pool_discards_broken_connections():
+    """A connection that fails its checkout check is replaced"""
+    pool = ConnectionPool(database=DB_PATH, max_size=1)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()  # Simulate a connection that went bad while idle
+    
+    replacement = pool.acquire()
+    assert replacement is not conn
+    assert pool.stats()["discarded"] == 1
+    pool.release(replacement)
+    pool.close()
+
+def test_pool_times_out_when_exhausted():
+    """Checkout fails with PoolTimeoutError once max_size connections are in use"""
+    pool = ConnectionPool(database=DB_PATH, max_size=1, timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+    pool.release(conn)
+    pool.close()
+
+def test_pool_stats_endpoint(client):
+    """The pool statistics are exposed over HTTP"""
+    response = client.get("/health/db")
+    assert response.status_code == 200
+    pools = response.json()["pool"]
+    assert pools["writer"]["max_size"] == 1
+    assert pools["reader"]["read_only"] is True
+
+def test_read_pool_is_read_only():
+    """Connections from a read-only pool cannot take the write lock"""
+    pool = ConnectionPool(database=DB_PATH, max_size=1, read_only=True)
+    conn = pool.acquire()
+    assert conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0] > 0
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("UPDATE clients SET display_name = display_name WHERE client_id = 1")
+    pool.release(conn)
+    pool.close()
+
+def test_writer_uses_wal(client):
+    """The writer connection switches the database to WAL journaling"""
+    with get_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def test_db_schema_is_migrated(db_connection):
+    """The checked-in database has every migration applied"""
+    assert pending_migrations(db_connection) == []
+    assert current_version(db_connection) == available_migrations()[-1][0]
+
+def test_schema_sql_builds_a_migrated_database(db_connection):
+    """A database created from database/schema.sql is current and has its bookkeeping rows"""
+    schema = Path(__file__).parent.parent / "database" / "schema.sql"
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(schema.read_text())
+    assert pending_migrations(conn) == []
+    versioned = "SELECT table_name FROM table_versions ORDER BY table_name"
+    assert conn.execute(versioned).fetchall() == [tuple(row) for row in db_connection.execute(versioned)]
+    assert conn.execute("SELECT COUNT(*) FROM period_ledger_horizon").fetchone()[0] == 1
+    conn.close()
+
+def test_period_key_joins_use_indexes(db_connection):
+    """Period-key joins search date_dimension instead of scanning it"""
+    plan = db_connection.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM v_payment_period_source"
+    ).fetchall()
+    details = [row["detail"] for row in plan if " dd" in row["detail"]]
+    
+    assert details
+    assert all(detail.startswith("SEARCH") for detail in details)
+
+def test_active_rows_use_partial_indexes(db_connection):
+    """Soft-delete filtered lists read the valid_to IS NULL indexes in list order"""
+    queries = {
+        "idx_payments_active_received": "SELECT * FROM payments WHERE valid_to IS NULL "
+                                        "ORDER BY received_date DESC, payment_id DESC LIMIT 10",
+        "idx_clients_active_name": "SELECT * FROM clients WHERE valid_to IS NULL "
+                                   "ORDER BY display_name LIMIT 10",
+        "idx_contacts_active_client": "SELECT * FROM contacts WHERE valid_to IS NULL AND client_id = 1",
+    }
+    for index, query in queries.items():
+        plan = " | ".join(
+            row["detail"] for row in db_connection.execute(f"EXPLAIN QUERY PLAN {query}")
+        )
+        assert index in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from app.db_executor import DatabaseExecutor, db_thread, ANALYTICS_LANE
+
+def test_executor_runs_off_the_event_loop():
+    """Jobs run on a worker thread and are counted"""
+    executor = DatabaseExecutor("test", max_workers=1)
+    loop_thread = threading.get_ident()
+    
+    worker_thread = asyncio.run(executor.run(threading.get_ident))
+    
+    assert worker_thread != loop_thread
+    stats = executor.stats()
+    assert stats["completed"] == 1
+    assert stats["queued"] == 0
+    executor.shutdown()
+
+def test_executor_reports_queue_depth():
+    """Jobs waiting for a busy worker show up as queue depth"""
+    executor = DatabaseExecutor("test", max_workers=1)
+    
+    async def run_three():
+        await asyncio.gather(*(executor.run(time.sleep, 0.02) for _ in range(3)))
+    
+    asyncio.run(run_three())
+    stats = executor.stats()
+    assert stats["completed"] == 3
+    assert stats["max_queue_depth"] >= 2
+    executor.shutdown()
+
+def test_db_thread_keeps_lanes_separate():
+    """A slow analytics job does not delay a default-lane lookup"""
+    @db_thread(lane=ANALYTICS_LANE)
+    def slow_view():
+        time.sleep(0.3)
+        return "slow"
+    
+    @db_thread
+    def cheap_lookup():
+        return "cheap"
+    
+    async def scenario():
+        slow = [asyncio.ensure_future(slow_view()) for _ in range(8)]
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        assert await cheap_lookup() == "cheap"
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*slow)
+        return elapsed
+    
+    assert asyncio.run(scenario()) < 0.2
+
+def test_db_thread_rejects_unknown_lane():
+    with pytest.raises(ValueError):
+        db_thread(lane="nope")
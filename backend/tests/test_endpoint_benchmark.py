@@ -0,0 +1,46 @@
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from app.db import DB_PATH
+from generate_data import generate_database
+from endpoint_benchmark import compare_results, request_urls, run_in_process, sample_values, summarize
+
+def test_summarize_reports_percentiles():
+    """Test latency percentiles and throughput for a known sample"""
+    stats = summarize([n / 1000 for n in range(1, 101)], errors=2, elapsed=2.0)
+
+    assert stats["requests"] == 100
+    assert stats["errors"] == 2
+    assert stats["p50_ms"] == 50.5
+    assert stats["p95_ms"] == 95.05
+    assert stats["p99_ms"] == 99.01
+    assert stats["throughput_rps"] == 50.0
+
+def test_request_urls_skip_variants_without_samples():
+    """Test that templates whose placeholder has no samples are dropped from the mix"""
+    templates = ("/api/payments?limit=50", "/api/payments?cursor={payments_cursor}")
+    urls = request_urls(templates, {"client_id": [1], "payments_cursor": []}, random.Random(0), 10)
+
+    assert urls == ["/api/payments?limit=50"] * 10
+
+def test_in_process_run_and_compare(tmp_path):
+    """Test a short in-process run against a synthetic database and comparing two results"""
+    # payments.db holds a few rows that fail validation (total_assets '-'), so use generated data
+    synthetic = tmp_path / "synthetic.db"
+    generate_database(synthetic, 2000, template=DB_PATH)
+    args = argparse.Namespace(requests=5, concurrency=2, warmup=1, seed=0)
+    values = sample_values(synthetic, 0)
+    results = run_in_process(synthetic, ["payments", "missing-periods"], values, args)
+
+    for name in ("payments", "missing-periods"):
+        assert results[name]["requests"] == 5
+        assert results[name]["errors"] == 0
+        assert results[name]["p50_ms"] <= results[name]["p99_ms"]
+
+    report = {"results": {"inprocess": results}}
+    changes = compare_results(report, report)
+    assert changes[("inprocess", "payments")] == (0.0, 0.0, 0.0)
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+
+import anyio
+import pytest
+from starlette.requests import ClientDisconnect
+
+from app import export
+from app.db import pool_stats
+
+def test_export_payments_ndjson(client):
+    """NDJSON export contains every payment, one object per line"""
+    response = client.get("/api/export/payments?client_id=1")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    listed = client.get("/api/payments?client_id=1&limit=1000").json()
+    assert [row["payment_id"] for row in rows] == [p["payment_id"] for p in listed["items"]]
+
+def test_export_split_payments_csv(client):
+    """CSV export starts with a header row and has one line per distribution"""
+    response = client.get("/api/export/split-payments?format=csv")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "split-payments.csv" in response.headers["content-disposition"]
+    
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    total = client.get("/api/split-payments?limit=1").json()["total"]
+    assert len(rows) == total
+    assert {"payment_id", "period_key", "distributed_amount"} <= set(rows[0])
+
+def test_export_streams_in_batches(client):
+    """Rows are fetched in batches and the output matches the full result"""
+    chunks = list(export.iter_export(
+        "SELECT payment_id FROM payment_periods ORDER BY payment_id", [], "ndjson", 7
+    ))
+    assert all(chunk.count("\n") <= 7 for chunk in chunks)
+    
+    response = client.get("/api/export/expanded-payment-periods?format=ndjson")
+    assert response.status_code == 200
+    assert sum(chunk.count("\n") for chunk in chunks) == len(response.text.splitlines())
+
+def test_export_empty_csv_has_header(client):
+    """An empty CSV export still carries the column header"""
+    response = client.get("/api/export/missing-periods?format=csv&client_id=-1")
+    assert response.status_code == 200
+    assert response.text.startswith("client_id")
+    assert len(response.text.splitlines()) == 1
+
+def test_export_rejects_unknown_format(client):
+    response = client.get("/api/export/payments?format=xml")
+    assert response.status_code == 422
+
+def test_abandoned_export_returns_its_connection():
+    """A stream abandoned partway, by a failed send or a disconnect, releases its read connection"""
+    query = "SELECT * FROM payment_periods"
+    in_use = lambda: pool_stats()["reader"]["in_use"]
+
+    async def failed_send():
+        response = export.export_response(query, [], "ndjson", "test")
+        bodies = []
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                bodies.append(message)
+                if len(bodies) == 1:
+                    assert in_use() == before + 1
+                else:
+                    raise OSError("connection reset")
+
+        async def receive():
+            await anyio.sleep_forever()
+
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        with pytest.raises(ClientDisconnect):
+            await response(scope, receive, send)
+        assert in_use() == before
+
+    async def disconnect():
+        response = export.export_response(query, [], "ndjson", "test")
+        first_chunk = anyio.Event()
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                first_chunk.set()
+                await anyio.sleep_forever()
+
+        async def receive():
+            await first_chunk.wait()
+            return {"type": "http.disconnect"}
+
+        await response({"type": "http"}, receive, send)
+        assert in_use() == before
+
+    before = in_use()
+    anyio.run(failed_send)
+    anyio.run(disconnect)
@@ -0,0 +1,66 @@
+import sqlite3
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from generate_data import DATA_TABLES, generate_database
+
+TODAY = date(2025, 3, 25)
+
+def test_generated_database_is_consistent(tmp_path):
+    """Test that generated rows satisfy the schema and the derived tables match the views"""
+    target = tmp_path / "synthetic.db"
+    counts = generate_database(target, 3000, seed=1, today=TODAY)
+
+    assert 3000 <= counts["payments"] < 3100
+    assert all(counts[table] > 0 for table in DATA_TABLES)
+
+    conn = sqlite3.connect(target)
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    # Triggers are restored after the bulk load
+    triggers = "SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name"
+    template = sqlite3.connect("payments.db")
+    assert conn.execute(triggers).fetchall() == template.execute(triggers).fetchall()
+    template.close()
+    # Split payments, soft-deleted history and inactive contracts are all present
+    assert conn.execute("SELECT COUNT(*) FROM v_payments WHERE is_split_payment = 1").fetchone()[0] > 0
+    assert conn.execute("SELECT COUNT(*) FROM payments WHERE valid_to IS NOT NULL").fetchone()[0] > 0
+    assert conn.execute("SELECT COUNT(*) FROM contracts WHERE is_active = 0").fetchone()[0] > 0
+    assert conn.execute(
+        "SELECT COUNT(*) FROM contracts WHERE payment_schedule = 'quarterly'"
+    ).fetchone()[0] > 0
+    # No payment arrives after today and no superseded contract ends before it starts
+    assert conn.execute("SELECT MAX(received_date) FROM payments").fetchone()[0] <= TODAY.isoformat()
+    assert conn.execute(
+        "SELECT COUNT(*) FROM contracts WHERE valid_to IS NOT NULL AND valid_to <= valid_from"
+    ).fetchone()[0] == 0
+
+    assert counts["payment_periods"] == conn.execute(
+        "SELECT COUNT(*) FROM v_payment_period_source"
+    ).fetchone()[0]
+    horizon = conn.execute("SELECT monthly_key, quarterly_key FROM period_ledger_horizon").fetchone()
+    assert horizon == (202502, 20244)
+    assert counts["missing_periods"] == conn.execute("""
+        SELECT COUNT(*) FROM v_client_unpaid_periods
+        WHERE (payment_schedule = 'monthly' AND period_key <= 202502)
+           OR (payment_schedule = 'quarterly' AND period_key <= 20244)
+    """).fetchone()[0]
+    conn.close()
+
+def test_generator_is_deterministic(tmp_path):
+    """Test that the same seed and date produce the same rows"""
+    first, second, other = tmp_path / "a.db", tmp_path / "b.db", tmp_path / "c.db"
+    generate_database(first, 500, seed=3, today=TODAY)
+    generate_database(second, 500, seed=3, today=TODAY)
+    generate_database(other, 500, seed=4, today=TODAY)
+
+    def payments(path):
+        conn = sqlite3.connect(path)
+        rows = conn.execute("SELECT * FROM payments ORDER BY payment_id").fetchall()
+        conn.close()
+        return rows
+
+    assert payments(first) == payments(second)
+    assert payments(first) != payments(other)
@@ -0,0 +1,107 @@
+import sqlite3
+
+from app.db import DB_PATH, get_read_pool
+from app.http_cache import StaticDocument, etag_matches, make_etag, table_versions
+
+def test_etag_matches():
+    """Test If-None-Match parsing: lists, weak validators and the wildcard"""
+    etag = make_etag(b"{}")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches(etag, f"W/{etag}")
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+def test_static_document_is_built_once():
+    """Test that a static document is built and encoded only on first use"""
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"a": 1}
+
+    document = StaticDocument(build)
+    assert document.render() == document.render()
+    assert document.render()[0] == b'{"a":1}'
+    assert len(calls) == 1
+
+def test_reference_documents_support_conditional_get(client):
+    """Test that the OpenAPI schema and reference payloads return 304 for a matching ETag"""
+    for url in ("/openapi.json", "/api-reference", "/api/structure-reference"):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "no-cache"
+
+        again = client.get(url)
+        assert again.headers["etag"] == etag
+        assert again.content == response.content
+
+        cached = client.get(url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+        assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+def test_openapi_document_content(client):
+    """Test that the cached OpenAPI schema still lists the API routes"""
+    schema = client.get("/openapi.json").json()
+    assert schema["info"]["title"] == "Payments API"
+    assert "/api/payments" in schema["paths"]
+    assert client.get("/api-reference").json()["endpoints"]["payments"]["list"]["url"] == "/api/payments"
+    assert client.get("/api/structure-reference").json()["payment"]["payment_id"] == 1
+
+def test_table_versions_resolve_views():
+    """Test that views are resolved to the versioned tables they read"""
+    assert set(table_versions(("v_active_contracts",))) == {"contracts"}
+    assert set(table_versions(("v_payments", "clients"))) >= {"payments", "clients"}
+
+def test_versioned_routes_support_conditional_get(client):
+    """Test that data routes answer 304 until one of their tables changes"""
+    response = client.get("/api/providers")
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    assert response.headers["cache-control"] == "no-cache"
+
+    cached = client.get("/api/providers", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    # Other URLs of the same route have their own ETags
+    assert client.get("/api/providers?limit=1").headers["etag"] != etag
+
+    clients_etag = client.get("/api/clients").headers["etag"]
+    provider = response.json()["items"][0]
+    client.put(f"/api/providers/{provider['provider_id']}", json={"provider_name": provider["provider_name"]})
+
+    # The write bumps the providers counter but leaves clients untouched
+    assert client.get("/api/providers", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/api/clients", headers={"If-None-Match": clients_etag}).status_code == 304
+
+def test_versioned_etag_changes_on_writes_from_other_connections(client):
+    """Test that the trigger-maintained counters catch writes made outside the API"""
+    etag = client.get("/api/active-contracts").headers["etag"]
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("UPDATE contracts SET num_people = num_people WHERE contract_id = (SELECT MIN(contract_id) FROM contracts)")
+    conn.commit()
+    conn.close()
+    assert client.get("/api/active-contracts", headers={"If-None-Match": etag}).status_code == 200
+
+def test_unconditional_get_reads_versions_on_the_route_connection(client):
+    """Test that a GET without If-None-Match checks out one read connection for versions and data"""
+    url = "/api/contacts?client_id=1"
+    before = get_read_pool().stats()["checkouts"]
+    response = client.get(url)
+    assert get_read_pool().stats()["checkouts"] == before + 1
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+def test_unversioned_routes_have_no_etag(client):
+    """Test that routes without @versioned_by are served without an ETag"""
+    assert "etag" not in client.get("/health").headers
+    assert client.get("/health", headers={"If-None-Match": "*"}).status_code == 200
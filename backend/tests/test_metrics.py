@@ -0,0 +1,64 @@
+import asyncio
+
+from starlette.requests import Request
+
+from app.main import global_exception_handler
+from app.metrics import ERRORS, REQUEST_LATENCY, REQUESTS, Counter, Histogram
+
+def test_metrics_endpoint(client):
+    """Test that /metrics reports requests per route template in the text format"""
+    before = REQUESTS.value(method="GET", route="/api/payments/{payment_id}/distributions", status="404")
+    client.get("/api/payments/999999/distributions")
+    client.get("/api/payments?limit=5")
+    client.get("/no-such-route/123")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    body = response.text
+    assert REQUESTS.value(method="GET", route="/api/payments/{payment_id}/distributions", status="404") == before + 1
+    assert 'payments_http_requests_total{method="GET",route="/api/payments",status="200"}' in body
+    # Unknown paths share one series instead of adding one per URL
+    assert 'route="unmatched"' in body
+    assert "/no-such-route" not in body
+    assert 'payments_http_request_duration_seconds_bucket{method="GET",route="/api/payments",le="+Inf"}' in body
+    assert 'payments_http_request_db_seconds_count{method="GET",route="/api/payments"}' in body
+    assert 'payments_db_queries_total{method="GET",route="/api/payments"}' in body
+    assert "payments_http_requests_in_flight 1" in body
+    assert 'payments_db_pool_checkouts_total{pool="reader"}' in body
+    assert 'payments_db_executor_queued{lane="default"}' in body
+    assert "payments_sqlite_pages " in body
+    assert "payments_sqlite_cache" not in body
+
+def test_unhandled_exceptions_are_counted():
+    """Test that the global exception handler counts errors by type"""
+    before = ERRORS.value(exception="ZeroDivisionError")
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    response = asyncio.run(global_exception_handler(request, ZeroDivisionError("boom")))
+
+    assert response.status_code == 500
+    assert ERRORS.value(exception="ZeroDivisionError") == before + 1
+
+def test_metric_rendering():
+    """Test counter and histogram exposition, including label escaping"""
+    counter = Counter("test_total", "Test counter", ("name",))
+    counter.inc(name='a"b')
+    counter.inc(2, name='a"b')
+    assert counter.render() == [
+        "# HELP test_total Test counter",
+        "# TYPE test_total counter",
+        'test_total{name="a\\"b"} 3',
+    ]
+
+    histogram = Histogram("test_seconds", "Test histogram", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.render()[2:] == [
+        'test_seconds_bucket{le="0.1"} 1',
+        'test_seconds_bucket{le="1.0"} 2',
+        'test_seconds_bucket{le="+Inf"} 3',
+        "test_seconds_sum 5.55",
+        "test_seconds_count 3",
+    ]
+    assert REQUEST_LATENCY.buckets[-1] == float("inf")
@@ -1,6 +1,7 @@
 
 import pytest
 from fastapi.testclient import TestClient
+from app.maintenance import rebuild_payment_periods
 
 def test_get_payments(client):
     """Test retrieving payments"""
@@ -30,6 +31,56 @@ def test_get_payments_for_client(client):
     if data["total"] > 0:
         assert all(p["client_id"] == 1 for p in data["items"])
 
+def test_payments_cursor_pagination(client):
+    """Walking next_cursor returns the same rows as offset paging"""
+    response = client.get("/api/payments?client_id=1&limit=1000")
+    assert response.status_code == 200
+    expected = [p["payment_id"] for p in response.json()["items"]]
+    
+    seen = []
+    response = client.get("/api/payments?client_id=1&limit=20")
+    while True:
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend(p["payment_id"] for p in data["items"])
+        if data["next_cursor"] is None:
+            break
+        response = client.get(f"/api/payments?client_id=1&limit=20&cursor={data['next_cursor']}")
+        assert response.json()["total"] is None
+    
+    assert seen == expected
+
+def test_split_payments_cursor_pagination(client):
+    """Cursor paging over the mixed-direction split payment ordering"""
+    response = client.get("/api/split-payments?limit=1000")
+    assert response.status_code == 200
+    expected = [(d["payment_id"], d["period_key"]) for d in response.json()["items"]]
+    
+    seen = []
+    cursor = None
+    while True:
+        url = "/api/split-payments?limit=7"
+        if cursor:
+            url += f"&cursor={cursor}"
+        data = client.get(url).json()
+        seen.extend((d["payment_id"], d["period_key"]) for d in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    
+    assert seen == expected
+
+def test_invalid_cursor(client):
+    """A malformed cursor is rejected"""
+    response = client.get("/api/payments?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+def test_cursor_with_non_scalar_values(client):
+    """A cursor whose key values are not scalars is rejected"""
+    response = client.get("/api/payments?cursor=W1sxXSwgeyJhIjogMX1d")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
 def test_create_simple_payment(client):
     """Test creating a simple payment"""
     # Find an existing client and contract
@@ -107,3 +158,105 @@ def test_current_period(client):
     assert "current_month" in data
     assert "current_monthly_key" in data
     assert "current_quarterly_key" in data
+
+def test_payment_periods_follow_payment_writes(client, db_connection):
+    """payment_periods is kept in sync by triggers on insert, update and soft delete"""
+    payment_data = {
+        "client_id": 1,
+        "contract_id": 1,
+        "received_date": "2025-03-25",
+        "actual_fee": 300.00,
+        "method": "Test",
+        "applied_start_month": 1,
+        "applied_start_month_year": 2025,
+        "applied_end_month": 3,
+        "applied_end_month_year": 2025
+    }
+    response = client.post("/api/payments", json=payment_data)
+    assert response.status_code == 200
+    payment_id = response.json()["payment_id"]
+    
+    def covered_periods():
+        cursor = db_connection.execute(
+            "SELECT period_key FROM payment_periods WHERE payment_id = ? ORDER BY period_key",
+            (payment_id,)
+        )
+        return [row["period_key"] for row in cursor.fetchall()]
+    
+    assert covered_periods() == [202501, 202502, 202503]
+    
+    response = client.put(f"/api/payments/{payment_id}", json={"applied_end_month": 2})
+    assert response.status_code == 200
+    assert covered_periods() == [202501, 202502]
+    
+    response = client.get(f"/api/expanded-payment-periods?payment_id={payment_id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 2
+    assert data["items"][0]["period_label"] == "Jan 2025"
+    
+    response = client.delete(f"/api/payments/{payment_id}")
+    assert response.status_code == 200
+    assert covered_periods() == []
+
+def test_payment_period_columns_follow_payment_writes(client, db_connection):
+    """Stored period range and count are filled on insert and kept current on update"""
+    payment_data = {
+        "contract_id": 1,
+        "client_id": 1,
+        "received_date": "2025-04-10",
+        "actual_fee": 900.0,
+        "applied_start_month": 1,
+        "applied_start_month_year": 2025,
+        "applied_end_month": 3,
+        "applied_end_month_year": 2025
+    }
+    response = client.post("/api/payments", json=payment_data)
+    assert response.status_code == 200
+    payment_id = response.json()["payment_id"]
+    
+    def stored_columns():
+        return tuple(db_connection.execute(
+            "SELECT start_period_key, end_period_key, periods_covered FROM payments WHERE payment_id = ?",
+            (payment_id,)
+        ).fetchone())
+    
+    assert stored_columns() == (202501, 202503, 3)
+    
+    response = client.put(f"/api/payments/{payment_id}", json={"applied_end_month": 6})
+    assert response.status_code == 200
+    assert stored_columns() == (202501, 202506, 6)
+    
+    response = client.get(f"/api/payment-coverage?payment_id={payment_id}")
+    assert response.status_code == 200
+    coverage = response.json()["items"][0]
+    assert coverage["periods_covered"] == 6
+    assert coverage["distributed_amount_per_period"] == 150.0
+    assert coverage["covered_monthly_periods"].startswith("202501|Jan 2025; 202502|Feb 2025")
+    
+    client.delete(f"/api/payments/{payment_id}")
+
+def test_rebuild_payment_periods_matches_triggers(db_connection):
+    """Rebuilding from scratch reproduces the trigger-maintained rows"""
+    before = db_connection.execute(
+        "SELECT * FROM payment_periods ORDER BY payment_id, period_key"
+    ).fetchall()
+    
+    rebuild_payment_periods(db_connection)
+    
+    after = db_connection.execute(
+        "SELECT * FROM payment_periods ORDER BY payment_id, period_key"
+    ).fetchall()
+    assert [tuple(row) for row in after] == [tuple(row) for row in before]
+
+def test_payment_distributions_match_split_payments(client):
+    """Test that a payment's distributions equal its rows in /api/split-payments"""
+    split = client.get("/api/split-payments?limit=1").json()["items"][0]
+    payment_id = split["payment_id"]
+    response = client.get(f"/api/payments/{payment_id}/distributions")
+    assert response.status_code == 200
+    data = response.json()
+    expected = client.get(f"/api/split-payments?payment_id={payment_id}&limit=1000").json()["items"]
+    assert sorted(data["items"], key=lambda d: d["period_key"]) == sorted(expected, key=lambda d: d["period_key"])
+    assert data["total"] == len(expected)
+    assert client.get("/api/payments/999999/distributions").status_code == 404
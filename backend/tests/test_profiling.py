@@ -0,0 +1,89 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.db_executor import db_thread
+from app.main import app as main_app
+from app.profiling import ProfilingMiddleware, SamplingProfiler
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def profiled_app():
+    app = FastAPI()
+
+    @app.get("/slow")
+    @db_thread
+    def slow():
+        busy_wait(0.05)
+        return {"ok": True}
+
+    app.add_middleware(ProfilingMiddleware, token="secret", interval_ms=1)
+    app.include_router(profiling.router)
+    return app
+
+def test_profiling_is_not_installed_without_token():
+    """Test that the middleware and admin routes are absent when no admin token is set"""
+    assert profiling.ADMIN_TOKEN is None
+    assert all(m.cls is not ProfilingMiddleware for m in main_app.user_middleware)
+    client = TestClient(main_app)
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "anything"}).status_code == 404
+    assert "X-Profile-Id" not in client.get("/health?profile=1").headers
+
+def test_profiled_request_returns_collapsed_stacks(monkeypatch):
+    """Test profiling a request through the header and fetching its collapsed stacks"""
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+    client = TestClient(profiled_app())
+
+    response = client.get("/slow", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.json() == {"ok": True}
+    profile_id = response.headers["X-Profile-Id"]
+
+    listed = client.get("/admin/profiles", headers={"X-Admin-Token": "secret"}).json()["items"]
+    assert listed[0]["profile_id"] == profile_id
+    assert listed[0]["path"] == "/slow"
+    assert listed[0]["samples"] > 0
+
+    collapsed = client.get(f"/admin/profiles/{profile_id}", headers={"X-Admin-Token": "secret"}).text
+    lines = collapsed.splitlines()
+    assert lines
+    # Worker-thread samples reach into the handler
+    assert any(line.startswith("db-default") and "test_profiling.py:busy_wait" in line for line in lines)
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+
+    # Admin routes need the token
+    assert client.get(f"/admin/profiles/{profile_id}").status_code == 404
+
+def test_profile_requires_admin_token(monkeypatch):
+    """Test that the query flag without the right token serves the request unprofiled"""
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+    client = TestClient(profiled_app())
+
+    response = client.get("/slow?profile=1", headers={"X-Admin-Token": "wrong"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+    response = client.get("/slow?profile=1", headers={"X-Admin-Token": "secret"})
+    assert "X-Profile-Id" in response.headers
+
+def test_sampling_profiler_counts_stacks():
+    """Test that registered threads are sampled into collapsed stacks"""
+    profiler = SamplingProfiler(interval_ms=1)
+    profiler.add_thread("main")
+    profiler.sample()
+    profiler.sample()
+    profiler.remove_thread()
+    profiler.sample()
+
+    assert profiler.samples == 3
+    assert sum(profiler.stacks.values()) == 2
+    line = profiler.collapsed().splitlines()[0]
+    assert line.startswith("main;")
+    assert "test_profiling.py:test_sampling_profiler_counts_stacks" in line
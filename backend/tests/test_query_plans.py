@@ -0,0 +1,47 @@
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from generate_data import generate_database
+from query_plans import BASELINE_PATH, compare_plans, plan_report, summarize_plan
+
+def test_summarize_plan_ranks_table_access():
+    """Test that plans are reduced to the worst access per table"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, a INTEGER, b INTEGER)")
+    conn.execute("CREATE INDEX idx_t_a ON t(a)")
+
+    assert summarize_plan(conn, "SELECT * FROM t WHERE a = 1") == {
+        "tables": {"t": "search"}, "temp_btrees": 0
+    }
+    assert summarize_plan(conn, "SELECT * FROM t WHERE b = 1") == {
+        "tables": {"t": "scan"}, "temp_btrees": 0
+    }
+    assert summarize_plan(conn, "SELECT * FROM t ORDER BY b")["temp_btrees"] == 1
+    conn.close()
+
+def test_compare_plans_reports_regressions():
+    """Test that worse access, new scans and new sorts are reported"""
+    baseline = {"GET /api/x": {"SELECT ?": {"tables": {"t": "search"}, "temp_btrees": 0}}}
+
+    assert compare_plans(baseline, baseline) == []
+    assert compare_plans(baseline, {"GET /api/y": {"SELECT ?": {"tables": {"t": "scan"}, "temp_btrees": 0}}}) == []
+
+    scanned = {"GET /api/x": {"SELECT ?": {"tables": {"t": "scan", "u": "scan"}, "temp_btrees": 1}}}
+    assert compare_plans(baseline, scanned) == [
+        "GET /api/x: t search -> scan",
+        "GET /api/x: new scan of u",
+        "GET /api/x: temp B-trees 0 -> 1",
+    ]
+
+def test_query_plans_match_baseline(tmp_path):
+    """Test that no view or route query plans worse than the committed baseline"""
+    synthetic = tmp_path / "synthetic.db"
+    generate_database(synthetic, 2000)
+
+    baseline = json.loads(BASELINE_PATH.read_text())
+    current = plan_report(synthetic)
+    assert compare_plans(baseline, current) == []
@@ -0,0 +1,91 @@
+import sqlite3
+
+from app.db import DB_PATH
+from app.reference_cache import PROVIDERS_CACHE, ReferenceCache, get_cache
+
+def test_reference_cache_hits_and_invalidation():
+    """Test that values are reused until invalidated, and that loads are counted as misses"""
+    cache = ReferenceCache("test", ttl=60)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return len(loads)
+
+    assert cache.get("key", load) == 1
+    assert cache.get("key", load) == 1
+    assert cache.get("other", load) == 2
+    cache.invalidate()
+    assert cache.get("key", load) == 3
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["invalidations"] == 1
+    assert stats["entries"] == 1
+
+def test_reference_cache_expiry_and_disabled():
+    """Test that expired entries are reloaded and that a zero TTL disables caching"""
+    expired = ReferenceCache("test", ttl=-1)
+    assert expired.get("key", lambda: 1) == 1
+    assert expired.get("key", lambda: 2) == 2
+    assert expired.stats()["entries"] == 0
+
+    short = ReferenceCache("test", ttl=0.000001)
+    short.get("key", lambda: 1)
+    assert short.get("key", lambda: 2) == 2
+
+def test_reference_cache_eviction():
+    """Test that the least recently used entry is evicted when the cache is full"""
+    cache = ReferenceCache("test", ttl=60, max_entries=2)
+    cache.get("a", lambda: "a")
+    cache.get("b", lambda: "b")
+    cache.get("a", lambda: "stale")
+    cache.get("c", lambda: "c")
+    assert cache.get("a", lambda: "new") == "a"
+    assert cache.get("b", lambda: "new") == "new"
+
+def test_providers_cache_sees_writes(client):
+    """Test that cached providers are refreshed by write routes and by commits from other connections"""
+    cache = get_cache(PROVIDERS_CACHE)
+    url = "/api/providers?limit=500"
+    first = client.get(url).json()
+    before = cache.stats()
+    assert client.get(url).json() == first
+    assert cache.stats()["hits"] == before["hits"] + 1
+
+    # A write through the API invalidates the cache
+    created = client.post("/api/providers", json={"provider_name": "Cache Test Provider"}).json()
+    provider_id = created["provider_id"]
+    try:
+        names = [p["provider_name"] for p in client.get(url).json()["items"]]
+        assert "Cache Test Provider" in names
+        assert cache.stats()["invalidations"] == before["invalidations"] + 1
+
+        # A commit from another connection (e.g. another worker) changes data_version
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute(
+            "UPDATE providers SET provider_name = 'Renamed Elsewhere' WHERE provider_id = ?",
+            (provider_id,),
+        )
+        conn.commit()
+        conn.close()
+        names = [p["provider_name"] for p in client.get(url).json()["items"]]
+        assert "Renamed Elsewhere" in names
+    finally:
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute("DELETE FROM providers WHERE provider_id = ?", (provider_id,))
+        conn.commit()
+        conn.close()
+
+def test_reference_cache_stats_reported(client):
+    """Test that cache counters appear in /health/db and /metrics"""
+    client.get("/api/active-contracts?limit=5")
+    client.get("/api/active-contracts?limit=5")
+    caches = client.get("/health/db").json()["reference_caches"]
+    assert caches["active_contracts"]["hits"] >= 1
+    assert set(caches) == {"providers", "date_dimensions", "active_contracts"}
+
+    body = client.get("/metrics").text
+    assert 'payments_reference_cache_hits_total{cache="active_contracts"}' in body
+    assert 'payments_reference_cache_misses_total{cache="date_dimensions"}' in body
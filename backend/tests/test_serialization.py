@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from app.models.clients import ClientModel
+from app.models.payments import PaymentModel, PaymentViewModel
+from app.pagination import fetch_dicts
+from app.serialization import FastJSONResponse, list_response, trusted_rows
+
+def test_trusted_rows_match_validated_output(db_connection):
+    """The fast path produces the same JSON as validating through the model"""
+    cases = [
+        (PaymentModel, "SELECT * FROM payments WHERE typeof(total_assets) != 'text' LIMIT 200"),
+        (PaymentViewModel,
+         "SELECT p.*, c.display_name FROM v_payments p LEFT JOIN clients c USING (client_id) "
+         "WHERE typeof(p.total_assets) != 'text' LIMIT 200"),
+        (ClientModel, "SELECT * FROM clients"),
+    ]
+    for model, query in cases:
+        rows = fetch_dicts(db_connection, query, [])
+        expected = [model.model_validate(row).model_dump(mode="json") for row in rows]
+        assert trusted_rows(model, rows) == expected
+
+def test_trusted_rows_convert_types():
+    """REAL columns stay floats and SQLite timestamps become ISO 8601"""
+    row = {"contract_id": 1, "client_id": 2, "total_assets": 500000, "valid_from": "2025-03-21 08:08:05"}
+    shaped = trusted_rows(PaymentModel, [row])[0]
+    assert isinstance(shaped["total_assets"], float)
+    assert shaped["valid_from"] == "2025-03-21T08:08:05"
+    assert shaped["payment_id"] is None
+
+def test_list_response_body():
+    response = list_response(ClientModel, [], total=0)
+    assert isinstance(response, FastJSONResponse)
+    assert json.loads(response.body) == {"items": [], "total": 0}
+
+def test_list_response_rejects_non_numeric_float():
+    """A row whose REAL column holds text is validated by the model and rejected"""
+    row = {"payment_id": 1, "contract_id": 1, "client_id": 2, "total_assets": "-"}
+    with pytest.raises(ValidationError):
+        list_response(PaymentModel, [row], total=1)
+
+def test_trusted_rows_fall_back_to_model_coercion():
+    """Rows the type checks cannot pass are shaped by model validation"""
+    good = {"payment_id": 1, "contract_id": 1, "client_id": 2, "total_assets": 5}
+    coerced = {"payment_id": 2, "contract_id": 1, "client_id": 2, "total_assets": "1.5"}
+    shaped = trusted_rows(PaymentModel, [good, coerced])
+    assert shaped[0]["total_assets"] == 5.0
+    assert shaped[1] == PaymentModel.model_validate(coerced).model_dump(mode="json")
+    assert shaped[1]["total_assets"] == 1.5
+
+def test_first_payments_with_text_assets_fail_like_validation(client):
+    """Test that a text total_assets is not passed through to the client"""
+    # Client 3's first payment has total_assets '-' in payments.db
+    with pytest.raises(ValidationError):
+        client.get("/api/clients/first-payments?client_id=3")
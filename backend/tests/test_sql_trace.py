@@ -0,0 +1,66 @@
+import logging
+
+from app.db import get_read_connection
+from app.sql_trace import end_trace, log_trace, start_trace
+
+def test_trace_headers(client):
+    """Test that responses carry the request ID, query count and DB time"""
+    response = client.get("/api/payments?limit=5", headers={"X-Request-ID": "test-trace-1"})
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"] == "test-trace-1"
+    assert int(response.headers["X-DB-Query-Count"]) >= 1
+    assert float(response.headers["X-DB-Time-Ms"]) > 0
+
+    # Requests without a usable ID get a generated one
+    response = client.get("/health", headers={"X-Request-ID": "bad id\twith spaces"})
+    assert response.headers["X-Request-ID"] != "bad id\twith spaces"
+    assert len(response.headers["X-Request-ID"]) == 32
+    assert response.headers["X-DB-Query-Count"] == "0"
+
+def test_statements_are_recorded_with_rows_and_params():
+    """Test that pooled connections record text, params, time and rows on the current trace"""
+    trace, token = start_trace("test-trace-2")
+    try:
+        with get_read_connection() as conn:
+            conn.execute("SELECT client_id FROM clients WHERE client_id <= ?", (3,)).fetchall()
+            rows = list(conn.execute("SELECT provider_id FROM providers LIMIT 2"))
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    finally:
+        end_trace(token)
+
+    assert len(rows) == 2
+    # Pool health checks are not recorded
+    assert [record.sql for record in trace.statements] == [
+        "SELECT client_id FROM clients WHERE client_id <= ?",
+        "SELECT provider_id FROM providers LIMIT 2",
+        "SELECT 1",
+    ]
+    assert trace.statements[0].params == (3,)
+    assert [record.rows for record in trace.statements] == [3, 2, 1]
+    assert trace.query_count == 3
+    assert trace.db_seconds == sum(record.seconds for record in trace.statements) > 0
+
+    # Nothing is recorded outside a trace
+    with get_read_connection() as conn:
+        conn.execute("SELECT 1").fetchone()
+    assert trace.query_count == 3
+
+def test_slow_query_log(caplog):
+    """Test that statements over the threshold are logged with the request ID"""
+    trace, token = start_trace("test-trace-3")
+    try:
+        with get_read_connection() as conn:
+            conn.execute("SELECT COUNT(*) FROM payments WHERE client_id = ?", (1,)).fetchone()
+    finally:
+        end_trace(token)
+
+    with caplog.at_level(logging.WARNING, logger="app.sql_trace"):
+        log_trace(trace, "GET", "/api/test", threshold_ms=10_000)
+        assert caplog.records == []
+        log_trace(trace, "GET", "/api/test", threshold_ms=0)
+    assert len(caplog.records) == 1
+    message = caplog.records[0].getMessage()
+    assert "request=test-trace-3 GET /api/test" in message
+    assert "SELECT COUNT(*) FROM payments WHERE client_id = ? params=(1,)" in message